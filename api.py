@@ -0,0 +1,413 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+from feeder_registry import REGISTRY_PATH, FeederRegistry
+from feeder_stats import batch_statistics, stack_feeders, status_of
+from feeder_store import FeederStore, to_window
+from forecasting import HORIZON, combine_forecasts, forecast_accuracy
+from hierarchy import (DEFAULT_METHOD as DEFAULT_RECONCILIATION, METHODS as RECONCILIATION_METHODS, SYSTEM_NODE,
+                       UNASSIGNED, Hierarchy, node_forecast, reconcile_models, substation_node)
+from model_registry import ModelRegistry
+from query_cache import LIVE_TTL_SECONDS, QUERY_CACHE
+from recommendation import forecast_load_matrix, recommend_transfers
+from rollups import RollupStore, query_feeder
+from transfer_solver import tie_matrix
+from worker import CHART_POINTS, default_windows
+
+# ==================== CONFIG ====================
+DEFAULT_HOST = os.environ.get('FEEDER_API_HOST', '127.0.0.1')
+DEFAULT_PORT = int(os.environ.get('FEEDER_API_PORT', 8600))
+MAX_HORIZON = 7 * 24
+# Clients revalidate on every request; an unchanged result then costs one ETag check and a 304
+CACHE_CONTROL = 'no-cache'
+# The system forecast without reconciliation: feeder forecasts summed, as the dashboard did before hierarchies
+PLAIN_SUM = 'sum'
+
+
+# ==================== STATE ====================
+class FeederVersions:
+    """Per-feeder data versions read from the store's change log.
+
+    A feeder's version is the change log offset after the last batch that
+    touched it, so an ETag built from versions changes exactly when one of
+    its feeders is written.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.offset = 0
+        self.last = {}
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Read the log entries written since the last call"""
+        with self.lock:
+            changes, offset = self.store.changes_since(self.offset)
+            if changes is None:
+                # The log was truncated; rescan it so no feeder keeps a stale version
+                self.last.clear()
+                changes, offset = self.store.changes_since(0)
+            for feeder_id, _ in changes:
+                self.last[feeder_id] = offset
+            self.offset = offset
+
+    def get(self, feeder_ids):
+        return [self.last.get(f, 0) for f in feeder_ids]
+
+
+class ApiState:
+    """Store, model and registry handles of one API process, and the computations behind each endpoint.
+
+    Every result goes through the same modules and QUERY_CACHE keys as the
+    dashboard and worker.py, so numbers match what the dashboard shows.
+    """
+
+    def __init__(self, store=None, models=None, registry_path=REGISTRY_PATH):
+        self.store = store or FeederStore()
+        self.models = models or ModelRegistry()
+        self.registry_path = registry_path
+        self.rollups = RollupStore(self.store)
+        self.versions = FeederVersions(self.store)
+        self._registry = (None, None)
+        self._entry = lru_cache(maxsize=4096)(lambda feeder_id, mtime: self.models.entry(feeder_id))
+        self._load_model = lru_cache(maxsize=256)(lambda feeder_id, version: self.models.load(feeder_id, version))
+
+    # ---------- handles ----------
+    def sync(self):
+        """Pick up partitions written since the last request: drop their cached results and bump their versions"""
+        QUERY_CACHE.sync_store(self.store)
+        self.versions.refresh()
+
+    def registry(self):
+        """The feeder registry, reloaded when its file changes or, without one, when feeders are written"""
+        mtime = os.path.getmtime(self.registry_path) if os.path.exists(self.registry_path) else None
+        stamp = (mtime, self.versions.offset if mtime is None else None)
+        if self._registry[0] != stamp:
+            self._registry = (stamp, FeederRegistry.load(self.registry_path, fallback_ids=self.store.feeders()))
+        return self._registry[1]
+
+    def forecaster(self, feeder_id):
+        """Active model of a feeder or aggregate node, or None"""
+        entry = self._entry(feeder_id, self.models.manifest_mtime(feeder_id))
+        return None if entry is None else self._load_model(feeder_id, entry['version'])
+
+    def aggregates(self):
+        """Model ids of the substation and system nodes a reconciliation may use"""
+        names = {name or UNASSIGNED for name in self.registry().frame['substation']}
+        return [SYSTEM_NODE] + [substation_node(name) for name in sorted(names)]
+
+    def resolve(self, feeders):
+        """Feeder ids from a comma-separated query value; every registered feeder by default"""
+        ids = self.registry().ids
+        if not feeders or feeders == 'all':
+            return ids
+        requested = list(dict.fromkeys(f.strip() for f in feeders.split(',') if f.strip()))
+        unknown = [f for f in requested if f not in ids]
+        if unknown:
+            raise HTTPException(404, f"Unknown feeders: {unknown}")
+        return requested
+
+    def etag(self, endpoint, params, feeder_ids, models=()):
+        """Changes whenever the request, the registry, a feeder's readings or one of the models change"""
+        parts = [endpoint, params, self.versions.get(feeder_ids), self._registry[0],
+                 [self.models.manifest_mtime(m) for m in models]]
+        digest = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+        return f'"{digest[:24]}"'
+
+    # ---------- computations ----------
+    def frames(self, feeder_ids, start_date, end_date):
+        """Readings at the resolution of the dashboard's All Feeders view, as worker.py snapshots them"""
+        live = to_window(start_date, end_date)[1] > pd.Timestamp.now()
+        return {
+            f: QUERY_CACHE.get_or_compute(
+                ('frame', f, str(start_date), str(end_date), 'api'),
+                lambda f=f: query_feeder(self.store, f, start_date, end_date, CHART_POINTS, self.rollups,
+                                         aggregated=True)[0],
+                tags=[('feeder', f)],
+                ttl=LIVE_TTL_SECONDS if live else None
+            )
+            for f in feeder_ids
+        }
+
+    def statistics(self, feeder_ids, start_date, end_date):
+        frames = self.frames(feeder_ids, start_date, end_date)
+        values, i_nom, envelope = stack_feeders(frames)
+        stats = batch_statistics(values, i_nom if len(i_nom) else None, envelope).reindex(feeder_ids)
+        stats['i_nom'] = i_nom.reindex(feeder_ids)
+        stats['time'] = [frames[f]['time'].iloc[-1] if len(frames[f]) else None for f in feeder_ids]
+        return stats
+
+    def forecast(self, feeder_id, horizon=HORIZON):
+        forecaster = self.forecaster(feeder_id)
+        if forecaster is None:
+            return None
+        return QUERY_CACHE.get_or_compute(
+            ('forecast', feeder_id, forecaster.version, horizon),
+            lambda: forecaster.predict(horizon),
+            tags=[('model', feeder_id)]
+        )
+
+    def reconciled(self, feeder_ids, method=DEFAULT_RECONCILIATION, horizon=HORIZON):
+        """Coherent forecasts of the feeders with a model, their substations and the system; None without models"""
+        fitted = [f for f in feeder_ids if self.forecaster(f) is not None]
+        if not fitted:
+            return None
+        hierarchy = Hierarchy.from_registry(self.registry(), fitted)
+        forecasters = {node: self.forecaster(node) for node in hierarchy.nodes}
+        forecasters = {node: forecaster for node, forecaster in forecasters.items() if forecaster is not None}
+        return QUERY_CACHE.get_or_compute(
+            ('reconciled_forecast', tuple((node, f.version) for node, f in forecasters.items()),
+             tuple(hierarchy.nodes), method, horizon),
+            lambda: reconcile_models(
+                hierarchy, forecasters, {node: self.forecast(node, horizon) for node in forecasters}, method
+            ),
+            tags=[('model', node) for node in forecasters]
+        )
+
+    def load_profile(self, feeder_ids, start_date, end_date):
+        """Feeders with readings, their (feeders x steps) current + forecast load and I_nom, as worker.py builds it"""
+        stats = self.statistics(feeder_ids, start_date, end_date)
+        available = [f for f in feeder_ids if np.isfinite(stats.at[f, 'current'])]
+        load = forecast_load_matrix(
+            stats.loc[available, 'current'].to_numpy(), [self.forecast(f) for f in available], HORIZON
+        )
+        return available, load, stats.loc[available, 'i_nom'].to_numpy(dtype='float64')
+
+
+# ==================== ENCODING ====================
+def _json_default(value):
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(payload):
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode()
+
+
+def records(frame):
+    """DataFrame rows as JSON-ready dicts, NaN as null"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def _matches(request, etag):
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    tags = [t.strip().removeprefix('W/') for t in header.split(',')]
+    return '*' in tags or etag in tags
+
+
+async def respond(request, state, endpoint, params, feeder_ids, compute, models=()):
+    """JSON response with an ETag; 304 when the client holds it, the cached body when another client asked already.
+
+    feeder_ids are the feeders whose readings the result depends on, models
+    the feeders and nodes whose active model it depends on. Only a miss
+    leaves the event loop: compute runs in the thread pool.
+    """
+    etag = state.etag(endpoint, params, feeder_ids, models)
+    headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    key = ('api', etag)
+    body = QUERY_CACHE.get(key)
+    if body is None:
+        tags = [('feeder', f) for f in feeder_ids] + [('model', m) for m in models]
+        generation = QUERY_CACHE.generation(tags)
+        body = encode(await run_in_threadpool(compute))
+        QUERY_CACHE.put(key, body, tags=tags, generation=generation)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+def _window(start, end):
+    default_start, default_end = default_windows()[0]
+    start, end = start or default_start, end or default_end
+    if start > end:
+        raise HTTPException(422, "start must not be after end")
+    return start, end
+
+
+# ==================== APP ====================
+FEEDERS_QUERY = Query(None, description="Comma-separated feeder ids (default: every registered feeder)")
+
+
+def create_app(state=None):
+    """The HTTP API over one ApiState; a fresh state on the configured store and models by default"""
+    state = state or ApiState()
+    api = FastAPI(title="Feeder Monitoring API", description="Feeder statistics, forecasts and transfer recommendations")
+
+    @api.get('/health')
+    async def health():
+        return {'status': 'ok', 'cache': QUERY_CACHE.usage()}
+
+    @api.get('/feeders')
+    async def feeders(request: Request):
+        state.sync()
+        registry = state.registry()
+        ids = registry.ids
+
+        def compute():
+            frame = registry.frame.reset_index().rename(columns={'id': 'feeder_id'})
+            frame['has_model'] = [state.forecaster(f) is not None for f in ids]
+            return {'feeders': records(frame)}
+        return await respond(request, state, 'feeders', {}, ids, compute, models=ids)
+
+    @api.get('/stats')
+    async def stats(request: Request, feeders: str = FEEDERS_QUERY, start: date = None, end: date = None):
+        """Load statistics of each feeder over a date window (default: the dashboard's last 7 days)"""
+        state.sync()
+        ids, (start, end) = state.resolve(feeders), _window(start, end)
+        registry = state.registry()
+
+        def compute():
+            frame = state.statistics(ids, start, end)
+            frame.insert(0, 'name', [registry.name(f) for f in ids])
+            frame['status'] = [status_of(u) for u in frame['utilization']]
+            return {'start': start, 'end': end, 'feeders': records(frame.rename_axis('feeder_id').reset_index())}
+        return await respond(request, state, 'stats', [start, end], ids, compute)
+
+    @api.get('/utilization')
+    async def utilization(request: Request, feeders: str = FEEDERS_QUERY):
+        """Latest reading of each feeder against its I_nom"""
+        state.sync()
+        ids, (start, end) = state.resolve(feeders), _window(None, None)
+
+        def compute():
+            frame = state.statistics(ids, start, end)[['time', 'current', 'i_nom', 'utilization']]
+            frame['status'] = [status_of(u) for u in frame['utilization']]
+            return {'feeders': records(frame.rename_axis('feeder_id').reset_index())}
+        return await respond(request, state, 'utilization', [start, end], ids, compute)
+
+    @api.get('/forecast')
+    async def forecast(request: Request, feeders: str = FEEDERS_QUERY,
+                       horizon: int = Query(HORIZON, ge=1, le=MAX_HORIZON),
+                       reconciliation: str = Query(None, description=f"One of {RECONCILIATION_METHODS} (default: none)")):
+        """Forecast of each feeder's active model, optionally reconciled with its substation and the system"""
+        state.sync()
+        ids = state.resolve(feeders)
+        if reconciliation is not None and reconciliation not in RECONCILIATION_METHODS:
+            raise HTTPException(422, f"reconciliation must be one of {RECONCILIATION_METHODS}")
+
+        def compute():
+            reconciled = None
+            if reconciliation:
+                try:
+                    reconciled = state.reconciled(state.registry().ids, reconciliation, horizon)
+                except ValueError as exc:
+                    raise HTTPException(409, str(exc))
+            rows = []
+            for f in ids:
+                forecaster = state.forecaster(f)
+                prediction = state.forecast(f, horizon)
+                if reconciled is not None and prediction is not None:
+                    prediction = node_forecast(reconciled, f)
+                rows.append({
+                    'feeder_id': f,
+                    'version': forecaster.version if forecaster is not None else None,
+                    'accuracy': forecast_accuracy(forecaster),
+                    'forecast': records(prediction) if prediction is not None else None,
+                })
+            return {'horizon': horizon, 'reconciliation': reconciliation, 'feeders': rows}
+        # A reconciled feeder depends on every model in the hierarchy
+        models = state.registry().ids + state.aggregates() if reconciliation else ids
+        return await respond(request, state, 'forecast', [ids, horizon, reconciliation], [], compute, models=models)
+
+    @api.get('/forecast/system')
+    async def system_forecast(request: Request, horizon: int = Query(HORIZON, ge=1, le=MAX_HORIZON),
+                              reconciliation: str = Query(DEFAULT_RECONCILIATION,
+                                                          description=f"One of {RECONCILIATION_METHODS} or '{PLAIN_SUM}'")):
+        """System forecast of every feeder, as the dashboard's All Feeders panel shows it"""
+        if reconciliation not in (*RECONCILIATION_METHODS, PLAIN_SUM):
+            raise HTTPException(422, f"reconciliation must be one of {(*RECONCILIATION_METHODS, PLAIN_SUM)}")
+        state.sync()
+        ids = state.registry().ids
+
+        def compute():
+            accuracies = [forecast_accuracy(state.forecaster(f)) for f in ids]
+            prediction = None
+            if reconciliation != PLAIN_SUM:
+                try:
+                    reconciled = state.reconciled(ids, reconciliation, horizon)
+                except ValueError as exc:
+                    raise HTTPException(409, str(exc))
+                if reconciled is not None:
+                    prediction = node_forecast(reconciled, SYSTEM_NODE)
+                    accuracies = [a for a in accuracies if a is not None]
+                    accuracy = float(np.mean(accuracies)) if accuracies else None
+            if prediction is None:
+                prediction, accuracy = combine_forecasts([state.forecast(f, horizon) for f in ids], accuracies)
+            return {
+                'horizon': horizon,
+                'reconciliation': reconciliation,
+                'accuracy': accuracy,
+                'forecast': records(prediction) if prediction is not None else None,
+            }
+        models = ids + state.aggregates() if reconciliation != PLAIN_SUM else ids
+        return await respond(request, state, 'forecast/system', [horizon, reconciliation], [], compute, models=models)
+
+    @api.get('/recommendations')
+    async def recommendations(request: Request, feeders: str = FEEDERS_QUERY):
+        """Ranked transfer targets for moving each source feeder's load, over the current + forecast load"""
+        state.sync()
+        sources, (start, end) = state.resolve(feeders), _window(None, None)
+        registry = state.registry()
+        ids = registry.ids
+
+        def compute():
+            available, load, i_nom = state.load_profile(ids, start, end)
+            results = {}
+            if len(available) >= 2:
+                results = recommend_transfers(available, load, i_nom, [f for f in sources if f in available],
+                                              allowed=tie_matrix(available, registry.ties))
+            rows = []
+            for source in sources:
+                if source not in results:
+                    rows.append({'feeder_id': source, 'decision': None, 'target': None,
+                                 'reasons': ["No recent readings" if source not in available else "No other feeder"],
+                                 'candidates': []})
+                    continue
+                result = results[source]
+                rows.append({
+                    'feeder_id': source,
+                    'decision': result['decision'],
+                    'target': result['target'],
+                    'transfer_peak': result['transfer_peak'],
+                    'reasons': result['reasons'],
+                    'candidates': records(result['candidates']),
+                })
+            return {'feeders': rows}
+        return await respond(request, state, 'recommendations', [sources, start, end], ids, compute, models=ids)
+
+    return api
+
+
+app = create_app()
+
+
+# ==================== CLI ====================
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve feeder statistics, forecasts and recommendations as JSON")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=1, help="Server processes, each with its own result cache")
+    args = parser.parse_args()
+    uvicorn.run('api:app', host=args.host, port=args.port, workers=args.workers, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
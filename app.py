@@ -4,7 +4,30 @@ import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
+import copy
+import os
 import time
+from functools import lru_cache
+
+from detector import EventLog, StreamDetector, state_path
+from downsample import downsample, target_points
+from feeder_stats import CRITICAL_RATIO, batch_statistics, stack_feeders, status_of, system_total
+from feeder_store import FeederStore, to_window
+from feeder_registry import REGISTRY_PATH, FeederRegistry
+from backtest import coverage_level, load_summary, summary_path, system_scores
+from forecasting import HORIZON, combine_forecasts, forecast_accuracy
+from hierarchy import (DEFAULT_METHOD as DEFAULT_RECONCILIATION, METHOD_LABELS as RECONCILIATION_LABELS,
+                       METHODS as RECONCILIATION_METHODS, SYSTEM_NODE, Hierarchy, is_aggregate, node_forecast,
+                       reconcile_models)
+from rollups import RollupStore, buckets_to_frame, fold_readings, plan_freq, plan_tier
+from model_registry import ModelRegistry
+from overload_risk import N_PATHS, THRESHOLDS, overload_risk
+from recommendation import forecast_load_matrix, recommend_transfer
+from transfer_solver import solve_transfer, tie_matrix
+from result_cache import MAX_AGE_SECONDS, ResultCache, snapshot_key
+from system_kpis import SystemKPIs, frame_buckets, read_kpi_buckets
+from query_cache import LIVE_TTL_SECONDS, QUERY_CACHE
+from instrumentation import PROCESS_STATS, StageStats, record_run, rss_bytes, stage
 
 # ==================== PAGE CONFIG ====================
 st.set_page_config(
@@ -15,7 +38,7 @@ st.set_page_config(
 )
 
 # ==================== CUSTOM CSS ====================
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     /* Import Google Fonts */
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&family=JetBrains+Mono:wght@400;600&display=swap');
@@ -439,6 +462,49 @@ st.markdown("""
         font-family: 'JetBrains Mono', monospace;
     }
     
+    /* Feeder Tiles */
+    .feeder-tiles {
+        display: grid;
+        grid-template-columns: repeat(auto-fill, minmax(160px, 1fr));
+        gap: 10px;
+        margin: 15px 0 25px 0;
+    }
+    
+    .feeder-tile {
+        background: rgba(15, 23, 42, 0.6);
+        border: 1px solid rgba(148, 163, 184, 0.15);
+        border-left: 3px solid var(--tile-status);
+        border-radius: 10px;
+        padding: 8px 10px;
+    }
+    
+    .feeder-tile.in-view {
+        border-color: rgba(6, 182, 212, 0.6);
+        border-left-color: var(--tile-status);
+        box-shadow: 0 0 12px rgba(6, 182, 212, 0.25);
+    }
+    
+    .feeder-tile-head {
+        display: flex;
+        justify-content: space-between;
+        color: #e2e8f0;
+        font-size: 0.8em;
+        font-weight: 600;
+    }
+    
+    .feeder-tile-value {
+        color: var(--tile-status);
+        font-family: 'JetBrains Mono', monospace;
+    }
+    
+    .feeder-tile-sub {
+        color: #64748b;
+        font-size: 0.7em;
+        white-space: nowrap;
+        overflow: hidden;
+        text-overflow: ellipsis;
+    }
+    
     /* Loading Animation */
     .loading-pulse {
         animation: pulse 2s ease-in-out infinite;
@@ -456,10 +522,10 @@ st.markdown("""
         margin: 30px 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # ==================== DATA GENERATION ====================
-@st.cache_data
+@st.cache_data(max_entries=8)
 def generate_beban_real_data(periods=45):
     """Generate realistic load data"""
     time_points = list(range(1, periods + 1))
@@ -473,7 +539,7 @@ def generate_beban_real_data(periods=45):
         'value': values
     })
 
-@st.cache_data
+@st.cache_data(max_entries=8)
 def generate_prediksi_data(periods=45):
     """Generate prediction data"""
     time_points = list(range(1, periods + 1))
@@ -487,58 +553,442 @@ def generate_prediksi_data(periods=45):
         'value': values
     })
 
-@st.cache_data
-def generate_penyulang_data(penyulang_name, periods=46):
-    """Generate feeder data"""
+@st.cache_data(max_entries=1024)
+def generate_penyulang_data(penyulang_name, i_nom=200.0, periods=46):
+    """Generate feeder data around 90% of the feeder's I_nom"""
     time_points = list(range(1, periods + 1))
-    offsets = {'A': 0, 'B': 5, 'C': -5, 'D': 10}
-    offset = offsets.get(penyulang_name, 0)
     
-    base_load = 180 + offset
+    base_load = i_nom - 20
     noise = np.random.normal(0, 5, periods)
     seasonal = np.sin(np.array(time_points) * 0.2) * 15
     values = base_load + noise + seasonal
     
-    i_nom = 200 + offset
-    
     return pd.DataFrame({
         'time': time_points,
         'value': values,
         'i_nom': [i_nom] * periods
     })
 
+# ==================== FEEDER STORE ====================
+@st.cache_resource
+def get_feeder_store():
+    """Shared handle to the on-disk feeder store"""
+    return FeederStore()
+
+@st.cache_resource(max_entries=4)
+def _load_feeder_registry(mtime, fallback_ids):
+    return FeederRegistry.load(REGISTRY_PATH, fallback_ids)
+
+def get_feeder_registry():
+    """Feeders of the network from the registry file, reloaded when it changes.
+
+    Without a registry file every feeder in the store is shown with default settings.
+    """
+    mtime = os.path.getmtime(REGISTRY_PATH) if os.path.exists(REGISTRY_PATH) else None
+    fallback_ids = () if mtime is not None else tuple(get_feeder_store().feeders())
+    return _load_feeder_registry(mtime, fallback_ids)
+
+@st.cache_data(max_entries=4)
+def _load_detector_alerts(state_version, log_version, rows):
+    store = get_feeder_store()
+    return StreamDetector.load(state_path(store)).active(), EventLog(store).tail(rows)
+
+def load_detector_alerts(rows=50):
+    """Active alerts per feeder and the latest events, as left by the ingest process.
+    
+    Reloaded only when the detector state or event log changes; no readings are scanned.
+    """
+    store = get_feeder_store()
+    versions = [
+        (os.stat(path).st_mtime_ns, os.stat(path).st_size) if os.path.exists(path) else None
+        for path in (state_path(store), EventLog(store).path)
+    ]
+    return _load_detector_alerts(*versions, rows)
+
+@st.cache_data(max_entries=4096)
+def load_partition(penyulang_name, day, token):
+    """Load one feeder/day partition; token changes only when that partition is appended to"""
+    return get_feeder_store().read_partition(penyulang_name, day)
+
+@st.cache_resource
+def get_rollup_store():
+    """Shared handle to the pre-aggregated rollup tiers"""
+    return RollupStore(get_feeder_store())
+
+@st.cache_data(max_entries=1024)
+def load_rollup_period(tier, penyulang_name, period_label, token):
+    """Load one rollup file; token changes only when that file is rewritten"""
+    return get_rollup_store().read_period(tier, penyulang_name, period_label)
+
+def _load_raw_data(penyulang_name, start_date, end_date):
+    store = get_feeder_store()
+    start, end = to_window(start_date, end_date)
+    frames = [
+        load_partition(penyulang_name, day, token)
+        for day, token in store.partition_tokens(penyulang_name, start_date, end_date)
+    ]
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame({'time': [], 'value': [], 'i_nom': []})
+    readings = pd.concat(frames, ignore_index=True)
+    readings = readings[(readings['timestamp'] >= start) & (readings['timestamp'] < end)]
+    return pd.DataFrame({
+        'time': readings['timestamp'].values,
+        'value': readings['i'].values,
+        'i_nom': readings['i_nom'].values
+    })
+
+def _load_rollup_data(tier, penyulang_name, start_date, end_date):
+    rollups = get_rollup_store()
+    buckets = rollups.read(
+        tier, penyulang_name, start_date, end_date,
+        read_period=lambda t, p, label: load_rollup_period(t, p, label, rollups.token(t, p, label))
+    )
+    return buckets_to_frame(buckets)
+
+@stage('data_load')
+def load_penyulang_data(penyulang_name, start_date, end_date, max_points=None, aggregated=False):
+    """Load stored feeder readings for the selected window.
+
+    With max_points the coarsest rollup tier that still fills the chart is
+    used instead of raw readings; aggregated always reads a rollup tier.
+    Only the feeder's partitions or rollup files inside the window are
+    touched. Results are shared across sessions and dropped as soon as the
+    feeder's partitions change.
+    """
+    tier = 'raw' if max_points is None else plan_tier(start_date, end_date, max_points, aggregated)
+    if tier == 'raw':
+        compute = lambda: _load_raw_data(penyulang_name, start_date, end_date)
+    else:
+        def compute():
+            frame = _load_rollup_data(tier, penyulang_name, start_date, end_date)
+            # Feeders whose rollups were never built fall back to raw readings
+            return frame if len(frame) else _load_raw_data(penyulang_name, start_date, end_date)
+    return QUERY_CACHE.get_or_compute(
+        ('frame', penyulang_name, str(start_date), str(end_date), tier),
+        compute,
+        tags=[('feeder', penyulang_name)],
+        ttl=LIVE_TTL_SECONDS if to_window(start_date, end_date)[1] > pd.Timestamp.now() else None
+    )
+
+def load_beban_real_data(penyulangs, start_date, end_date, max_points=None, aggregated=False):
+    """Load total system load for the selected window"""
+    frames = {p: load_penyulang_data(p, start_date, end_date, max_points, aggregated) for p in penyulangs}
+    return system_total(frames, plan_freq(start_date, end_date, max_points, aggregated))
+
+def load_latest_reading(penyulang_name, start_date, end_date):
+    """Last stored reading of a feeder in the window as a one-row frame, read from a single partition"""
+    for day, token in reversed(get_feeder_store().partition_tokens(penyulang_name, start_date, end_date)):
+        readings = load_partition(penyulang_name, day, token)
+        if len(readings):
+            last = readings.loc[[readings['timestamp'].idxmax()]]
+            return pd.DataFrame({'time': last['timestamp'].values, 'value': last['i'].values, 'i_nom': last['i_nom'].values})
+    return pd.DataFrame({'time': [], 'value': [], 'i_nom': []})
+
+@stage('statistics')
+def load_system_kpis(penyulangs, start_date, end_date):
+    """System overview of every feeder, seeded from the hourly tier and shared across sessions.
+
+    Rebuilt only when a feeder's partitions change, and then only that
+    feeder's rollup files are read again.
+    """
+    registry = get_feeder_registry()
+    i_nom = tuple(float(registry.i_nom(p)) for p in penyulangs)
+    
+    def compute():
+        store, rollups = get_feeder_store(), get_rollup_store()
+        read_period = lambda t, p, label: load_rollup_period(t, p, label, rollups.token(t, p, label))
+        buckets = {p: read_kpi_buckets(store, rollups, p, start_date, end_date, read_period) for p in penyulangs}
+        return SystemKPIs.from_buckets(buckets, penyulangs, i_nom)
+    # Keyed on the registry I_nom too, so editing it refreshes the overview
+    return QUERY_CACHE.get_or_compute(
+        ('kpis', tuple(penyulangs), str(start_date), str(end_date), i_nom),
+        compute,
+        tags=[('feeder', p) for p in penyulangs],
+        ttl=LIVE_TTL_SECONDS if to_window(start_date, end_date)[1] > pd.Timestamp.now() else None
+    )
+
+# ==================== SHARED RESULTS ====================
+@st.cache_resource
+def get_result_cache():
+    """Read-only handle to the results published by worker.py"""
+    return ResultCache(create=False)
+
+@st.cache_data(max_entries=16)
+def _load_snapshot(key, computed_at):
+    snapshot = get_result_cache().get(key)
+    return None if snapshot is None else dict(snapshot, computed_at=computed_at)
+
+@stage('data_load')
+def load_snapshot(start_date, end_date, max_points):
+    """Worker-computed stats, forecasts and recommendations for the window, or None if not fresh"""
+    key = snapshot_key(start_date, end_date, max_points)
+    stamp = get_result_cache().stamp(key)
+    if stamp is None or time.time() - stamp[1] > MAX_AGE_SECONDS:
+        return None
+    return _load_snapshot(key, stamp[0])
+
+# ==================== LIVE MODE ====================
+# Refresh interval choices in seconds
+LIVE_INTERVALS = [5, 10, 15, 30, 60]
+
+def _latest_reading(penyulang_name, start_date, end_date):
+    latest = load_latest_reading(penyulang_name, start_date, end_date)
+    return latest['time'].iloc[0] if len(latest) else None
+
+def reset_live_frames(penyulang_frames, start_date, end_date, system_kpis, freq):
+    """Start the live series and this session's system overview from the results of a full run.
+
+    freq is the bucket width of frames read from a rollup tier.
+    """
+    st.session_state['live_frames'] = dict(penyulang_frames)
+    st.session_state['live_freq'] = freq
+    st.session_state['live_kpis'] = system_kpis.copy()
+    st.session_state['live_since'] = {p: _latest_reading(p, start_date, end_date) for p in penyulang_frames}
+    st.session_state['live_end'] = end_date
+    st.session_state['live_polled'] = time.time()
+
+@stage('data_load')
+def poll_live_frames(min_interval=1.0):
+    """Add readings newer than each feeder's last tick to the live series.
+
+    Only the partitions holding new readings are re-read. Raw frames get
+    the readings appended; frames read from a rollup tier get them folded
+    into their buckets, so a long session neither mixes bucket means with
+    single readings nor grows past one row per bucket. Fragments sharing a
+    tick reuse the first poll instead of hitting the store again.
+    """
+    frames = st.session_state['live_frames']
+    if time.time() - st.session_state['live_polled'] < min_interval:
+        return frames
+    since, end_date = st.session_state['live_since'], st.session_state['live_end']
+    QUERY_CACHE.sync_store(get_feeder_store())
+    fresh = []
+    for penyulang, last_seen in since.items():
+        if last_seen is None:
+            continue
+        new = _load_raw_data(penyulang, last_seen.date(), end_date)
+        new = new[new['time'] > last_seen]
+        if new.empty:
+            continue
+        frame = frames[penyulang]
+        if 'count' in frame:
+            frames[penyulang] = fold_readings(frame, new, st.session_state['live_freq'])
+        else:
+            frames[penyulang] = pd.concat([frame, new], ignore_index=True)
+        since[penyulang] = new['time'].max()
+        fresh.append(pd.DataFrame({'feeder_id': penyulang, 'time': new['time'], 'value': new['value']}))
+    # The overview only folds in the new readings
+    if fresh:
+        st.session_state['live_kpis'].update(pd.concat(fresh, ignore_index=True))
+    st.session_state['live_polled'] = time.time()
+    return frames
+
+# ==================== FORECASTS ====================
+@st.cache_resource
+def get_model_registry():
+    """Shared handle to the on-disk model registry"""
+    return ModelRegistry()
+
+@st.cache_resource(max_entries=256)
+def _load_forecaster(penyulang_name, version):
+    return get_model_registry().load(penyulang_name, version)
+
+def get_forecaster(penyulang_name):
+    """Lazily load the active model version of a feeder"""
+    entry = get_model_registry().entry(penyulang_name)
+    if entry is None:
+        return None
+    return _load_forecaster(penyulang_name, entry['version'])
+
+def load_feeder_forecast(penyulang_name, horizon=HORIZON):
+    """Forecast of a feeder's active model version, shared across sessions"""
+    forecaster = get_forecaster(penyulang_name)
+    if forecaster is None:
+        return None
+    return QUERY_CACHE.get_or_compute(
+        ('forecast', penyulang_name, forecaster.version, horizon),
+        lambda: forecaster.predict(horizon),
+        tags=[('model', penyulang_name)]
+    )
+
+@stage('forecast')
+def load_reconciled_forecast(penyulangs, method=DEFAULT_RECONCILIATION, horizon=HORIZON):
+    """Coherent forecasts of every feeder with a model, its substation and the system; None without models.
+    
+    Substation and system models are used where `python train.py` fitted them.
+    """
+    fitted = [p for p in penyulangs if get_forecaster(p) is not None]
+    if not fitted:
+        return None
+    hierarchy = Hierarchy.from_registry(get_feeder_registry(), fitted)
+    forecasters = {node: get_forecaster(node) for node in hierarchy.nodes}
+    forecasters = {node: forecaster for node, forecaster in forecasters.items() if forecaster is not None}
+    return QUERY_CACHE.get_or_compute(
+        ('reconciled_forecast', tuple((node, f.version) for node, f in forecasters.items()),
+         tuple(hierarchy.nodes), method, horizon),
+        lambda: reconcile_models(
+            hierarchy, forecasters, {node: load_feeder_forecast(node, horizon) for node in forecasters}, method
+        ),
+        tags=[('model', node) for node in forecasters]
+    )
+
+@stage('forecast')
+def load_prediksi_data(penyulangs, horizon=HORIZON, reconciliation=None):
+    """System forecast of the feeders with a combined interval, and their mean in-sample accuracy.
+    
+    With a reconciliation method the forecast is the system node of the
+    reconciled hierarchy; otherwise per-feeder forecasts are summed.
+    """
+    accuracies = [forecast_accuracy(get_forecaster(p)) for p in penyulangs]
+    if reconciliation is not None:
+        reconciled = load_reconciled_forecast(penyulangs, reconciliation, horizon)
+        if reconciled is not None:
+            accuracies = [a for a in accuracies if a is not None]
+            return node_forecast(reconciled, SYSTEM_NODE), (float(np.mean(accuracies)) if accuracies else None)
+    return combine_forecasts([load_feeder_forecast(p, horizon) for p in penyulangs], accuracies)
+
+@stage('forecast')
+def load_overload_risk(penyulangs, horizon=HORIZON):
+    """Monte Carlo overload probabilities of every feeder with a model, shared across sessions; None without models"""
+    forecasters = {p: get_forecaster(p) for p in penyulangs}
+    fitted = [p for p, forecaster in forecasters.items() if forecaster is not None]
+    if not fitted:
+        return None
+    registry = get_feeder_registry()
+    return QUERY_CACHE.get_or_compute(
+        ('overload_risk', tuple((p, forecasters[p].version) for p in fitted), horizon, N_PATHS),
+        lambda: overload_risk(
+            {p: load_feeder_forecast(p, horizon) for p in fitted},
+            {p: forecasters[p].residuals for p in fitted},
+            {p: registry.i_nom(p) for p in fitted}
+        ),
+        tags=[('model', p) for p in fitted]
+    )
+
+def confidence_level(data):
+    """Label a forecast by the relative width of its prediction interval"""
+    if 'upper' not in data:
+        return 'N/A'
+    relative_width = np.mean((data['upper'] - data['lower']) / data['value'].abs().clip(lower=1e-9))
+    return 'High' if relative_width < 0.10 else 'Medium' if relative_width < 0.20 else 'Low'
+
+@st.cache_data
+def _load_backtest_summary(mtime):
+    return load_summary()
+
+@stage('forecast')
+def backtest_scores(penyulangs):
+    """Out-of-sample scores of the active models from the last `python backtest.py` run, or None"""
+    path = summary_path()
+    if not os.path.exists(path):
+        return None
+    summary = _load_backtest_summary(os.path.getmtime(path))
+    entries = {p: get_model_registry().entry(p) for p in penyulangs}
+    return system_scores(summary, {p: e['method'] for p, e in entries.items() if e is not None})
+
+# ==================== RECOMMENDATIONS ====================
+@stage('recommendation')
+def feeder_load_profile(penyulang_frames, feeder_stats, demo_mode=False):
+    """Feeders with readings, their (feeders x steps) current + forecast load and I_nom"""
+    penyulangs = [p for p, frame in penyulang_frames.items() if len(frame) and p in feeder_stats.index]
+    if demo_mode:
+        load = feeder_stats.loc[penyulangs, ['current']].to_numpy()
+    else:
+        load = forecast_load_matrix(
+            feeder_stats.loc[penyulangs, 'current'].to_numpy(),
+            [load_feeder_forecast(p) for p in penyulangs],
+            HORIZON
+        )
+    i_nom = np.array([penyulang_frames[p]['i_nom'].iloc[-1] for p in penyulangs])
+    return penyulangs, load, i_nom
+
+@stage('recommendation')
+def recommend_maneuver(profile, source, ties=None):
+    """Rank transfer targets for the source feeder against its forecast load"""
+    penyulangs, load, i_nom = profile
+    if source not in penyulangs or len(penyulangs) < 2:
+        return None
+    return recommend_transfer(source, penyulangs, load, i_nom, allowed=tie_matrix(penyulangs, ties))
+
+@stage('statistics')
 def calculate_statistics(data):
     """Calculate statistical metrics"""
-    return {
-        'avg': np.mean(data['value']),
-        'max': np.max(data['value']),
-        'min': np.min(data['value']),
-        'current': data['value'].iloc[-1]
-    }
+    return calculate_feeder_statistics({'value': data}).iloc[0].to_dict()
+
+@stage('statistics')
+def calculate_feeder_statistics(penyulang_frames):
+    """Calculate statistical metrics for every feeder in one vectorized pass"""
+    values, i_nom, envelope = stack_feeders(penyulang_frames)
+    return batch_statistics(values, i_nom if len(i_nom) else None, envelope)
 
 # ==================== PLOTTING FUNCTIONS ====================
-def create_line_chart(data, title, color='#3b82f6', show_reference=False, ref_value=None):
-    """Create beautiful line chart with Plotly"""
+# Above this many raw points charts switch to WebGL lines without markers
+LARGE_SERIES_POINTS = 1000
+# Distinct chart styles kept as prebuilt skeletons
+SKELETON_CACHE_SIZE = 256
+FEEDER_GRID_ROW_HEIGHT = 340
+
+CHART_AXIS = dict(
+    gridcolor='rgba(148, 163, 184, 0.12)',
+    showgrid=True,
+    zeroline=False,
+    linecolor='rgba(148, 163, 184, 0.3)'
+)
+
+def _fill_rgba(color, alpha=0.15):
+    return f'rgba({int(color[1:3], 16)}, {int(color[3:5], 16)}, {int(color[5:7], 16)}, {alpha})'
+
+@lru_cache(maxsize=SKELETON_CACHE_SIZE)
+def _line_chart_skeleton(title, color, show_reference, ref_value, large, band):
+    """Layout and styled traces of a line chart with empty data, validated once per style"""
+    scatter = go.Scattergl if large else go.Scatter
+    
     fig = go.Figure()
+    fill_rgba = _fill_rgba(color)
+    show_interval = band == 'interval'
+    show_envelope = band == 'envelope'
+    
+    # Add prediction interval band, or the min/max range of rolled-up buckets
+    if band:
+        fig.add_trace(scatter(
+            x=[],
+            y=[],
+            mode='lines',
+            line=dict(width=0),
+            showlegend=False,
+            hovertemplate='<b>Max:</b> %{y:.2f} A<extra></extra>' if show_envelope else None,
+            hoverinfo=None if show_envelope else 'skip'
+        ))
+        fig.add_trace(scatter(
+            x=[],
+            y=[],
+            mode='lines',
+            name='95% Interval' if show_interval else 'Min/Max Range',
+            line=dict(width=0),
+            fill='tonexty',
+            fillcolor=fill_rgba,
+            hovertemplate=f"<b>{'Interval' if show_interval else 'Min'}:</b> %{{y:.2f}} A<extra></extra>"
+        ))
     
     # Add main line with gradient fill
-    fig.add_trace(go.Scatter(
-        x=data['time'],
-        y=data['value'],
-        mode='lines+markers',
-        name='Current Load',
-        line=dict(color=color, width=3.5, shape='spline'),
+    fig.add_trace(scatter(
+        x=[],
+        y=[],
+        mode='lines' if large else 'lines+markers',
+        name='Forecast Load' if show_interval else 'Current Load',
+        line=dict(color=color, width=2 if large else 3.5, shape='linear' if large else 'spline'),
         marker=dict(size=7, color=color, line=dict(color='white', width=2)),
-        fill='tozeroy',
-        fillcolor=f'rgba({int(color[1:3], 16)}, {int(color[3:5], 16)}, {int(color[5:7], 16)}, 0.15)',
+        fill='none' if band else 'tozeroy',
+        fillcolor=fill_rgba,
         hovertemplate='<b>Time Period:</b> %{x}<br><b>Load:</b> %{y:.2f} A<br><extra></extra>'
     ))
     
     # Add reference line if needed
-    if show_reference and ref_value:
+    if show_reference:
         fig.add_trace(go.Scatter(
-            x=data['time'],
-            y=[ref_value] * len(data),
+            x=[],
+            y=[],
             mode='lines',
             name=f'Nominal Current ({ref_value:.0f} A)',
             line=dict(color='#ef4444', width=2.5, dash='dash'),
@@ -547,8 +997,8 @@ def create_line_chart(data, title, color='#3b82f6', show_reference=False, ref_va
         
         # Add warning zone
         fig.add_trace(go.Scatter(
-            x=data['time'],
-            y=[ref_value * 0.9] * len(data),
+            x=[],
+            y=[],
             mode='lines',
             name='Warning Threshold (90%)',
             line=dict(color='#f59e0b', width=1.5, dash='dot'),
@@ -564,20 +1014,8 @@ def create_line_chart(data, title, color='#3b82f6', show_reference=False, ref_va
         plot_bgcolor='rgba(15, 23, 42, 0.3)',
         paper_bgcolor='rgba(0, 0, 0, 0)',
         font=dict(color='#cbd5e1', family='Inter'),
-        xaxis=dict(
-            title='Time Period',
-            gridcolor='rgba(148, 163, 184, 0.12)',
-            showgrid=True,
-            zeroline=False,
-            linecolor='rgba(148, 163, 184, 0.3)'
-        ),
-        yaxis=dict(
-            title='Load Current (Ampere)',
-            gridcolor='rgba(148, 163, 184, 0.12)',
-            showgrid=True,
-            zeroline=False,
-            linecolor='rgba(148, 163, 184, 0.3)'
-        ),
+        xaxis=dict(title='Time Period', **CHART_AXIS),
+        yaxis=dict(title='Load Current (Ampere)', **CHART_AXIS),
         hovermode='x unified',
         showlegend=True,
         legend=dict(
@@ -589,28 +1027,536 @@ def create_line_chart(data, title, color='#3b82f6', show_reference=False, ref_va
         margin=dict(l=60, r=40, t=70, b=60),
         height=380
     )
-    
+    return fig.to_dict()
+
+# Feeders shown on the overload probability heatmap, riskiest first
+RISK_ROWS = 12
+
+def create_risk_heatmap(per_step, per_feeder, column, names):
+    """Probability heatmap of the riskiest feeders (rows) over the forecast horizon (columns)"""
+    feeders = per_feeder[column].sort_values(ascending=False, kind='stable').index[:RISK_ROWS]
+    grid = per_step[column].unstack('time').reindex(feeders) * 100
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(),
+        x=grid.columns,
+        y=[names(p) for p in feeders],
+        zmin=0,
+        zmax=100,
+        colorscale=[[0, '#10b981'], [0.5, '#f59e0b'], [1, '#ef4444']],
+        colorbar=dict(title='%', ticksuffix='%'),
+        hovertemplate='<b>%{y}</b><br>%{x}<br><b>Probability:</b> %{z:.1f}%<extra></extra>'
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(15, 23, 42, 0.3)',
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        font=dict(color='#cbd5e1', family='Inter'),
+        xaxis=dict(title='Forecast Period', **CHART_AXIS),
+        yaxis=dict(autorange='reversed', **CHART_AXIS),
+        margin=dict(l=60, r=40, t=20, b=60),
+        height=max(200, 40 + 28 * len(feeders))
+    )
     return fig
 
-# ==================== MAIN APP ====================
-def main():
+def _fill_skeleton(skeleton, columns):
+    """Copy a skeleton and put (x, y) arrays into its traces, in trace order"""
+    # Traces hold no data yet, so the deep copy is cheap
+    figure = copy.deepcopy(skeleton)
+    for trace, (x, y) in zip(figure['data'], columns):
+        trace['x'] = x.to_numpy() if isinstance(x, pd.Series) else x
+        trace['y'] = y.to_numpy() if isinstance(y, pd.Series) else y
+    # Styles were validated when the skeleton was built; skipping it again is most of the saving
+    return go.Figure(figure, _validate=False)
+
+def _reference_columns(times, ref_value, large):
+    # Flat lines only need their two end points
+    ref_x = times.iloc[[0, -1]] if large else times
+    return [(ref_x, [ref_value] * len(ref_x)), (ref_x, [ref_value * 0.9] * len(ref_x))]
+
+@stage('figures')
+def create_line_chart(data, title, color='#3b82f6', show_reference=False, ref_value=None, width_px=None):
+    """Create beautiful line chart with Plotly"""
+    large = len(data) > LARGE_SERIES_POINTS
+    data = downsample(data, width_px)
+    band = 'interval' if 'lower' in data and 'upper' in data else 'envelope' if 'min' in data and 'max' in data else None
+    show_reference = bool(show_reference and ref_value)
+    
+    columns = []
+    if band:
+        lower, upper = ('lower', 'upper') if band == 'interval' else ('min', 'max')
+        columns += [(data['time'], data[upper]), (data['time'], data[lower])]
+    columns.append((data['time'], data['value']))
+    if show_reference:
+        columns += _reference_columns(data['time'], ref_value, large)
+    
+    skeleton = _line_chart_skeleton(title, color, show_reference, float(ref_value) if show_reference else None, large, band)
+    return _fill_skeleton(skeleton, columns)
+
+@lru_cache(maxsize=SKELETON_CACHE_SIZE)
+def _feeder_grid_skeleton(penyulangs, colors, ref_values, large):
+    """One figure with a subplot per feeder, two per row, with empty data"""
+    rows = max(1, -(-len(penyulangs) // 2))
+    scatter = go.Scattergl if large else go.Scatter
+    fig = make_subplots(
+        rows=rows, cols=2,
+        subplot_titles=[f"Feeder {p}" for p in penyulangs],
+        vertical_spacing=min(0.12, 0.3 / rows), horizontal_spacing=0.08
+    )
+    for idx, (penyulang, color, ref_value) in enumerate(zip(penyulangs, colors, ref_values)):
+        row, col = idx // 2 + 1, idx % 2 + 1
+        fig.add_trace(scatter(
+            x=[], y=[],
+            mode='lines' if large else 'lines+markers',
+            name=f'Feeder {penyulang}',
+            line=dict(color=color, width=2 if large else 2.5, shape='linear' if large else 'spline'),
+            marker=dict(size=5, color=color),
+            fill='tozeroy',
+            fillcolor=_fill_rgba(color),
+            hovertemplate=f'<b>Feeder {penyulang}:</b> %{{y:.2f}} A<extra></extra>'
+        ), row=row, col=col)
+        if ref_value is not None:
+            fig.add_trace(go.Scatter(
+                x=[], y=[], mode='lines', showlegend=False,
+                line=dict(color='#ef4444', width=2, dash='dash'),
+                hovertemplate='<b>I Nominal:</b> %{y:.0f} A<extra></extra>'
+            ), row=row, col=col)
+            fig.add_trace(go.Scatter(
+                x=[], y=[], mode='lines', showlegend=False,
+                line=dict(color='#f59e0b', width=1.5, dash='dot'),
+                hovertemplate='<b>Warning Level:</b> %{y:.0f} A<extra></extra>'
+            ), row=row, col=col)
+    fig.update_xaxes(**CHART_AXIS)
+    fig.update_yaxes(title='Load (A)', **CHART_AXIS)
+    fig.update_annotations(font=dict(size=15, color='#06b6d4', family='Inter'))
+    fig.update_layout(
+        plot_bgcolor='rgba(15, 23, 42, 0.3)',
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        font=dict(color='#cbd5e1', family='Inter'),
+        hovermode='x unified',
+        showlegend=False,
+        margin=dict(l=60, r=40, t=50, b=40),
+        height=FEEDER_GRID_ROW_HEIGHT * rows
+    )
+    return fig.to_dict()
+
+@stage('figures')
+def create_feeder_grid_chart(penyulang_frames, colors, width_px=None):
+    """All feeder charts batched into one make_subplots figure"""
+    penyulangs = tuple(penyulang_frames)
+    large = any(len(frame) > LARGE_SERIES_POINTS for frame in penyulang_frames.values())
+    ref_values, columns = [], []
+    for penyulang in penyulangs:
+        data = penyulang_frames[penyulang]
+        if data.empty:
+            ref_values.append(None)
+            columns.append(([], []))
+            continue
+        data = downsample(data, width_px)
+        ref_value = float(data['i_nom'].iloc[-1])
+        ref_values.append(ref_value)
+        columns.append((data['time'], data['value']))
+        columns += _reference_columns(data['time'], ref_value, large)
+    colors = tuple(colors[i % len(colors)] for i in range(len(penyulangs)))
+    skeleton = _feeder_grid_skeleton(penyulangs, colors, tuple(ref_values), large)
+    return _fill_skeleton(skeleton, columns)
+
+# ---------- sparklines ----------
+SPARKLINE_POINTS = 32
+SPARKLINE_WIDTH = 160
+SPARKLINE_HEIGHT = 32
+
+@stage('figures')
+def sparkline_series(penyulang_frames, n_points=SPARKLINE_POINTS):
+    """Every feeder's readings averaged into at most n_points buckets, in one reduceat over all feeders"""
+    series = {p: frame['value'].to_numpy(dtype='float64') for p, frame in penyulang_frames.items() if len(frame)}
+    if not series:
+        return {}
+    lengths = np.array([len(v) for v in series.values()])
+    buckets = np.minimum(lengths, n_points)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    starts = np.concatenate([
+        offset + np.arange(n) * length // n for offset, length, n in zip(offsets, lengths, buckets)
+    ])
+    flat = np.concatenate(list(series.values()))
+    valid = np.isfinite(flat)
+    with np.errstate(invalid='ignore'):
+        means = np.add.reduceat(np.where(valid, flat, 0.0), starts) / np.add.reduceat(valid, starts)
+    return dict(zip(series, np.split(means, np.cumsum(buckets)[:-1])))
+
+def sparkline_svg(points, i_nom, color, width=SPARKLINE_WIDTH, height=SPARKLINE_HEIGHT):
+    """Inline SVG polyline scaled to I_nom, with I_nom drawn dashed"""
+    top = max(i_nom, np.nanmax(points)) * 1.05 if np.isfinite(points).any() else i_nom * 1.05
+    x = np.linspace(0, width, len(points)) if len(points) > 1 else np.array([0.0])
+    y = height - points / top * height
+    keep = np.isfinite(y)
+    coords = ' '.join(f"{a:.0f},{b:.1f}" for a, b in zip(x[keep], y[keep]))
+    ref_y = height - i_nom / top * height
+    return (
+        f'<svg viewBox="0 0 {width} {height}" width="100%" height="{height}" preserveAspectRatio="none">'
+        f'<line x1="0" y1="{ref_y:.1f}" x2="{width}" y2="{ref_y:.1f}" stroke="#ef4444" stroke-width="1" stroke-dasharray="4,3"/>'
+        f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="1.5"/></svg>'
+    )
+
+# ==================== INSTRUMENTATION ====================
+def html(markup):
+    """Inject raw HTML/CSS, timed as its own stage"""
+    with stage('html'):
+        st.markdown(markup, unsafe_allow_html=True)
+
+def plot(fig, **kwargs):
+    """st.plotly_chart, timed: this is where the figure is serialized to JSON"""
+    with stage('plotly_chart'):
+        st.plotly_chart(fig, **kwargs)
+
+def session_stats():
+    """Per-stage timings of this browser session's reruns"""
+    if 'perf_stats' not in st.session_state:
+        st.session_state['perf_stats'] = StageStats()
+    return st.session_state['perf_stats']
+
+def render_diagnostics():
+    """Optional sidebar panel with p50/p95 timings per stage for this session and the server"""
+    st.sidebar.markdown("### 🩺 Diagnostics")
+    if not st.sidebar.toggle("Show stage timings", key="diagnostics"):
+        return
+    scope = st.sidebar.radio("Scope", ["This session", "All sessions"], horizontal=True, key="diagnostics_scope")
+    stats = session_stats() if scope == "This session" else PROCESS_STATS
+    summary = stats.summary()
+    if summary.empty:
+        st.sidebar.caption("No reruns recorded yet.")
+        return
+    total = summary[summary['stage'] == 'total']
+    if len(total):
+        st.sidebar.caption(
+            f"Rerun p50 {total['p50_ms'].iloc[0]:.0f} ms · p95 {total['p95_ms'].iloc[0]:.0f} ms "
+            f"over {total['runs'].iloc[0]} runs · RSS {rss_bytes() / 2**20:.0f} MB"
+        )
+    st.sidebar.dataframe(
+        summary[['stage', 'calls', 'last_ms', 'p50_ms', 'p95_ms', 'rss_delta_mb']].rename(columns={
+            'stage': 'Stage', 'calls': 'Calls', 'last_ms': 'Last', 'p50_ms': 'p50', 'p95_ms': 'p95',
+            'rss_delta_mb': 'ΔRSS MB'
+        }).round(1),
+        hide_index=True, use_container_width=True
+    )
+
+# ==================== DASHBOARD PANELS ====================
+# Rendered as fragments: in live mode only these rerun on every tick,
+# main() and the page CSS run once per user interaction.
+def render_system_load(beban_real_data, freq, live=False, title="Real-Time Load Current"):
+    """System load chart and its stat tiles"""
+    if live:
+        beban_real_data = system_total(poll_live_frames(), freq)
+    # Beban Real Chart
+    html('<div class="chart-container">')
+    html(f'<div class="chart-title"><span class="chart-icon">📈</span>{title}</div>')
+    
+    stats_real = calculate_statistics(beban_real_data)
+    
+    # Stats Row
+    html(f"""
+    <div class="stats-grid">
+        <div class="stat-item">
+            <div class="stat-label">Current</div>
+            <div class="stat-value">{stats_real['current']:.1f}A</div>
+        </div>
+        <div class="stat-item">
+            <div class="stat-label">Average</div>
+            <div class="stat-value">{stats_real['avg']:.1f}A</div>
+        </div>
+        <div class="stat-item">
+            <div class="stat-label">Peak</div>
+            <div class="stat-value">{stats_real['max']:.1f}A</div>
+        </div>
+        <div class="stat-item">
+            <div class="stat-label">Minimum</div>
+            <div class="stat-value">{stats_real['min']:.1f}A</div>
+        </div>
+    </div>
+    """)
+    
+    fig_real = create_line_chart(
+        beban_real_data,
+        "",
+        color='#3b82f6',
+        width_px=900
+    )
+    fig_real.update_layout(uirevision='system_load')
+    plot(fig_real, use_container_width=True, key='system_load_chart')
+    html('</div>')
+
+# Full charts per page of the feeder grid; every feeder still gets a sparkline tile
+FEEDER_PAGE_SIZES = [4, 8, 12, 24]
+FEEDER_SORTS = ["Utilization", "Registry order", "Substation"]
+STATUS_COLORS = {'Normal': '#10b981', 'Warning': '#f59e0b', 'Critical': '#ef4444', 'N/A': '#64748b'}
+# Candidate feeders listed on the recommendations card
+RECOMMENDATION_ROWS = 6
+# A detected step stays on the feeder badge this long after it was raised
+STEP_BADGE_HOURS = 6
+
+def order_feeders(penyulangs, feeder_stats, registry, by):
+    """Feeder ids in display order: most utilized first, registry order, or by substation"""
+    if by == "Utilization":
+        utilization = feeder_stats['utilization'].reindex(penyulangs)
+        return utilization.sort_values(ascending=False, na_position='last', kind='stable').index.tolist()
+    if by == "Substation":
+        return sorted(penyulangs, key=lambda p: (registry.frame.at[p, 'substation'] if p in registry else ''))
+    return list(penyulangs)
+
+def alert_badge(alerts, penyulang):
+    """Text and colour of a feeder's most pressing detector alert, or None"""
+    if penyulang not in alerts.index:
+        return None
+    alert = alerts.loc[penyulang]
+    if alert['overloaded']:
+        minutes = (alert['last_time'] - alert['over_since']).total_seconds() / 60
+        return f"Overload {minutes:.0f} min", STATUS_COLORS['Critical']
+    if alert['silent']:
+        return "No Data", '#64748b'
+    if pd.notna(alert['step_time']) and alert['last_time'] - alert['step_time'] <= pd.Timedelta(hours=STEP_BADGE_HOURS):
+        return f"Step {alert['step_size']:+.0f}A", STATUS_COLORS['Warning']
+    return None
+
+def _first_feeder_page():
+    st.session_state['feeder_page'] = 1
+
+def feeder_tiles_html(ordered, penyulang_frames, feeder_stats, registry, in_view=()):
+    """One compact tile with a sparkline per feeder, as a single block of HTML"""
+    sparklines = sparkline_series(penyulang_frames)
+    stats = feeder_stats.reindex(ordered)
+    tiles = []
+    for penyulang, current, utilization in zip(ordered, stats['current'], stats['utilization']):
+        name = registry.name(penyulang)
+        substation = registry.frame.at[penyulang, 'substation'] if penyulang in registry else ''
+        if penyulang in sparklines and pd.notna(current):
+            color = STATUS_COLORS[status_of(utilization)]
+            i_nom = penyulang_frames[penyulang]['i_nom'].iloc[-1]
+            value = f"{current:.0f}A · {utilization:.0f}%"
+            chart = sparkline_svg(sparklines[penyulang], i_nom, color)
+        else:
+            color, value, chart = '#64748b', 'no data', f'<div style="height: {SPARKLINE_HEIGHT}px;"></div>'
+        tiles.append(
+            f'<div class="feeder-tile{" in-view" if penyulang in in_view else ""}" style="--tile-status: {color};" title="{name}">'
+            f'<div class="feeder-tile-head"><span>{penyulang}</span><span class="feeder-tile-value">{value}</span></div>'
+            f'{chart}<div class="feeder-tile-sub">{substation or name}</div></div>'
+        )
+    return f'<div class="feeder-tiles">{"".join(tiles)}</div>'
+
+def render_feeder_monitoring(penyulang_frames, feeder_stats, registry, live=False, combined=False):
+    """Sparkline tiles for every feeder, then full charts, status badges and stat tiles for one page.
+    
+    Only the page in view gets Plotly figures, and paging reruns just this
+    fragment. With combined, the page's charts are batched into one subplot figure.
+    """
+    if live:
+        penyulang_frames = poll_live_frames()
+        feeder_stats = calculate_feeder_statistics(penyulang_frames)
+    
+    penyulangs = list(penyulang_frames)
+    sort_by, page_size, page = FEEDER_SORTS[0], FEEDER_PAGE_SIZES[0], 1
+    if len(penyulangs) > FEEDER_PAGE_SIZES[0]:
+        col1, col2, col3 = st.columns([2, 1, 1])
+        # A new order or page size starts again from the first page
+        sort_by = col1.selectbox("Sort feeders by", FEEDER_SORTS, key="feeder_sort", on_change=_first_feeder_page)
+        page_size = col2.selectbox("Charts per page", FEEDER_PAGE_SIZES, key="feeder_page_size",
+                                   on_change=_first_feeder_page)
+        n_pages = -(-len(penyulangs) // page_size)
+        page = col3.number_input(f"Page (of {n_pages})", 1, n_pages, key="feeder_page")
+    ordered = order_feeders(penyulangs, feeder_stats, registry, sort_by)
+    page_penyulangs = ordered[(page - 1) * page_size:page * page_size]
+    
+    html(feeder_tiles_html(ordered, penyulang_frames, feeder_stats, registry, set(page_penyulangs)))
+    alerts, _ = load_detector_alerts()
+    
+    col1, col2 = st.columns(2)
+    
+    colors = ['#06b6d4', '#3b82f6', '#8b5cf6', '#ec4899']
+    icons = ['⚡', '🔋', '💡', '⚙️']
+    
+    for idx, penyulang in enumerate(page_penyulangs):
+        icon = icons[idx % len(icons)]
+        with col1 if idx % 2 == 0 else col2:
+            html('<div class="chart-container">')
+            
+            penyulang_data = penyulang_frames[penyulang]
+            if penyulang_data.empty:
+                html(f'<div class="chart-title"><span class="chart-icon">{icon}</span>Feeder {penyulang}</div>')
+                st.info(f"No readings for Feeder {penyulang} in the selected date range.")
+                html('</div>')
+                continue
+            
+            stats_penyulang = feeder_stats.loc[penyulang]
+            i_nom = penyulang_data['i_nom'].iloc[-1]
+            utilization = stats_penyulang['utilization']
+            
+            # Status badge, plus the detector's alert if one is active
+            status_text = status_of(utilization)
+            status_color = STATUS_COLORS[status_text]
+            badge = alert_badge(alerts, penyulang)
+            alert_html = '' if badge is None else (
+                f'<span style="margin-left: 8px; font-size: 0.6em; color: {badge[1]}; background: {_fill_rgba(badge[1], 0.2)}; padding: 4px 12px; border-radius: 8px;">⚠ {badge[0]}</span>'
+            )
+            
+            html(f"""
+            <div class="chart-title">
+                <span class="chart-icon">{icon}</span>
+                Feeder {penyulang}
+                <span style="margin-left: auto; font-size: 0.6em; color: {status_color}; background: {_fill_rgba(status_color, 0.2)}; padding: 4px 12px; border-radius: 8px;">● {status_text}</span>
+                {alert_html}
+            </div>
+            """)
+            
+            # Mini stats
+            html(f"""
+            <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 10px; margin-bottom: 15px;">
+                <div class="stat-item">
+                    <div class="stat-label">Current</div>
+                    <div class="stat-value" style="font-size: 1.2em;">{stats_penyulang['current']:.1f}A</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">Nominal</div>
+                    <div class="stat-value" style="font-size: 1.2em;">{i_nom:.0f}A</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">Utilization</div>
+                    <div class="stat-value" style="font-size: 1.2em; color: {status_color};">{utilization:.1f}%</div>
+                </div>
+            </div>
+            """)
+            
+            if not combined:
+                fig_penyulang = create_line_chart(
+                    penyulang_data,
+                    "",
+                    color=colors[idx % len(colors)],
+                    show_reference=True,
+                    ref_value=i_nom,
+                    width_px=700
+                )
+                fig_penyulang.update_layout(uirevision=penyulang)
+                plot(fig_penyulang, use_container_width=True, key=f'feeder_chart_{penyulang}')
+            html('</div>')
+    
+    if combined:
+        fig_grid = create_feeder_grid_chart({p: penyulang_frames[p] for p in page_penyulangs}, colors, width_px=700)
+        fig_grid.update_layout(uirevision='feeder_grid')
+        plot(fig_grid, use_container_width=True, key='feeder_grid_chart')
+
+def render_forecast_hierarchy(reconciled, registry):
+    """Reconciled forecast peak and average of the system, each substation and each feeder"""
+    values = reconciled['value'].unstack('time')
+    hierarchy = Hierarchy.from_registry(registry, [n for n in values.index if not is_aggregate(n)])
+    values = values.reindex(hierarchy.nodes)
+    # Largest difference between any aggregate and the sum of its feeders, over the horizon
+    gap = np.nanmax(np.abs(values.loc[hierarchy.aggregates].to_numpy() - hierarchy.A @ values.loc[hierarchy.feeders].to_numpy()))
+    st.caption(f"System = Σ substations = Σ feeders at every forecast step (largest gap {gap:.2g} A)")
+    st.dataframe(pd.DataFrame({
+        'Node': [registry.name(n) if hierarchy.levels[n] == 'feeder' else hierarchy.label(n) for n in hierarchy.nodes],
+        'Level': [hierarchy.levels[n].title() for n in hierarchy.nodes],
+        'Peak (A)': values.max(axis=1).to_numpy(),
+        'Average (A)': values.mean(axis=1).to_numpy(),
+    }).round(1), hide_index=True, use_container_width=True)
+
+def render_system_overview(system_kpis, live=False):
+    """System overview cards, read from the incrementally maintained KPIs"""
+    if live:
+        poll_live_frames()
+        system_kpis = st.session_state['live_kpis']
+    kpis = system_kpis.summary()
+    counts = kpis['status_counts']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        status_line = ' · '.join(
+            f'<span style="color: {STATUS_COLORS[status]};">{n} {status}</span>' for status, n in counts.items() if n
+        )
+        silent = kpis['feeders'] - kpis['reporting']
+        html(f"""
+        <div class="metric-card">
+            <div class="metric-icon">🌐</div>
+            <div class="metric-label">Total Feeders</div>
+            <div class="metric-value" style="font-size: 2.5em;">{kpis['feeders']}</div>
+            <div class="metric-status">{status_line or "No Readings"}</div>
+            <div class="metric-subtext">{"All Reporting" if not silent else f"{silent} without readings"}</div>
+        </div>
+        """)
+    
+    with col2:
+        html(f"""
+        <div class="metric-card">
+            <div class="metric-icon">⚡</div>
+            <div class="metric-label">System Load</div>
+            <div class="metric-value" style="font-size: 2.5em;">{kpis['total_load']:.0f}A</div>
+            <div class="metric-status">{kpis['load_pct']:.1f}% Capacity</div>
+            <div class="metric-subtext">{kpis['headroom']:.0f} A headroom below {CRITICAL_RATIO * 100:.0f}% of I_nom</div>
+        </div>
+        """)
+    
+    with col3:
+        peak_time = kpis['coincident_time']
+        peak_text = f" at {peak_time:%d %b %H:%M}" if isinstance(peak_time, pd.Timestamp) else ""
+        html(f"""
+        <div class="metric-card">
+            <div class="metric-icon">📈</div>
+            <div class="metric-label">Coincident Peak</div>
+            <div class="metric-value" style="font-size: 2.5em;">{kpis['coincident_peak']:.0f}A</div>
+            <div class="metric-status">Diversity Factor {kpis['diversity_factor']:.2f}</div>
+            <div class="metric-subtext">Sum of feeder peaks {kpis['sum_of_peaks']:.0f} A{peak_text}</div>
+        </div>
+        """)
+    
+    with col4:
+        grade_color = {'A': '#10b981', 'B': '#06b6d4', 'C': '#f59e0b', 'D': '#ef4444'}.get(kpis['health_grade'], '#94a3b8')
+        html(f"""
+        <div class="metric-card">
+            <div class="metric-icon">🛡️</div>
+            <div class="metric-label">System Health</div>
+            <div class="metric-value" style="font-size: 2.5em; color: {grade_color};">{kpis['health_grade']}</div>
+            <div class="metric-status">{kpis['health_label']}</div>
+            <div class="metric-subtext">Score {kpis['health_score']:.0f} / 100</div>
+        </div>
+        """)
+
+def render_dashboard():
+    html(CUSTOM_CSS)
+    
+    # Live mode settings
+    st.sidebar.markdown("### 🔴 Live Mode")
+    live_mode = st.sidebar.toggle("Auto-refresh", key="live_mode")
+    live_interval = st.sidebar.select_slider(
+        "Refresh interval (s)",
+        LIVE_INTERVALS,
+        value=10,
+        key="live_interval",
+        disabled=not live_mode
+    )
+    st.sidebar.markdown("### 🖥️ Display")
+    combine_charts = st.sidebar.toggle(
+        "Combine feeder charts",
+        key="combine_feeder_charts",
+        help="Draw every feeder in one subplot figure: fewer charts to build and send on each rerun"
+    )
+    
     # Header
-    st.markdown("""
+    html(f"""
     <div class="main-header">
         <h1 class="main-title">⚡ CURRENT DISTRIBUTION MONITOR</h1>
-        <p class="subtitle">Real-Time Power Distribution Management System<span class="status-badge">● ONLINE</span></p>
+        <p class="subtitle">Real-Time Power Distribution Management System<span class="status-badge">{f"● LIVE · {live_interval}s" if live_mode else "● ONLINE"}</span></p>
     </div>
-    """, unsafe_allow_html=True)
+    """)
+    
+    registry = get_feeder_registry()
+    penyulangs = registry.ids
     
     # Control Panel
-    st.markdown('<div class="control-panel">', unsafe_allow_html=True)
-    st.markdown('<div class="control-title">📊 Control Panel & Filters</div>', unsafe_allow_html=True)
+    html('<div class="control-panel">')
+    html('<div class="control-title">📊 Control Panel & Filters</div>')
     col1, col2, col3 = st.columns(3)
     
     with col1:
         selected_penyulang = st.selectbox(
             "🔌 Select Feeder",
-            ["All Feeders", "Penyulang A", "Penyulang B", "Penyulang C", "Penyulang D"],
+            ["All Feeders", *penyulangs],
+            format_func=lambda p: p if p == "All Feeders" else registry.name(p),
             key="penyulang_select"
         )
     
@@ -627,120 +1573,268 @@ def main():
             value=datetime.now(),
             key="end_date"
         )
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
+    html('</div>')
+    
+    # A selected feeder is the only one loaded and drawn in full; "All Feeders" reads the aggregated tier
+    all_feeders = selected_penyulang == "All Feeders"
+    view_penyulangs = penyulangs if all_feeders else [selected_penyulang]
+    
+    # Drop shared results built from partitions that changed since the last run
+    QUERY_CACHE.sync_store(get_feeder_store())
+    
+    # Results published by worker.py when fresh, otherwise computed in this session
+    max_points = target_points(900)
+    freq = plan_freq(start_date, end_date, max_points, aggregated=all_feeders)
+    snapshot = load_snapshot(start_date, end_date, max_points) if all_feeders else None
+    if snapshot is not None and set(penyulangs) <= set(snapshot['frames']):
+        penyulang_frames = {p: snapshot['frames'][p] for p in penyulangs}
+        beban_real_data = snapshot['system_load']
+        st.sidebar.caption(f"📡 Shared results from worker · {datetime.fromtimestamp(snapshot['computed_at']):%H:%M:%S}")
+    else:
+        snapshot = None
+        penyulang_frames = {
+            p: load_penyulang_data(p, start_date, end_date, max_points, aggregated=all_feeders) for p in view_penyulangs
+        }
+        with stage('statistics'):
+            beban_real_data = system_total(penyulang_frames, freq)
+    
+    # Synthetic demo data if no readings are stored
+    demo_mode = beban_real_data.empty
+    if demo_mode:
+        penyulang_frames = {p: generate_penyulang_data(p, registry.i_nom(p)) for p in view_penyulangs}
+        beban_real_data = generate_beban_real_data() if all_feeders else penyulang_frames[view_penyulangs[0]]
+        st.info("No stored feeder readings in the selected date range — showing demo data.")
+    if snapshot is not None:
+        feeder_stats = snapshot['feeder_stats'].reindex(penyulangs)
+    else:
+        feeder_stats = calculate_feeder_statistics(penyulang_frames)
+    
+    # System overview covers every feeder whichever one is selected
+    if demo_mode:
+        system_kpis = SystemKPIs.from_buckets(
+            {p: frame_buckets(generate_penyulang_data(p, registry.i_nom(p))) for p in penyulangs},
+            penyulangs, [registry.i_nom(p) for p in penyulangs]
+        )
+    elif snapshot is not None and 'system_kpis' in snapshot:
+        system_kpis = snapshot['system_kpis']
+    else:
+        system_kpis = load_system_kpis(tuple(penyulangs), start_date, end_date)
+    
+    # Live mode reruns only the chart fragments, polling the store for new readings
+    live = live_mode and not demo_mode
+    if live:
+        reset_live_frames(penyulang_frames, start_date, end_date, system_kpis, freq)
+    live_fragment = st.fragment(run_every=live_interval if live else None)
+    
+    # Transfer source: the selected feeder, or the most utilized one for "All Feeders"
+    if all_feeders:
+        source = feeder_stats['utilization'].idxmax() if feeder_stats['utilization'].notna().any() else None
+    else:
+        source = view_penyulangs[0]
+    if snapshot is not None:
+        load_profile = snapshot['load_profile']
+        recommendation = snapshot['recommendations'].get(source)
+    else:
+        if all_feeders:
+            profile_frames, profile_stats = penyulang_frames, feeder_stats
+        else:
+            # Transfer targets only need every other feeder's latest reading, not its whole window
+            if demo_mode:
+                latest = lambda p: generate_penyulang_data(p, registry.i_nom(p))
+            else:
+                latest = lambda p: load_latest_reading(p, start_date, end_date)
+            profile_frames = {p: penyulang_frames[p] if p == source else latest(p) for p in penyulangs}
+            profile_stats = calculate_feeder_statistics(profile_frames)
+        load_profile = feeder_load_profile(profile_frames, profile_stats, demo_mode)
+        recommendation = recommend_maneuver(load_profile, source, registry.ties)
+    
+    html('<div class="custom-divider"></div>')
     
     # Main Dashboard Grid
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        # Beban Real Chart
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title"><span class="chart-icon">📈</span>Real-Time Load Current</div>', unsafe_allow_html=True)
-        
-        beban_real_data = generate_beban_real_data()
-        stats_real = calculate_statistics(beban_real_data)
-        
-        # Stats Row
-        st.markdown(f"""
-        <div class="stats-grid">
-            <div class="stat-item">
-                <div class="stat-label">Current</div>
-                <div class="stat-value">{stats_real['current']:.1f}A</div>
-            </div>
-            <div class="stat-item">
-                <div class="stat-label">Average</div>
-                <div class="stat-value">{stats_real['avg']:.1f}A</div>
-            </div>
-            <div class="stat-item">
-                <div class="stat-label">Peak</div>
-                <div class="stat-value">{stats_real['max']:.1f}A</div>
-            </div>
-            <div class="stat-item">
-                <div class="stat-label">Minimum</div>
-                <div class="stat-value">{stats_real['min']:.1f}A</div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        fig_real = create_line_chart(
-            beban_real_data,
-            "",
-            color='#3b82f6'
-        )
-        st.plotly_chart(fig_real, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        system_title = "Real-Time Load Current" if all_feeders else f"Real-Time Load Current · Feeder {source}"
+        live_fragment(render_system_load)(beban_real_data, freq, live, system_title)
     
     with col2:
         # Current Load Card
-        current_load = 132
-        load_percentage = (current_load / 200) * 100
+        if source in feeder_stats.index and pd.notna(feeder_stats.loc[source, 'current']):
+            current_load = feeder_stats.loc[source, 'current']
+            load_percentage = feeder_stats.loc[source, 'utilization']
+            load_status = status_of(load_percentage)
+        else:
+            current_load, load_percentage, load_status = beban_real_data['value'].iloc[-1], np.nan, 'Normal'
+        load_status_text = {'Normal': 'Normal Operation', 'Warning': 'Approaching Limit', 'Critical': 'Overload Risk',
+                            'N/A': 'No Rating'}[load_status]
         
-        st.markdown(f"""
+        html(f"""
         <div class="metric-card">
             <div class="metric-icon">⚡</div>
-            <div class="metric-label">Current Load</div>
-            <div class="metric-value">{current_load}<span style="font-size: 0.5em; color: #94a3b8;"> A</span></div>
-            <div class="metric-status">● Normal Operation</div>
+            <div class="metric-label">Current Load{f" · Feeder {source}" if source else ""}</div>
+            <div class="metric-value">{current_load:.0f}<span style="font-size: 0.5em; color: #94a3b8;"> A</span></div>
+            <div class="metric-status">● {load_status_text}</div>
             <div class="metric-subtext">{load_percentage:.1f}% of Nominal Capacity</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
         
-        st.markdown("<br>", unsafe_allow_html=True)
+        html("<br>")
         
         # Recommendations Card
-        st.markdown("""
+        if recommendation is None:
+            recommendation_items = '<div class="recommendation-item">Not enough feeder data<span class="recommendation-badge">N/A</span></div>'
+        else:
+            candidates = recommendation['candidates']
+            recommendation_items = ''.join(
+                f'<div class="recommendation-item" title="{row.reason}">{registry.name(row.feeder_id)}'
+                f'<span class="recommendation-badge">{row.badge}</span></div>'
+                for row in candidates.head(RECOMMENDATION_ROWS).itertuples()
+            )
+            if len(candidates) > RECOMMENDATION_ROWS:
+                recommendation_items += f'<div class="recommendation-item">+{len(candidates) - RECOMMENDATION_ROWS} more feeders</div>'
+        html(f"""
         <div class="metric-card">
             <div class="metric-icon">🎯</div>
             <div class="metric-label">Recommended Feeders</div>
             <div class="recommendations-container">
-                <div class="recommendation-item">Penyulang A<span class="recommendation-badge">Optimal</span></div>
-                <div class="recommendation-item">Penyulang B<span class="recommendation-badge">Available</span></div>
-                <div class="recommendation-item">Penyulang C<span class="recommendation-badge">Available</span></div>
-                <div class="recommendation-item">Penyulang D<span class="recommendation-badge">Backup</span></div>
+                {recommendation_items}
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
     
-    st.markdown("<br>", unsafe_allow_html=True)
+    html("<br>")
     
     # Operational Status and Target Feeder
     col1, col2 = st.columns(2)
     
+    approved = recommendation is not None and recommendation['decision'] == 'APPROVED'
     with col1:
-        st.markdown("""
-        <div class="metric-card status-operational">
-            <div class="metric-icon">✓</div>
+        if recommendation is None:
+            decision, status_text, status_subtext = 'N/A', 'No Maneuver Evaluated', 'Need readings from at least two feeders'
+        elif approved:
+            decision, status_text, status_subtext = 'APPROVED', 'Safe to Proceed with Maneuver', recommendation['reasons'][0]
+        else:
+            decision, status_text, status_subtext = 'DENIED', 'Maneuver Not Recommended', recommendation['reasons'][0]
+        html(f"""
+        <div class="metric-card {'status-operational' if approved else 'status-warning'}">
+            <div class="metric-icon">{'✓' if approved else '⚠'}</div>
             <div class="metric-label">Operational Status</div>
-            <div class="status-value">APPROVED</div>
-            <div class="metric-status">Safe to Proceed with Maneuver</div>
-            <div class="metric-subtext">All parameters within safe limits</div>
+            <div class="{'status-value' if approved else 'status-value warning-value'}">{decision}</div>
+            <div class="metric-status">{status_text}</div>
+            <div class="metric-subtext">{status_subtext}</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
     
     with col2:
-        st.markdown("""
+        if approved:
+            best = recommendation['candidates'].iloc[0]
+            target_text = registry.name(recommendation['target']).upper()
+            target_subtext = f"Peak utilization after transfer {best['peak_utilization']:.0f}%"
+        else:
+            target_text, target_subtext = 'NONE', 'No feeder has enough headroom'
+        html(f"""
         <div class="metric-card target-card">
             <div class="metric-icon">🎯</div>
             <div class="metric-label">Recommended Target</div>
-            <div class="target-value">PENYULANG B</div>
-            <div class="metric-status">Optimal Selection Based on Analysis</div>
-            <div class="metric-subtext">Lowest load utilization (72%)</div>
+            <div class="target-value">{target_text}</div>
+            <div class="metric-status">Ranked by Headroom over the Forecast Horizon</div>
+            <div class="metric-subtext">{target_subtext}</div>
         </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
-    
+        """)
+
+    # Overloads, steps and dropouts raised by the streaming detector during ingest
+    alerts, events = load_detector_alerts()
+    overloaded = int(alerts['overloaded'].reindex(view_penyulangs, fill_value=False).sum())
+    silent = int(alerts['silent'].reindex(view_penyulangs, fill_value=False).sum())
+    with st.expander(f"🔔 Detector Alerts · {overloaded} overloaded · {silent} silent"):
+        events = events[events['feeder_id'].isin(view_penyulangs)]
+        if events.empty:
+            st.info("No detector alerts — they are raised as `python ingest.py` stores new readings.")
+        else:
+            st.dataframe(
+                events.assign(feeder_id=events['feeder_id'].map(registry.name))[
+                    ['time', 'feeder_id', 'severity', 'kind', 'message']
+                ].rename(columns={
+                    'time': 'Time', 'feeder_id': 'Feeder', 'severity': 'Severity', 'kind': 'Alert', 'message': 'Details'
+                }),
+                hide_index=True, use_container_width=True
+            )
+
+    # Contingency planning: split tripped feeders across their neighbours
+    with st.expander("🚨 Contingency Load Transfer Plan"):
+        tripped = st.multiselect(
+            "Tripped feeders",
+            load_profile[0],
+            format_func=registry.name,
+            key="tripped_feeders"
+        )
+        if tripped and len(tripped) < len(load_profile[0]):
+            with stage('recommendation'):
+                plan = solve_transfer(load_profile[0], load_profile[1], load_profile[2], tripped, registry.ties)
+            shed = plan['shed'][plan['shed'] > 1e-6]
+            st.markdown(
+                f"Peak neighbour utilization after transfer: **{plan['max_utilization']:.1f}%** "
+                f"· solved with {plan['solver']} in {plan['seconds'] * 1000:.0f} ms"
+            )
+            st.dataframe(
+                plan['transfers'].assign(fraction=lambda d: d['fraction'] * 100).rename(columns={
+                    'source': 'From', 'target': 'To', 'fraction': 'Share of Load (%)', 'peak_amps': 'Peak Transfer (A)'
+                }).round(1),
+                hide_index=True, use_container_width=True
+            )
+            if len(shed):
+                st.warning("Load that cannot be placed within I_nom: " + ", ".join(
+                    f"{registry.name(p)} {fraction * 100:.0f}%" for p, fraction in shed.items()
+                ))
+        elif tripped:
+            st.info("At least one feeder must stay in service to receive load.")
+
+    html('<div class="custom-divider"></div>')
+
     # Prediction Chart
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    st.markdown('<div class="chart-title"><span class="chart-icon">🔮</span>Load Forecast Analysis</div>', unsafe_allow_html=True)
-    
-    prediksi_data = generate_prediksi_data()
+    html('<div class="chart-container">')
+    html('<div class="chart-title"><span class="chart-icon">🔮</span>Load Forecast Analysis</div>')
+    
+    # All Feeders forecasts the system; reconciliation keeps it equal to the sum of substation and feeder forecasts
+    reconciliation = None
+    if all_feeders and not demo_mode:
+        reconciliation = st.selectbox(
+            "Reconciliation",
+            RECONCILIATION_METHODS,
+            format_func=RECONCILIATION_LABELS.get,
+            key="reconciliation",
+            help="How feeder, substation and system forecasts are made to add up"
+        )
+    if snapshot is not None and reconciliation == DEFAULT_RECONCILIATION:
+        prediksi_data, forecast_accuracy = snapshot['forecast'], snapshot['forecast_accuracy']
+        reconciled = snapshot.get('reconciled_forecast')
+    elif demo_mode:
+        prediksi_data, forecast_accuracy, reconciled = None, None, None
+    else:
+        try:
+            prediksi_data, forecast_accuracy = load_prediksi_data(tuple(view_penyulangs), reconciliation=reconciliation)
+        except ValueError as exc:
+            st.info(f"{exc} — run `python train.py` to fit it. Showing the bottom-up forecast.")
+            reconciliation = 'bottom_up'
+            prediksi_data, forecast_accuracy = load_prediksi_data(tuple(view_penyulangs), reconciliation=reconciliation)
+        reconciled = load_reconciled_forecast(tuple(view_penyulangs), reconciliation) if reconciliation else None
+    if prediksi_data is None:
+        prediksi_data = generate_prediksi_data()
+        if not demo_mode:
+            st.info("No fitted forecast models found — run `python train.py` to train them. Showing demo forecast.")
     stats_prediksi = calculate_statistics(prediksi_data)
+    # Prefer rolling-origin backtest scores; the in-sample fit is only a fallback
+    backtest = None if demo_mode else backtest_scores(tuple(view_penyulangs))
+    if backtest is not None and backtest['mape'] is not None:
+        forecast_accuracy = 100 - backtest['mape']
+    accuracy_text = f"{forecast_accuracy:.1f}%" if forecast_accuracy is not None else "N/A"
+    if backtest is not None and backtest['coverage'] is not None:
+        confidence_text = f"{coverage_level(backtest['coverage'])} ({backtest['coverage']:.0f}%)"
+    else:
+        confidence_text = confidence_level(prediksi_data)
     
     # Prediction Stats
-    st.markdown(f"""
+    html(f"""
     <div class="stats-grid">
         <div class="stat-item">
             <div class="stat-label">Predicted Peak</div>
@@ -752,138 +1846,79 @@ def main():
         </div>
         <div class="stat-item">
             <div class="stat-label">Forecast Accuracy</div>
-            <div class="stat-value">94.2%</div>
+            <div class="stat-value">{accuracy_text}</div>
         </div>
         <div class="stat-item">
             <div class="stat-label">Confidence Level</div>
-            <div class="stat-value">High</div>
+            <div class="stat-value">{confidence_text}</div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
+    if backtest is not None:
+        mase_text = f", MASE {backtest['mase']:.2f}" if backtest['mase'] is not None else ""
+        st.caption(f"Out-of-sample: {backtest['n_folds']} rolling-origin folds over {backtest['n_feeders']} feeders{mase_text}")
     
     fig_prediksi = create_line_chart(
         prediksi_data,
         "",
         color='#06b6d4'
     )
-    st.plotly_chart(fig_prediksi, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    plot(fig_prediksi, use_container_width=True)
+    
+    if reconciled is not None:
+        with st.expander("🏭 Forecast Hierarchy"):
+            render_forecast_hierarchy(reconciled, registry)
+    
+    # Chance of each feeder crossing its limits, from simulated sample paths of its model's errors
+    risk = None if demo_mode else load_overload_risk(tuple(view_penyulangs))
+    if risk is not None:
+        per_step, per_feeder = risk
+        threshold = st.radio(
+            "Overload probability",
+            list(THRESHOLDS),
+            format_func=lambda name: f"Above {THRESHOLDS[name] * 100:.0f}% of I_nom",
+            horizontal=True,
+            key="risk_threshold"
+        )
+        column = f"p_{threshold}"
+        likely = int((per_feeder[column] >= 0.5).sum())
+        st.caption(
+            f"{N_PATHS:,} simulated paths per feeder · {likely} of {len(per_feeder)} feeders more likely than not "
+            f"to exceed {THRESHOLDS[threshold] * 100:.0f}% of I_nom within the horizon"
+        )
+        plot(create_risk_heatmap(per_step, per_feeder, column, registry.name), use_container_width=True)
+    html('</div>')
     
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
+    html('<div class="custom-divider"></div>')
     
     # Feeder Monitoring Section
-    st.markdown('<div class="section-header">🔌 Individual Feeder Monitoring</div>', unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
+    html('<div class="section-header">🔌 Individual Feeder Monitoring</div>')
     
-    penyulangs = ['A', 'B', 'C', 'D']
-    colors = ['#06b6d4', '#3b82f6', '#8b5cf6', '#ec4899']
-    icons = ['⚡', '🔋', '💡', '⚙️']
-    
-    for idx, penyulang in enumerate(penyulangs):
-        with col1 if idx % 2 == 0 else col2:
-            st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-            
-            penyulang_data = generate_penyulang_data(penyulang)
-            stats_penyulang = calculate_statistics(penyulang_data)
-            i_nom = penyulang_data['i_nom'].iloc[0]
-            utilization = (stats_penyulang['current'] / i_nom) * 100
-            
-            # Status badge
-            status_color = '#10b981' if utilization < 80 else '#f59e0b' if utilization < 90 else '#ef4444'
-            status_text = 'Normal' if utilization < 80 else 'Warning' if utilization < 90 else 'Critical'
-            
-            st.markdown(f"""
-            <div class="chart-title">
-                <span class="chart-icon">{icons[idx]}</span>
-                Feeder {penyulang}
-                <span style="margin-left: auto; font-size: 0.6em; color: {status_color}; background: rgba({int(status_color[1:3], 16)}, {int(status_color[3:5], 16)}, {int(status_color[5:7], 16)}, 0.2); padding: 4px 12px; border-radius: 8px;">● {status_text}</span>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Mini stats
-            st.markdown(f"""
-            <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 10px; margin-bottom: 15px;">
-                <div class="stat-item">
-                    <div class="stat-label">Current</div>
-                    <div class="stat-value" style="font-size: 1.2em;">{stats_penyulang['current']:.1f}A</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">Nominal</div>
-                    <div class="stat-value" style="font-size: 1.2em;">{i_nom:.0f}A</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">Utilization</div>
-                    <div class="stat-value" style="font-size: 1.2em; color: {status_color};">{utilization:.1f}%</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            fig_penyulang = create_line_chart(
-                penyulang_data,
-                "",
-                color=colors[idx],
-                show_reference=True,
-                ref_value=i_nom
-            )
-            st.plotly_chart(fig_penyulang, use_container_width=True)
-            st.markdown('</div>', unsafe_allow_html=True)
+    live_fragment(render_feeder_monitoring)(penyulang_frames, feeder_stats, registry, live, combine_charts)
     
     # System Overview Card
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-header">📊 System Overview</div>', unsafe_allow_html=True)
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown("""
-        <div class="metric-card">
-            <div class="metric-icon">🌐</div>
-            <div class="metric-label">Total Feeders</div>
-            <div class="metric-value" style="font-size: 2.5em;">4</div>
-            <div class="metric-status">All Active</div>
-        </div>
-        """, unsafe_allow_html=True)
+    html('<div class="custom-divider"></div>')
+    html('<div class="section-header">📊 System Overview</div>')
     
-    with col2:
-        st.markdown("""
-        <div class="metric-card">
-            <div class="metric-icon">⚡</div>
-            <div class="metric-label">System Load</div>
-            <div class="metric-value" style="font-size: 2.5em;">685A</div>
-            <div class="metric-status">85.6% Capacity</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div class="metric-card">
-            <div class="metric-icon">📈</div>
-            <div class="metric-label">Efficiency</div>
-            <div class="metric-value" style="font-size: 2.5em;">96.8%</div>
-            <div class="metric-status">Excellent</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown("""
-        <div class="metric-card">
-            <div class="metric-icon">🛡️</div>
-            <div class="metric-label">System Health</div>
-            <div class="metric-value" style="font-size: 2.5em; color: #10b981;">A+</div>
-            <div class="metric-status">Optimal</div>
-        </div>
-        """, unsafe_allow_html=True)
+    live_fragment(render_system_overview)(system_kpis, live)
     
     # Footer
-    st.markdown("<br><br>", unsafe_allow_html=True)
-    st.markdown("""
+    html("<br><br>")
+    html("""
     <div style="text-align: center; color: #64748b; padding: 30px; background: rgba(15, 23, 42, 0.5); border-radius: 16px; border: 1px solid rgba(6, 182, 212, 0.2);">
         <p style="margin: 0; font-size: 1em; font-weight: 600; color: #94a3b8;">⚡ Advanced Power Distribution Monitoring System</p>
         <p style="margin: 8px 0 0 0; font-size: 0.85em;">Developed with ❤️ by ITS Engineering Team • Powered by Streamlit & Plotly</p>
         <p style="margin: 8px 0 0 0; font-size: 0.75em; color: #64748b;">© 2025 Institut Teknologi Sepuluh Nopember • Real-Time Monitoring Dashboard v2.0</p>
     </div>
-    """, unsafe_allow_html=True)
+    """)
+
+def main():
+    if 'perf_session' not in st.session_state:
+        st.session_state['perf_session'] = f"{time.time_ns():x}"[-8:]
+    with record_run(session_stats(), PROCESS_STATS, session=st.session_state['perf_session']):
+        render_dashboard()
+    PROCESS_STATS.write_prometheus()
+    render_diagnostics()
 
 # ==================== RUN APP ====================
 if __name__ == "__main__":
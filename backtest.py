@@ -0,0 +1,329 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_STORE
+from feeder_store import BASE_DIR, DEFAULT_STORE_DIR, FeederStore
+from forecasting import DEFAULT_METHOD, FORECAST_FREQ, HISTORY_DAYS, HORIZON, METHODS, SEASON_LENGTH, Forecaster, load_history
+from model_registry import DEFAULT_MODEL_DIR, ModelRegistry
+from train import FitTimeout, limit_native_threads, time_limit
+
+# ==================== CONFIG ====================
+DEFAULT_BACKTEST_DIR = os.environ.get('FEEDER_BACKTEST_DIR', os.path.join(BASE_DIR, 'data', 'backtests'))
+SUMMARY_NAME = '_summary.json'
+N_FOLDS = 14
+# Origins sit on day boundaries so they stay put as new data is ingested
+FOLD_STEP = '1D'
+MIN_TRAIN_DAYS = 7
+ALPHA = 0.05
+FOLD_TIMEOUT = 120
+
+
+# ==================== FOLDS ====================
+def fold_origins(series, n_folds=N_FOLDS, horizon=HORIZON, min_train_days=MIN_TRAIN_DAYS, freq=FORECAST_FREQ):
+    """Forecast origins of the last n_folds folds whose test window is fully observed, oldest first"""
+    if series.empty:
+        return []
+    step = pd.Timedelta(FOLD_STEP)
+    last_origin = (series.index[-1] + pd.Timedelta(freq) - horizon * pd.Timedelta(freq)).floor(step)
+    earliest = series.index[0] + timedelta(days=min_train_days)
+    origins = [last_origin - k * step for k in range(n_folds)]
+    return sorted(o for o in origins if o >= earliest)
+
+
+def split_fold(series, origin, history_days=HISTORY_DAYS, horizon=HORIZON):
+    """(train, test) around one origin: a sliding training window and the next horizon steps"""
+    train = series[(series.index >= origin - timedelta(days=history_days)) & (series.index < origin)]
+    test = series[series.index >= origin].iloc[:horizon]
+    return train, test
+
+
+def fold_signature(train, test, fit_kwargs, alpha):
+    """Changes whenever anything a fold's result depends on changes"""
+    digest = hashlib.sha1()
+    digest.update(train.index[0].isoformat().encode() if len(train) else b'')
+    digest.update(np.ascontiguousarray(train.to_numpy(dtype='float64')).tobytes())
+    digest.update(np.ascontiguousarray(test.to_numpy(dtype='float64')).tobytes())
+    # Folds of ARIMA methods are fitted with the calendar and weather regressors
+    digest.update(json.dumps([fit_kwargs, alpha, FEATURE_STORE.signature()], sort_keys=True, default=list).encode())
+    return digest.hexdigest()
+
+
+def fold_metrics(train, test, prediction, season_length=SEASON_LENGTH):
+    """Out-of-sample MAPE, RMSE, MASE and prediction-interval coverage of one fold"""
+    y = test.to_numpy(dtype='float64')
+    error = y - prediction['value'].to_numpy()
+    nonzero = y != 0
+    history = train.to_numpy(dtype='float64')
+    # MASE scale: in-sample MAE of the seasonal-naive forecast
+    scale = np.mean(np.abs(history[season_length:] - history[:-season_length]))
+    inside = (prediction['lower'].to_numpy() <= y) & (y <= prediction['upper'].to_numpy())
+    return {
+        'mape': float(np.mean(np.abs(error[nonzero] / y[nonzero])) * 100) if nonzero.any() else None,
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'mase': float(np.mean(np.abs(error)) / scale) if scale > 0 else None,
+        'coverage': float(np.mean(inside) * 100),
+    }
+
+
+def evaluate_fold(method, train, test, fit_kwargs=None, alpha=ALPHA, timeout=FOLD_TIMEOUT):
+    """Fit on train, forecast len(test) steps and score them; never raises"""
+    started = time.perf_counter()
+    row = {'status': 'ok'}
+    try:
+        with time_limit(timeout):
+            forecaster = Forecaster(method).fit(train, **(fit_kwargs or {}))
+            prediction = forecaster.predict(len(test), alpha)
+        row.update(fold_metrics(train, test, prediction, forecaster.season_length))
+    except FitTimeout:
+        row.update(status='timeout', error=f"fold exceeded {timeout}s")
+    except Exception as exc:
+        row.update(status='failed', error=f"{type(exc).__name__}: {exc}")
+    row['fit_seconds'] = round(time.perf_counter() - started, 3)
+    return row
+
+
+def backtest_fit_kwargs(registry, feeder_id, method, origin):
+    """Reuse an auto-ARIMA order registered from data before origin so the fold skips the stepwise search.
+
+    An order chosen on data that overlaps the test window would leak it into
+    the score; without an earlier model the fold runs the search on its own
+    training window.
+    """
+    if method != 'auto_arima':
+        return {}
+    earlier = [e for e in registry.entries(feeder_id, method)
+               if e.get('order') is not None and pd.Timestamp(e['train_end']) < origin]
+    if not earlier:
+        return {}
+    entry = earlier[-1]
+    return {'order': list(entry['order']), 'seasonal_order': list(entry['seasonal_order'])}
+
+
+# ==================== FOLD CACHE ====================
+def _fold_cache_path(backtest_dir, feeder_id):
+    return os.path.join(backtest_dir, f"{feeder_id}.json")
+
+
+def load_folds(backtest_dir, feeder_id):
+    path = _fold_cache_path(backtest_dir, feeder_id)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)['folds']
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(path + '.tmp', path)
+
+
+def save_folds(backtest_dir, feeder_id, folds):
+    _write_json(_fold_cache_path(backtest_dir, feeder_id), {'feeder_id': feeder_id, 'folds': folds})
+
+
+def fold_key(method, origin):
+    return f"{method}@{origin.isoformat()}"
+
+
+# ==================== SUMMARY ====================
+def summarize_folds(rows):
+    """Average fold metrics; RMSE is pooled over squared errors"""
+    rows = [r for r in rows if r['status'] == 'ok']
+    if not rows:
+        return None
+
+    def mean(name):
+        values = [r[name] for r in rows if r.get(name) is not None]
+        return float(np.mean(values)) if values else None
+
+    return {
+        'mape': mean('mape'),
+        'rmse': float(np.sqrt(np.mean([r['rmse'] ** 2 for r in rows]))),
+        'mase': mean('mase'),
+        'coverage': mean('coverage'),
+        'n_folds': len(rows),
+        'fit_seconds': mean('fit_seconds'),
+        'last_origin': max(r['origin'] for r in rows),
+    }
+
+
+def best_method(methods):
+    """Method with the lowest MASE (MAPE when MASE is undefined)"""
+    scored = {m: s for m, s in methods.items() if s is not None}
+    if not scored:
+        return None
+    return min(scored, key=lambda m: (scored[m]['mase'] if scored[m]['mase'] is not None else math.inf,
+                                      scored[m]['mape'] if scored[m]['mape'] is not None else math.inf))
+
+
+def summary_path(backtest_dir=DEFAULT_BACKTEST_DIR):
+    return os.path.join(backtest_dir, SUMMARY_NAME)
+
+
+def load_summary(backtest_dir=DEFAULT_BACKTEST_DIR):
+    path = summary_path(backtest_dir)
+    if not os.path.exists(path):
+        return {'feeders': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def system_scores(summary, methods):
+    """Mean backtest scores of the given {feeder_id: method} models, or None without results"""
+    scores = [summary['feeders'].get(f, {}).get('methods', {}).get(m) for f, m in methods.items()]
+    scores = [s for s in scores if s is not None]
+    if not scores:
+        return None
+    combined = {}
+    for name in ('mape', 'mase', 'coverage'):
+        values = [s[name] for s in scores if s[name] is not None]
+        combined[name] = float(np.mean(values)) if values else None
+    combined['n_folds'] = sum(s['n_folds'] for s in scores)
+    combined['n_feeders'] = len(scores)
+    return combined
+
+
+def coverage_level(coverage, alpha=ALPHA):
+    """Label interval coverage against its nominal level"""
+    if coverage is None:
+        return 'N/A'
+    nominal = (1 - alpha) * 100
+    return 'High' if coverage >= nominal - 5 else 'Medium' if coverage >= nominal - 20 else 'Low'
+
+
+# ==================== BATCH ====================
+def backtest_all(feeder_ids, methods=(DEFAULT_METHOD,), n_folds=N_FOLDS, n_jobs=None, history_days=HISTORY_DAYS,
+                 horizon=HORIZON, alpha=ALPHA, timeout=FOLD_TIMEOUT, store_root=DEFAULT_STORE_DIR,
+                 model_dir=DEFAULT_MODEL_DIR, backtest_dir=DEFAULT_BACKTEST_DIR):
+    """Rolling-origin cross-validation of every feeder and method.
+
+    Folds whose inputs are unchanged since the last run are read from the
+    fold cache; only new origins (and folds whose data was rewritten) are
+    fitted, in parallel across a process pool. Failed folds are not cached
+    and are retried on the next run.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    store, registry = FeederStore(store_root), ModelRegistry(model_dir)
+    lookback = history_days + n_folds * pd.Timedelta(FOLD_STEP).days + math.ceil(horizon / 24) + 1
+
+    folds, pending = {}, []
+    for feeder_id in feeder_ids:
+        series, _ = load_history(store, feeder_id, history_days=lookback)
+        cached = load_folds(backtest_dir, feeder_id)
+        folds[feeder_id] = {}
+        for method in methods:
+            for origin in fold_origins(series, n_folds, horizon):
+                fit_kwargs = backtest_fit_kwargs(registry, feeder_id, method, origin)
+                train, test = split_fold(series, origin, history_days, horizon)
+                if len(test) < horizon or train.isna().any() or test.isna().any():
+                    continue
+                key = fold_key(method, origin)
+                signature = fold_signature(train, test, fit_kwargs, alpha)
+                if cached.get(key, {}).get('signature') == signature:
+                    folds[feeder_id][key] = cached[key]
+                    continue
+                meta = {'method': method, 'origin': origin.isoformat(), 'signature': signature,
+                        'n_train': len(train)}
+                pending.append((feeder_id, key, meta, (method, train, test, fit_kwargs, alpha, timeout)))
+    reused = sum(len(f) for f in folds.values())
+
+    # The worker alarm normally fires first; the batch deadline only guards against hung workers
+    deadline = started + timeout * (math.ceil(len(pending) / n_jobs) + 1) if timeout else None
+    if pending:
+        pool = ProcessPoolExecutor(max_workers=min(n_jobs, len(pending)), initializer=limit_native_threads)
+        try:
+            futures = [(feeder_id, key, meta, pool.submit(evaluate_fold, *args)) for feeder_id, key, meta, args in pending]
+            for feeder_id, key, meta, future in futures:
+                try:
+                    remaining = None if deadline is None else max(0, deadline - time.perf_counter())
+                    row = future.result(timeout=remaining)
+                except FutureTimeoutError:
+                    row = {'status': 'timeout', 'error': "worker did not respond", 'fit_seconds': None}
+                except BrokenProcessPool as exc:
+                    row = {'status': 'failed', 'error': f"worker crashed: {exc}", 'fit_seconds': None}
+                folds[feeder_id][key] = {**meta, **row}
+        finally:
+            pool.shutdown(wait=deadline is None or time.perf_counter() < deadline, cancel_futures=True)
+
+    summary = load_summary(backtest_dir)
+    for feeder_id, rows in folds.items():
+        save_folds(backtest_dir, feeder_id, {k: r for k, r in rows.items() if r['status'] == 'ok'})
+        scores = {m: summarize_folds([r for r in rows.values() if r['method'] == m]) for m in methods}
+        previous = summary['feeders'].get(feeder_id, {}).get('methods', {})
+        merged = {**previous, **{m: s for m, s in scores.items() if s is not None}}
+        summary['feeders'][feeder_id] = {'methods': merged, 'best_method': best_method(merged)}
+    summary.update(
+        updated_at=datetime.now().isoformat(timespec='seconds'),
+        horizon=horizon, alpha=alpha, history_days=history_days
+    )
+    _write_json(summary_path(backtest_dir), summary)
+
+    failed = [(f, r) for f, rows in folds.items() for r in rows.values() if r['status'] != 'ok']
+    return {
+        'summary': summary,
+        'feeder_ids': list(feeder_ids),
+        'methods': list(methods),
+        'computed': len(pending),
+        'reused': reused,
+        'failed': failed,
+        'n_jobs': n_jobs,
+        'wall_seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def format_report(report):
+    """Render a backtest report as a plain-text table"""
+    lines = [f"{'Feeder':<12}{'Method':<16}{'Folds':>6}{'MAPE %':>9}{'RMSE':>9}{'MASE':>7}{'Cover %':>9}  Best"]
+    for feeder_id in report['feeder_ids']:
+        entry = report['summary']['feeders'].get(feeder_id, {})
+        for method in report['methods']:
+            s = entry.get('methods', {}).get(method)
+            if s is None:
+                lines.append(f"{feeder_id:<12}{method:<16}{0:>6}{'-':>9}{'-':>9}{'-':>7}{'-':>9}")
+                continue
+            fmt = lambda v, spec: format(v, spec) if v is not None else '-'
+            best = '*' if entry.get('best_method') == method else ''
+            lines.append(
+                f"{feeder_id:<12}{method:<16}{s['n_folds']:>6}{fmt(s['mape'], '>9.2f')}{fmt(s['rmse'], '>9.2f')}"
+                f"{fmt(s['mase'], '>7.2f')}{fmt(s['coverage'], '>9.1f')}  {best}"
+            )
+    for feeder_id, row in report['failed']:
+        lines.append(f"  {feeder_id} {row['method']} @ {row['origin']}: {row['status']} - {row.get('error', '')}")
+    lines.append(
+        f"{report['computed']} folds fitted, {report['reused']} reused from cache "
+        f"in {report['wall_seconds']:.1f}s wall on {report['n_jobs']} workers"
+    )
+    return '\n'.join(lines)
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of per-feeder forecasters")
+    parser.add_argument('feeders', nargs='*', help="Feeder ids (default: every feeder in the store)")
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=[DEFAULT_METHOD])
+    parser.add_argument('--folds', type=int, default=N_FOLDS, help="Forecast origins per feeder, one per day")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--timeout', type=float, default=FOLD_TIMEOUT, help="Seconds allowed per fold")
+    parser.add_argument('--history-days', type=int, default=HISTORY_DAYS)
+    args = parser.parse_args()
+
+    feeder_ids = args.feeders or FeederStore().feeders()
+    report = backtest_all(feeder_ids, args.methods, args.folds, args.jobs, args.history_days, timeout=args.timeout)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+
+from benchmarks.fixtures import ensure_store, store_env
+from benchmarks.harness import FEEDER_COUNTS, benchmark
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+APP_TIMEOUT = 600
+
+
+# ==================== DASHBOARD ====================
+@benchmark(FEEDER_COUNTS, env=store_env)
+def render_main(n_feeders):
+    """Full script run of the dashboard against a store of n_feeders, as a session rerun sees it"""
+    from streamlit.testing.v1 import AppTest
+
+    ensure_store(n_feeders)
+
+    def render():
+        at = AppTest.from_file(APP_PATH, default_timeout=APP_TIMEOUT)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        return at
+    return render
+
+
+# ==================== HTTP API ====================
+@benchmark(FEEDER_COUNTS, env=store_env)
+def api_stats(n_feeders):
+    """GET /stats for every feeder with a cold result cache, as the first client after a write sees it"""
+    from fastapi.testclient import TestClient
+
+    import api
+    from query_cache import QUERY_CACHE
+
+    ensure_store(n_feeders)
+    client = TestClient(api.create_app())
+
+    def request():
+        QUERY_CACHE.clear()
+        response = client.get('/stats')
+        response.raise_for_status()
+        return response.content
+    return request
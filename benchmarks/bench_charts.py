@@ -0,0 +1,49 @@
+from benchmarks.fixtures import feeder_frames, load_frame
+from benchmarks.harness import FEEDER_COUNTS, POINT_SIZES, benchmark
+
+
+# ==================== CHARTS ====================
+@benchmark(POINT_SIZES)
+def create_line_chart(n_points):
+    import app
+
+    data = load_frame(n_points)
+    return lambda: app.create_line_chart(data, "System Load")
+
+
+@benchmark(POINT_SIZES)
+def create_line_chart_reference(n_points):
+    import app
+
+    data = load_frame(n_points)
+    return lambda: app.create_line_chart(data, "", show_reference=True, ref_value=200.0)
+
+
+@benchmark(POINT_SIZES)
+def create_line_chart_interval(n_points):
+    import app
+
+    data = load_frame(n_points)
+    data = data.assign(lower=data['value'] - 10, upper=data['value'] + 10)
+    return lambda: app.create_line_chart(data, "", color='#06b6d4')
+
+
+@benchmark(FEEDER_COUNTS)
+def create_feeder_grid_chart(n_feeders):
+    import app
+
+    frames = feeder_frames(n_feeders)
+    colors = ['#06b6d4', '#3b82f6', '#8b5cf6', '#ec4899']
+    return lambda: app.create_feeder_grid_chart(frames, colors, width_px=700)
+
+
+@benchmark(FEEDER_COUNTS)
+def feeder_tiles_html(n_feeders):
+    """Sparkline tile markup for every feeder, as the monitoring grid sends it"""
+    import app
+    from feeder_registry import FeederRegistry
+
+    frames = feeder_frames(n_feeders)
+    stats = app.calculate_feeder_statistics(frames)
+    registry = FeederRegistry({'id': f} for f in frames)
+    return lambda: app.feeder_tiles_html(list(frames), frames, stats, registry)
@@ -0,0 +1,165 @@
+from benchmarks.fixtures import feeder_frames, load_frame
+from benchmarks.harness import FEEDER_COUNTS, POINT_SIZES, benchmark
+
+
+# ==================== GENERATORS ====================
+@benchmark(POINT_SIZES)
+def generate_beban_real_data(n_points):
+    import app
+
+    # Time the generator itself, not the st.cache_data lookup in front of it
+    generate = app.generate_beban_real_data.__wrapped__
+    return lambda: generate(n_points)
+
+
+@benchmark(POINT_SIZES)
+def generate_penyulang_data(n_points):
+    import app
+
+    generate = app.generate_penyulang_data.__wrapped__
+    return lambda: generate('A', periods=n_points)
+
+
+# ==================== STATISTICS ====================
+@benchmark(POINT_SIZES)
+def calculate_statistics(n_points):
+    import app
+
+    data = load_frame(n_points)
+    return lambda: app.calculate_statistics(data)
+
+
+@benchmark(FEEDER_COUNTS)
+def calculate_feeder_statistics(n_feeders):
+    import app
+
+    frames = feeder_frames(n_feeders)
+    return lambda: app.calculate_feeder_statistics(frames)
+
+
+@benchmark(FEEDER_COUNTS)
+def system_total(n_feeders):
+    from feeder_stats import system_total
+
+    frames = feeder_frames(n_feeders)
+    return lambda: system_total(frames, '15min')
+
+
+@benchmark(FEEDER_COUNTS)
+def system_kpis_seed(n_feeders):
+    from rollups import aggregate
+    from system_kpis import KPI_TIER, SystemKPIs
+
+    buckets = {
+        f: aggregate(frame.rename(columns={'time': 'timestamp', 'value': 'i'}), KPI_TIER)
+        for f, frame in feeder_frames(n_feeders).items()
+    }
+    return lambda: SystemKPIs.from_buckets(buckets, list(buckets), [200.0] * n_feeders)
+
+
+@benchmark(FEEDER_COUNTS)
+def system_kpis_summary(n_feeders):
+    """One render of the overview cards after a live tick of one reading per feeder"""
+    import pandas as pd
+    from rollups import aggregate
+    from system_kpis import KPI_TIER, SystemKPIs
+
+    frames = feeder_frames(n_feeders)
+    buckets = {
+        f: aggregate(frame.rename(columns={'time': 'timestamp', 'value': 'i'}), KPI_TIER)
+        for f, frame in frames.items()
+    }
+    kpis = SystemKPIs.from_buckets(buckets, list(frames), [200.0] * n_feeders)
+    tick = pd.DataFrame({
+        'feeder_id': list(frames),
+        'time': [frame['time'].iloc[-1] + pd.Timedelta('15min') for frame in frames.values()],
+        'value': [frame['value'].iloc[-1] for frame in frames.values()],
+    })
+    return lambda: kpis.update(tick).summary()
+
+
+@benchmark(FEEDER_COUNTS)
+def detector_update(n_feeders):
+    """One ingest batch of a reading per feeder through a warmed-up streaming detector"""
+    import pandas as pd
+    from detector import StreamDetector
+
+    frames = feeder_frames(n_feeders)
+    readings = pd.concat(frames, names=['feeder_id', None]).reset_index(level=0).rename(
+        columns={'time': 'timestamp', 'value': 'i'}
+    )
+    detector = StreamDetector(list(frames))
+    detector.update(readings)
+    tick = readings.groupby('feeder_id', sort=False).tail(1)
+
+    def update():
+        # Each call is the next tick; a repeated one would be skipped as already folded in
+        tick['timestamp'] += pd.Timedelta('15min')
+        return detector.update(tick)
+    return update
+
+
+@benchmark(POINT_SIZES)
+def detector_backfill(n_points):
+    """A single-feeder export of n_points readings through a fresh streaming detector"""
+    from detector import StreamDetector
+
+    readings = load_frame(n_points).rename(columns={'time': 'timestamp', 'value': 'i'}).assign(feeder_id='A')
+    return lambda: StreamDetector().update(readings)
+
+
+# ==================== OVERLOAD RISK ====================
+@benchmark(FEEDER_COUNTS)
+def overload_risk(n_feeders):
+    """Monte Carlo overload probabilities over a day of 15-minute steps"""
+    import numpy as np
+    from overload_risk import overload_risk
+
+    rng = np.random.default_rng(0)
+    predictions = {
+        f: frame.tail(96).assign(lower=lambda d: d['value'] - 15, upper=lambda d: d['value'] + 15)
+        for f, frame in feeder_frames(n_feeders, 96).items()
+    }
+    residuals = {f: rng.normal(0, 6, 28 * 24) for f in predictions}
+    i_nom = {f: frame['i_nom'].iloc[-1] for f, frame in predictions.items()}
+    return lambda: overload_risk(predictions, residuals, i_nom)
+
+
+# ==================== RECONCILIATION ====================
+@benchmark(FEEDER_COUNTS)
+def reconcile(n_feeders):
+    """MinT over feeders, one substation per 25 feeders and the system, every node with a base forecast"""
+    from hierarchy import Hierarchy, reconcile
+
+    frames = {f: frame.tail(24) for f, frame in feeder_frames(n_feeders, 24).items()}
+    hierarchy = Hierarchy({f: f"GI {i // 25}" for i, f in enumerate(frames)})
+    base = {f: frame.assign(lower=frame['value'] - 10, upper=frame['value'] + 10) for f, frame in frames.items()}
+    for node, members in hierarchy.members().items():
+        total = sum(frames[f]['value'].to_numpy() for f in members)
+        base[node] = frames[members[0]].assign(value=total, lower=total - 30, upper=total + 30)
+    return lambda: reconcile(hierarchy, base, 'mint')
+
+
+# ==================== FEATURES ====================
+@benchmark(POINT_SIZES)
+def feature_matrix(n_points):
+    """Calendar and weather regressors for n_points readings, served from the cached grid"""
+    import os
+
+    import pandas as pd
+    from benchmarks.fixtures import FIXTURE_DIR, READING_FREQ
+    from features import FeatureStore
+
+    features = FeatureStore(os.path.join(FIXTURE_DIR, 'features'))
+    index = pd.date_range(end=pd.Timestamp.now().floor(READING_FREQ), periods=n_points, freq=READING_FREQ)
+    features.matrix(index, READING_FREQ)
+    return lambda: features.matrix(index, READING_FREQ)
+
+
+# ==================== DOWNSAMPLING ====================
+@benchmark(POINT_SIZES)
+def downsample(n_points):
+    from downsample import downsample
+
+    data = load_frame(n_points)
+    return lambda: downsample(data)
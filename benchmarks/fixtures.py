@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# ==================== CONFIG ====================
+FIXTURE_DIR = os.path.join(tempfile.gettempdir(), 'feeder-benchmarks')
+READING_FREQ = '15min'
+STORE_DAYS = 7
+
+
+def feeder_ids(n_feeders):
+    """The dashboard's own A-D first, then numbered feeders"""
+    named = ['A', 'B', 'C', 'D']
+    return named[:n_feeders] + [f"F{i:03d}" for i in range(len(named), n_feeders)]
+
+
+def load_frame(n_points, i_nom=200.0, end=None, seed=0):
+    """A (time, value, i_nom) frame of n_points readings with a daily cycle"""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end or datetime.now()).floor(READING_FREQ)
+    time_index = pd.date_range(end=end, periods=n_points, freq=READING_FREQ)
+    hours = time_index.hour + time_index.minute / 60
+    values = i_nom * (0.7 + 0.15 * np.sin((hours - 6) / 24 * 2 * np.pi)) + rng.normal(0, 4, n_points)
+    return pd.DataFrame({'time': time_index, 'value': values, 'i_nom': i_nom})
+
+
+def feeder_frames(n_feeders, n_points=STORE_DAYS * 96):
+    return {
+        f: load_frame(n_points, 180.0 + 5 * (i % 7), seed=i)
+        for i, f in enumerate(feeder_ids(n_feeders))
+    }
+
+
+def store_env(n_feeders):
+    """Environment pointing the app at a fixture store of n_feeders; nothing else is shared"""
+    root = os.path.join(FIXTURE_DIR, f"feeders-{n_feeders}")
+    return {
+        'FEEDER_STORE_DIR': os.path.join(root, 'store'),
+        'FEEDER_MODEL_DIR': os.path.join(root, 'models'),
+        'FEEDER_CACHE_PATH': os.path.join(root, 'results.sqlite'),
+        'FEEDER_BACKTEST_DIR': os.path.join(root, 'backtests'),
+        'FEEDER_REGISTRY_PATH': os.path.join(root, 'feeders.json'),
+    }
+
+
+def ensure_store(n_feeders, days=STORE_DAYS):
+    """Write the registry, the last `days` of readings and their rollups for n_feeders once.
+
+    Later runs on the same day reuse them.
+    """
+    from feeder_store import FeederStore
+    from rollups import RollupStore
+
+    env = store_env(n_feeders)
+    root = env['FEEDER_STORE_DIR']
+    # The dashboard opens on the last 7 days, so the fixture is rebuilt daily
+    marker = os.path.join(root, f"_fixture_{datetime.now():%Y-%m-%d}")
+    if os.path.exists(marker):
+        return FeederStore(root)
+    shutil.rmtree(os.path.dirname(root), ignore_errors=True)
+    store = FeederStore(root)
+    frames = feeder_frames(n_feeders, (days + 1) * 96)
+    with open(env['FEEDER_REGISTRY_PATH'], 'w') as f:
+        json.dump({'feeders': [
+            {'id': feeder_id, 'substation': f"Substation {i // 10 + 1}", 'i_nom': float(frame['i_nom'].iloc[0])}
+            for i, (feeder_id, frame) in enumerate(frames.items())
+        ]}, f)
+    readings = []
+    for feeder_id, frame in frames.items():
+        readings.append(pd.DataFrame({
+            'timestamp': frame['time'], 'feeder_id': feeder_id, 'i': frame['value'], 'i_nom': frame['i_nom']
+        }))
+    # All Feeders reads the rollup tiers, so build them like the ingest worker does
+    RollupStore(store).update(store.write(pd.concat(readings, ignore_index=True)))
+    open(marker, 'w').close()
+    return store
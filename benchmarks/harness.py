@@ -0,0 +1,144 @@
+import json
+import os
+import platform
+import resource
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+
+# ==================== CONFIG ====================
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+POINT_SIZES = (45, 10_000, 1_000_000)
+FEEDER_COUNTS = (4, 50, 500)
+# A case fails when it is this much worse than its baseline...
+TOLERANCE = {'seconds': 0.50, 'payload_bytes': 0.10, 'peak_rss_mb': 0.25}
+# ...and also worse by at least this much, so tiny cases do not fail on noise
+FLOOR = {'seconds': 0.002, 'payload_bytes': 1024, 'peak_rss_mb': 20}
+# Timing budget per case: repeat until either limit is reached
+MAX_SAMPLES = 5
+MIN_SAMPLE_SECONDS = 0.01
+CASE_BUDGET_SECONDS = 3.0
+
+BENCHMARKS = {}
+
+
+# ==================== REGISTRY ====================
+def benchmark(params, env=None):
+    """Register a benchmark run once per param.
+
+    The decorated function does its setup and returns the callable to time.
+    If that callable returns a plotly Figure, an AppTest, or bytes, its
+    payload size is recorded too. env(param) returns environment variables
+    to set before the case's module is imported.
+    """
+    def register(func):
+        for param in params:
+            name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}[{param}]"
+            BENCHMARKS[name] = {'module': func.__module__, 'func': func.__name__, 'param': param, 'env': env}
+        return func
+    return register
+
+
+def payload_bytes(result):
+    """Bytes a result would put on the wire to the browser, or None for plain data"""
+    from plotly.basedatatypes import BaseFigure
+    from streamlit.testing.v1 import AppTest
+
+    if isinstance(result, BaseFigure):
+        return len(result.to_json())
+    if isinstance(result, AppTest):
+        # Every chart spec the script sent to the frontend
+        return sum(len(chart.proto.spec) for chart in result.get('plotly_chart'))
+    if isinstance(result, (bytes, str)):
+        return len(result)
+    return None
+
+
+def _rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+
+# ==================== MEASUREMENT ====================
+def measure(call):
+    """Time a callable asv-style: loop fast calls, keep the best of a few samples"""
+    started = time.perf_counter()
+    result = call()
+    first = time.perf_counter() - started
+    number = max(1, int(MIN_SAMPLE_SECONDS / first)) if first > 0 else 1
+    samples = [first]
+    while len(samples) < MAX_SAMPLES and sum(samples) * number < CASE_BUDGET_SECONDS:
+        started = time.perf_counter()
+        for _ in range(number):
+            call()
+        samples.append((time.perf_counter() - started) / number)
+    return result, {'seconds': min(samples), 'first_seconds': first, 'samples': len(samples)}
+
+
+def run_case(name, case):
+    """Run one case; meant to execute in a fresh process so peak RSS is its own"""
+    # Importing app.py outside `streamlit run` logs bare-mode warnings for every st call
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+    if case['env'] is not None:
+        os.environ.update(case['env'](case['param']))
+    func = getattr(import_module(case['module']), case['func'])
+    call = func(case['param'])
+    rss_before = _rss_mb()
+    result, timing = measure(call)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        **timing,
+        'payload_bytes': payload_bytes(result),
+        'peak_rss_mb': round(peak, 1),
+        'rss_growth_mb': round(max(0.0, peak - rss_before), 1),
+    }
+
+
+def run_isolated(name, case):
+    """run_case in a spawned process: clean imports, caches and memory high-water mark"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, name, case).result()
+
+
+# ==================== BASELINES ====================
+def machine_info():
+    return {'python': platform.python_version(), 'machine': platform.machine(),
+            'processor': platform.processor() or None, 'cpus': os.cpu_count()}
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {'machine': None, 'cases': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results, path=BASELINES_PATH):
+    """Merge results into the stored baselines"""
+    baselines = load_baselines(path)
+    for name, row in results.items():
+        baselines['cases'][name] = {k: round(row[k], 6) for k in TOLERANCE if row.get(k) is not None}
+    baselines['cases'] = dict(sorted(baselines['cases'].items()))
+    baselines['machine'] = machine_info()
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2)
+        f.write('\n')
+    return path
+
+
+def regressions(name, row, baselines):
+    """Metrics of one case that exceed their baseline by more than the tolerance"""
+    base = baselines['cases'].get(name)
+    if base is None:
+        return []
+    found = []
+    for metric, tolerance in TOLERANCE.items():
+        value, reference = row.get(metric), base.get(metric)
+        if value is None or reference is None:
+            continue
+        if value > reference * (1 + tolerance) and value - reference > FLOOR[metric]:
+            found.append(f"{metric} {value:,.4g} vs baseline {reference:,.4g} (+{(value / reference - 1) * 100:.0f}%)")
+    return found
@@ -0,0 +1,65 @@
+import argparse
+import sys
+import traceback
+from importlib import import_module
+
+from benchmarks.harness import BENCHMARKS, load_baselines, regressions, run_isolated, save_baselines
+
+# ==================== CONFIG ====================
+MODULES = ('benchmarks.bench_data', 'benchmarks.bench_charts', 'benchmarks.bench_app')
+# Largest sizes take minutes; --quick skips them
+SLOW_PARAMS = (1_000_000, 500)
+
+
+def format_row(name, row, problems):
+    payload = f"{row['payload_bytes'] / 1024:,.1f}" if row.get('payload_bytes') is not None else '-'
+    status = 'REGRESSED' if problems else 'ok'
+    return (f"{name:<52}{row['seconds'] * 1000:>11,.2f}{row['first_seconds'] * 1000:>11,.2f}"
+            f"{payload:>12}{row['peak_rss_mb']:>10,.0f}  {status}")
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard render and data paths")
+    parser.add_argument('-k', dest='pattern', default='', help="Only run cases whose name contains this")
+    parser.add_argument('--quick', action='store_true', help="Skip the 1M-point and 500-feeder cases")
+    parser.add_argument('--update', action='store_true', help="Store the results as the new baselines")
+    args = parser.parse_args()
+
+    for module in MODULES:
+        import_module(module)
+    cases = {
+        name: case for name, case in BENCHMARKS.items()
+        if args.pattern in name and not (args.quick and case['param'] in SLOW_PARAMS)
+    }
+    baselines = load_baselines()
+
+    print(f"{'Case':<52}{'Best (ms)':>11}{'First (ms)':>11}{'Payload KB':>12}{'RSS MB':>10}")
+    results, failed = {}, []
+    for name, case in cases.items():
+        try:
+            row = run_isolated(name, case)
+        except Exception:
+            print(f"{name:<52}  ERROR")
+            traceback.print_exc()
+            failed.append(name)
+            continue
+        problems = [] if args.update else regressions(name, row, baselines)
+        results[name] = row
+        print(format_row(name, row, problems), flush=True)
+        for problem in problems:
+            print(f"    {problem}")
+        if problems:
+            failed.append(name)
+
+    if args.update:
+        print(f"Baselines written to {save_baselines(results)}")
+    elif baselines['machine'] is None:
+        print("No baselines stored yet; run with --update to record them")
+    if failed:
+        print(f"{len(failed)} of {len(cases)} cases regressed or failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
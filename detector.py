@@ -0,0 +1,348 @@
+import argparse
+import json
+import math
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from feeder_stats import CRITICAL_RATIO
+from feeder_store import FeederStore
+
+# ==================== CONFIG ====================
+STATE_NAME = '_detector.npz'
+EVENT_LOG_NAME = '_events.log'
+# Readings per feeder before step and dropout alerts are trusted
+WARMUP = 16
+# The baseline is a daily profile of this many slots, so the load cycle is not taken for a step
+SLOTS = 24
+# Visits of a profile slot before its value is trusted
+SLOT_WARMUP = 2
+# Smoothing of each profile slot (one update a day), and of the residual variance and reading interval
+PROFILE_ALPHA = 2 / (7 + 1)
+VARIANCE_ALPHA = 2 / (96 + 1)
+# CUSUM slack and decision threshold, in residual standard deviations
+CUSUM_K = 1.0
+CUSUM_H = 8.0
+# The baseline spread never counts as less than this share of I_nom
+MIN_SIGMA_RATIO = 0.02
+# Minutes above CRITICAL_RATIO of I_nom before an overload is raised, and the share of I_nom below it that clears one
+SUSTAINED_MINUTES = 30
+CLEAR_MARGIN = 0.05
+# A gap this many times the usual reading interval, and at least DROPOUT_MINUTES, is a dropout
+DROPOUT_FACTOR = 4
+DROPOUT_MINUTES = 60
+
+NAT = np.iinfo('int64').min
+SEVERITY = {'overload': 'critical', 'overload_cleared': 'info', 'step': 'warning', 'dropout': 'warning'}
+
+# Per-feeder state arrays and their empty value
+FIELDS = {
+    'i_nom': np.nan, 'n': 0, 'last_time': NAT, 'interval': np.nan,
+    'var': 0.0, 'cusum_pos': 0.0, 'cusum_neg': 0.0, 'run_pos': 0, 'run_neg': 0,
+    'over_since': NAT, 'overloaded': False, 'silent': False,
+    'step_time': NAT, 'step_size': np.nan,
+}
+# Per-feeder daily profile: expected load and visit count of every slot
+PROFILE_FIELDS = {'profile': np.nan, 'slot_n': 0}
+
+
+def _event(feeder_id, ts, kind, value, message):
+    return {
+        'time': pd.Timestamp(ts).isoformat(), 'feeder_id': feeder_id, 'kind': kind,
+        'severity': SEVERITY[kind], 'value': None if not np.isfinite(value) else round(float(value), 2),
+        'message': message,
+    }
+
+
+# ==================== DETECTOR ====================
+class StreamDetector:
+    """Online overload, step and dropout detection over every feeder.
+
+    State is one compact array per field, indexed by feeder. Readings are
+    folded in with O(1) work each: a batch is split into one time-ordered
+    run per feeder and every run is a single scalar pass over that
+    feeder's state, so history is never rescanned and a long single-feeder
+    export costs no more per reading than a tick across many feeders.
+
+    - overload: above CRITICAL_RATIO of I_nom for SUSTAINED_MINUTES
+    - step: two-sided CUSUM of the residual against an exponentially
+      weighted daily profile, standardized by its weighted variance
+    - dropout: an invalid reading, or a gap of DROPOUT_FACTOR usual intervals
+    """
+
+    def __init__(self, feeder_ids=()):
+        self.feeder_ids = []
+        self.position = {}
+        # Readings skipped by the last update() for being older than their feeder's state
+        self.late = 0
+        self.state = {name: np.empty(0, dtype=np.asarray(empty).dtype) for name, empty in FIELDS.items()}
+        self.state.update({
+            name: np.empty((0, SLOTS), dtype=np.asarray(empty).dtype) for name, empty in PROFILE_FIELDS.items()
+        })
+        self._ensure(feeder_ids)
+
+    def _ensure(self, feeder_ids):
+        new = [f for f in dict.fromkeys(feeder_ids) if f not in self.position]
+        if not new:
+            return
+        for f in new:
+            self.position[f] = len(self.feeder_ids)
+            self.feeder_ids.append(f)
+        for name, empty in {**FIELDS, **PROFILE_FIELDS}.items():
+            shape = (len(new), *self.state[name].shape[1:])
+            self.state[name] = np.concatenate([self.state[name], np.full(shape, empty, dtype=self.state[name].dtype)])
+
+    # ---------- persistence ----------
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, feeder_ids=np.array(self.feeder_ids, dtype=str), **self.state)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        detector = cls()
+        if not os.path.exists(path):
+            return detector
+        with np.load(path) as data:
+            detector._ensure(data['feeder_ids'].tolist())
+            for name in {**FIELDS, **PROFILE_FIELDS}:
+                if name in data:
+                    detector.state[name] = data[name]
+        return detector
+
+    # ---------- update ----------
+    def update(self, readings):
+        """Fold in new (timestamp, feeder_id, i, i_nom) readings; return the alerts they raise.
+
+        Each feeder's readings are folded in time order. Readings at or
+        before a feeder's last folded-in reading are skipped, so a chunk
+        ingested twice is only counted once; their number is kept in
+        `self.late` for the caller to report.
+        """
+        self.late = 0
+        if readings is None or len(readings) == 0:
+            return []
+        self._ensure(readings['feeder_id'].unique().tolist())
+        rows = readings['feeder_id'].map(self.position).to_numpy(dtype='int64')
+        times = readings['timestamp'].to_numpy(dtype='datetime64[ns]').astype('int64')
+        last = self.state['last_time'][rows]
+        fresh = (last == NAT) | (times > last)
+        self.late = int((~fresh).sum())
+        order = np.lexsort((times, rows))
+        order = order[fresh[order]]
+        if not len(order):
+            return []
+        rows, times = rows[order], times[order]
+        values = readings['i'].to_numpy(dtype='float64')[order]
+        i_nom = readings['i_nom'].to_numpy(dtype='float64')[order]
+        # One contiguous, time-ordered run per feeder
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(rows)) + 1, [len(rows)]])
+        events = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            events.extend(self._scan(int(rows[lo]), times[lo:hi].tolist(), values[lo:hi].tolist(),
+                                     i_nom[lo:hi].tolist()))
+        return sorted(events, key=lambda event: event['time'])
+
+    def _scan(self, row, times, values, i_nom):
+        """Fold one feeder's time-ordered readings into its state with scalar updates"""
+        s = self.state
+        feeder_id = self.feeder_ids[row]
+        nominal, n, last = float(s['i_nom'][row]), int(s['n'][row]), int(s['last_time'][row])
+        interval, var = float(s['interval'][row]), float(s['var'][row])
+        cusum_pos, cusum_neg = float(s['cusum_pos'][row]), float(s['cusum_neg'][row])
+        run_pos, run_neg = int(s['run_pos'][row]), int(s['run_neg'][row])
+        over_since, overloaded, silent = int(s['over_since'][row]), bool(s['overloaded'][row]), bool(s['silent'][row])
+        step_time, step_size = int(s['step_time'][row]), float(s['step_size'][row])
+        profile, slot_n = s['profile'][row].tolist(), s['slot_n'][row].tolist()
+        events = []
+        for t, x, x_nom in zip(times, values, i_nom):
+            if not (math.isfinite(x) and x >= 0):
+                events.append(_event(feeder_id, t, 'dropout', x, f"Invalid reading {x} from feeder {feeder_id}"))
+                continue
+            if math.isfinite(x_nom):
+                nominal = x_nom
+
+            # Dropouts: a gap well beyond the feeder's usual reading interval
+            seen = last != NAT
+            gap = t - last if seen else 0
+            limit = DROPOUT_MINUTES * 60e9 if math.isnan(interval) else max(DROPOUT_FACTOR * interval,
+                                                                            DROPOUT_MINUTES * 60e9)
+            dropout = seen and n >= WARMUP and gap > limit and not silent
+            if dropout:
+                events.append(_event(feeder_id, t, 'dropout', x,
+                                     f"No readings from feeder {feeder_id} for {gap / 60e9:.0f} min"))
+            # The gap of an outage is not the feeder's cadence, so it stays out of the interval average
+            if not seen:
+                interval = math.nan
+            elif not (dropout or silent):
+                interval = gap if math.isnan(interval) else interval + VARIANCE_ALPHA * (gap - interval)
+            silent = False
+
+            # Sustained overloads, raised once and cleared when the load drops back
+            over = x >= CRITICAL_RATIO * nominal
+            # A raised overload holds until the load drops CLEAR_MARGIN below the threshold
+            held = overloaded and x >= (CRITICAL_RATIO - CLEAR_MARGIN) * nominal
+            since = t if over and over_since == NAT else over_since
+            raised = over and not overloaded and t - since >= SUSTAINED_MINUTES * 60e9
+            if raised:
+                events.append(_event(feeder_id, t, 'overload', x,
+                                     f"Feeder {feeder_id} above {CRITICAL_RATIO * 100:.0f}% of I_nom since "
+                                     f"{pd.Timestamp(since):%d %b %H:%M}"))
+            elif overloaded and not held:
+                events.append(_event(feeder_id, t, 'overload_cleared', x,
+                                     f"Feeder {feeder_id} back below {CRITICAL_RATIO * 100:.0f}% of I_nom after "
+                                     f"{(t - since) / 60e9:.0f} min"))
+            over_since = since if over or held else NAT
+            overloaded = held or raised
+
+            # Steps: CUSUM of the residual against the feeder's daily profile, before the profile moves
+            slot = t // 60_000_000_000 % 1440 * SLOTS // 1440
+            expected = profile[slot]
+            trusted = slot_n[slot] >= SLOT_WARMUP and n >= WARMUP
+            residual = x - expected if trusted else 0.0
+            sigma = max(math.sqrt(var), MIN_SIGMA_RATIO * (0.0 if math.isnan(nominal) else nominal))
+            z = residual / sigma if trusted and sigma > 0 else 0.0
+            pos = max(0.0, cusum_pos + z - CUSUM_K)
+            neg = max(0.0, cusum_neg - z - CUSUM_K)
+            # Readings since each sum last left zero; the mean shift over them is sigma * (k + S / run)
+            run_pos = run_pos + 1 if pos > 0 else 0
+            run_neg = run_neg + 1 if neg > 0 else 0
+            step = pos > CUSUM_H or neg > CUSUM_H
+            if step:
+                level = (sigma * (CUSUM_K + pos / max(run_pos, 1)) if pos > CUSUM_H
+                         else -sigma * (CUSUM_K + neg / max(run_neg, 1)))
+                events.append(_event(feeder_id, t, 'step', x,
+                                     f"Feeder {feeder_id} stepped {level:+.0f} A from its usual {expected:.0f} A"))
+                step_time, step_size = t, level
+                # Shift the whole profile to the new level once a step is raised
+                profile = [p + level for p in profile]
+                cusum_pos = cusum_neg = 0.0
+                run_pos = run_neg = 0
+            else:
+                cusum_pos, cusum_neg = pos, neg
+            expected = profile[slot]
+            profile[slot] = expected + PROFILE_ALPHA * (x - expected) if slot_n[slot] > 0 else x
+            slot_n[slot] += 1
+            if trusted:
+                var = (1 - VARIANCE_ALPHA) * (var + VARIANCE_ALPHA * residual ** 2)
+            n += 1
+            last = t
+
+        s['i_nom'][row], s['n'][row], s['last_time'][row] = nominal, n, last
+        s['interval'][row], s['var'][row] = interval, var
+        s['cusum_pos'][row], s['cusum_neg'][row] = cusum_pos, cusum_neg
+        s['run_pos'][row], s['run_neg'][row] = run_pos, run_neg
+        s['over_since'][row], s['overloaded'][row], s['silent'][row] = over_since, overloaded, silent
+        s['step_time'][row], s['step_size'][row] = step_time, step_size
+        s['profile'][row], s['slot_n'][row] = profile, slot_n
+        return events
+
+    def check_silence(self, now=None):
+        """Raise dropouts for feeders that stopped reporting altogether; O(feeders).
+
+        now defaults to the wall clock; ingest passes the newest ingested
+        reading instead, so a backfilled old export is not flagged as silent.
+        """
+        s = self.state
+        now = pd.Timestamp(now or pd.Timestamp.now().floor('s')).value
+        limit = np.fmax(DROPOUT_FACTOR * s['interval'], DROPOUT_MINUTES * 60e9)
+        silent = (s['last_time'] != NAT) & (s['n'] >= WARMUP) & ~s['silent'] & (now - s['last_time'] > limit)
+        s['silent'] |= silent
+        return [
+            _event(self.feeder_ids[k], now, 'dropout', np.nan,
+                   f"No readings from feeder {self.feeder_ids[k]} since {pd.Timestamp(s['last_time'][k]):%d %b %H:%M}")
+            for k in np.flatnonzero(silent)
+        ]
+
+    # ---------- readout ----------
+    def active(self):
+        """Per-feeder alert state for the dashboard badges"""
+        s = self.state
+        as_time = lambda a: pd.to_datetime(np.where(a == NAT, np.datetime64('NaT'), a.astype('datetime64[ns]')))
+        return pd.DataFrame({
+            'overloaded': s['overloaded'],
+            'over_since': as_time(s['over_since']),
+            'silent': s['silent'],
+            'last_time': as_time(s['last_time']),
+            'step_time': as_time(s['step_time']),
+            'step_size': s['step_size'],
+            'baseline_sigma': np.sqrt(s['var']),
+        }, index=pd.Index(self.feeder_ids, name='feeder_id'))
+
+
+# ==================== EVENT LOG ====================
+class EventLog:
+    """Append-only JSON-lines log of detector alerts, kept next to the store's change log"""
+
+    def __init__(self, store):
+        self.path = os.path.join(store.root, EVENT_LOG_NAME)
+
+    def append(self, events):
+        if not events:
+            return
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(event) + '\n' for event in events))
+
+    def tail(self, n=100, block_size=1 << 16):
+        """The last n events, newest first, reading only the end of the log"""
+        columns = ['time', 'feeder_id', 'kind', 'severity', 'value', 'message']
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=columns)
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position, data = f.tell(), b''
+            while position > 0 and data.count(b'\n') <= n:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.decode().splitlines()[-n:]
+        if position > 0 and len(lines) > n:
+            lines = lines[1:]
+        events = pd.DataFrame([json.loads(line) for line in reversed(lines) if line], columns=columns)
+        events['time'] = pd.to_datetime(events['time'], format='ISO8601')
+        return events
+
+
+def state_path(store):
+    return os.path.join(store.root, STATE_NAME)
+
+
+def process(store, readings, detector=None, log=None):
+    """Run newly ingested readings through the saved detector and log its alerts"""
+    detector = detector or StreamDetector.load(state_path(store))
+    events = detector.update(readings)
+    (log or EventLog(store)).append(events)
+    detector.save(state_path(store))
+    return events
+
+
+# ==================== CLI ====================
+def replay(store, feeder_ids=None, days=14):
+    """Rebuild the detector state and event log from the last `days` of stored readings"""
+    detector, log = StreamDetector(), EventLog(store)
+    if os.path.exists(log.path):
+        os.remove(log.path)
+    end = date.today() + timedelta(days=1)
+    readings = store.read_many(feeder_ids or store.feeders(), end - timedelta(days=days), end)
+    return process(store, readings, detector, log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming overload, step and dropout detection over the feeder store")
+    parser.add_argument('feeders', nargs='*', help="Feeder ids to replay (default: every feeder in the store)")
+    parser.add_argument('--replay', type=int, metavar='DAYS', help="Rebuild state and event log from this many days")
+    parser.add_argument('--tail', type=int, default=20, help="Print this many recent events")
+    args = parser.parse_args()
+    store = FeederStore()
+    if args.replay:
+        events = replay(store, args.feeders or None, args.replay)
+        print(f"[detector] replayed {args.replay} days, {len(events)} events")
+    for event in EventLog(store).tail(args.tail).itertuples():
+        print(f"{event.time:%Y-%m-%d %H:%M}  {event.severity:<8} {event.kind:<16} {event.message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import numpy as np
+
+# ==================== CONFIG ====================
+# Roughly two points per horizontal pixel is all a line chart can show
+POINTS_PER_PIXEL = 2
+DEFAULT_WIDTH_PX = 1200
+
+
+def _numeric_x(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype('int64').astype('float64')
+    return x.astype('float64')
+
+
+def _bucket_edges(n, n_buckets, start=0):
+    return np.linspace(start, n, n_buckets + 1).astype(int)
+
+
+# ==================== ALGORITHMS ====================
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _numeric_x(x)
+    y = np.asarray(y, dtype='float64')
+    # First and last points are fixed; the interior is split into n_out - 2 buckets
+    edges = _bucket_edges(n - 1, n_out - 2, start=1)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 1 < n_out - 2:
+            next_lo, next_hi = edges[b + 1], edges[b + 2]
+            avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(np.argmax(area))
+        selected[b + 1] = prev
+    return selected
+
+
+def bucket_extrema(y, n_buckets):
+    """Indices of the minimum and maximum of each of n_buckets equal buckets"""
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if n_buckets >= n:
+        return np.arange(n), np.arange(n)
+    size = int(np.ceil(n / n_buckets))
+    pad = size * n_buckets - n
+    padded_hi = np.concatenate([np.where(np.isnan(y), -np.inf, y), np.full(pad, -np.inf)]).reshape(n_buckets, size)
+    padded_lo = np.concatenate([np.where(np.isnan(y), np.inf, y), np.full(pad, np.inf)]).reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    hi = offsets + padded_hi.argmax(axis=1)
+    lo = offsets + padded_lo.argmin(axis=1)
+    keep = offsets < n
+    return np.minimum(lo[keep], n - 1), np.minimum(hi[keep], n - 1)
+
+
+def minmax_envelope(y, n_out):
+    """Indices of the min and max of each bucket, so the band of every pixel is drawn"""
+    lo, hi = bucket_extrema(y, max(1, n_out // 2))
+    return np.unique(np.concatenate([[0, len(y) - 1], lo, hi]))
+
+
+# ==================== CHART STAGE ====================
+def target_points(width_px=None):
+    """Number of points worth sending for a chart of the given pixel width"""
+    return int((width_px or DEFAULT_WIDTH_PX) * POINTS_PER_PIXEL)
+
+
+def downsample(data, width_px=None, method='lttb', x='time', y='value'):
+    """Reduce a chart frame to what its pixel width can show.
+
+    Peaks are never dropped. On top of the selected points, the highest
+    reading of every bucket is always kept, so an overload spike survives
+    even when LTTB would have chosen a neighbour. Rollup frames also keep
+    the rows holding each bucket's largest `max` and smallest `min`, so the
+    envelope band still reaches the true extremes.
+    """
+    n_out = target_points(width_px)
+    if len(data) <= n_out:
+        return data
+    values = data[y].to_numpy(dtype='float64')
+    if method == 'minmax':
+        index = minmax_envelope(values, n_out)
+    else:
+        index = lttb(data[x].to_numpy(), values, n_out)
+        _, peaks = bucket_extrema(values, max(1, n_out // 4))
+        index = np.union1d(index, peaks)
+    n_buckets = max(1, n_out // 4)
+    if 'max' in data:
+        index = np.union1d(index, bucket_extrema(data['max'].to_numpy(dtype='float64'), n_buckets)[1])
+    if 'min' in data:
+        index = np.union1d(index, bucket_extrema(data['min'].to_numpy(dtype='float64'), n_buckets)[0])
+    return data.iloc[index]
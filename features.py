@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from feeder_store import BASE_DIR
+
+# ==================== CONFIG ====================
+CALENDAR_PATH = os.environ.get('FEEDER_CALENDAR_PATH', os.path.join(BASE_DIR, 'calendar.json'))
+WEATHER_PATH = os.environ.get('FEEDER_WEATHER_PATH', os.path.join(BASE_DIR, 'data', 'weather.csv'))
+DEFAULT_FEATURE_DIR = os.environ.get('FEEDER_FEATURE_DIR', os.path.join(BASE_DIR, 'data', 'features'))
+
+CALENDAR_FEATURES = ('weekend', 'holiday', 'ramadan', 'sahur', 'eid_leave')
+WEATHER_FEATURES = ('temperature', 'cooling')
+FEATURE_NAMES = CALENDAR_FEATURES + WEATHER_FEATURES
+# Pre-dawn meal during Ramadan, when households light up and cook before the fast
+SAHUR_HOURS = (2, 3, 4)
+# Mudik and collective leave around Eid al-Fitr, in days before and after its first day
+EID_LEAVE_DAYS = (-3, 4)
+# Air conditioning load starts above this temperature (deg C)
+COOLING_BASE = 26.0
+# Stand-in without a weather file; Forecaster.fit drops the constant column
+DEFAULT_TEMPERATURE = 28.0
+# Missing weather hours bridged by interpolation
+MAX_WEATHER_GAP = 6
+# Hours the weather file does not cover get the same hour's mean over its last days
+CLIMATOLOGY_DAYS = 7
+
+
+# ==================== SOURCES ====================
+def _ranges(pairs):
+    """Inclusive (start, end) day ranges as two datetime64 arrays sorted by start"""
+    pairs = sorted((pd.Timestamp(a).normalize(), pd.Timestamp(b).normalize()) for a, b in pairs)
+    return (np.array([a for a, _ in pairs], dtype='datetime64[ns]'),
+            np.array([b for _, b in pairs], dtype='datetime64[ns]'))
+
+
+def _in_ranges(days, ranges):
+    starts, ends = ranges
+    if not len(starts):
+        return np.zeros(len(days), dtype=bool)
+    position = np.searchsorted(starts, days, side='right') - 1
+    return (position >= 0) & (days <= ends[position.clip(0)])
+
+
+def load_calendar(path=CALENDAR_PATH):
+    """National holidays, Ramadan and the leave around Eid al-Fitr from a JSON calendar.
+
+    The file lists "holidays" as dates, "ramadan" as [first, last] date
+    pairs and "eid_al_fitr" as the first day of each Eid. A missing file
+    gives an empty calendar.
+    """
+    raw = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            raw = json.load(f)
+    before, after = (pd.Timedelta(days=d) for d in EID_LEAVE_DAYS)
+    eid = [pd.Timestamp(d) for d in raw.get('eid_al_fitr', [])]
+    return {
+        'holidays': pd.to_datetime(raw.get('holidays', [])).normalize().to_numpy(dtype='datetime64[ns]'),
+        'ramadan': _ranges(raw.get('ramadan', [])),
+        'eid_leave': _ranges([(d + before, d + after) for d in eid]),
+    }
+
+
+def load_weather(path=WEATHER_PATH):
+    """Hourly temperature from a CSV of (timestamp, temperature) rows, or None without one"""
+    if not os.path.exists(path):
+        return None
+    frame = pd.read_csv(path, usecols=['timestamp', 'temperature'], parse_dates=['timestamp'])
+    series = frame.set_index('timestamp')['temperature'].sort_index().resample('1h').mean()
+    series = series.interpolate(limit=MAX_WEATHER_GAP, limit_area='inside').dropna()
+    return series if len(series) else None
+
+
+def _temperature(index, weather):
+    if weather is None:
+        return np.full(len(index), DEFAULT_TEMPERATURE)
+    recent = weather[weather.index > weather.index[-1] - pd.Timedelta(days=CLIMATOLOGY_DAYS)]
+    profile = recent.groupby(recent.index.hour).mean().reindex(range(24)).fillna(recent.mean()).to_numpy()
+    values = weather.reindex(index.floor('h')).to_numpy(dtype='float64', copy=True)
+    missing = np.isnan(values)
+    values[missing] = profile[index.hour[missing]]
+    return values
+
+
+# ==================== FEATURES ====================
+def build_features(index, calendar, weather=None):
+    """(len(index) x FEATURE_NAMES) regressors for each timestamp of a DatetimeIndex"""
+    index = pd.DatetimeIndex(index)
+    days = index.normalize().to_numpy(dtype='datetime64[ns]')
+    ramadan = _in_ranges(days, calendar['ramadan'])
+    temperature = _temperature(index, weather)
+    return np.column_stack([
+        index.dayofweek >= 5,
+        np.isin(days, calendar['holidays']),
+        ramadan,
+        ramadan & np.isin(index.hour, SAHUR_HOURS),
+        _in_ranges(days, calendar['eid_leave']),
+        temperature,
+        np.maximum(temperature - COOLING_BASE, 0),
+    ]).astype('float64')
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FeatureStore:
+    """Feature matrices on a regular time grid, built once and extended by whole days.
+
+    Each frequency keeps one float64 matrix of every FEATURE_NAMES column
+    from the first day ever requested onwards, in memory and as an .npz
+    under root shared by the trainers, the worker and the dashboard.
+    Requests outside it only build the missing days. Rows are stored once
+    settled: calendar rows always, weather rows up to the last day the
+    weather file fully covers. Later hours, such as a forecast horizon,
+    are built on the fly from the temperature climatology.
+
+    Editing the calendar, or adding or removing the weather file, rebuilds
+    the matrix; appending to the weather file only extends it.
+    """
+
+    def __init__(self, root=DEFAULT_FEATURE_DIR, calendar_path=CALENDAR_PATH, weather_path=WEATHER_PATH):
+        self.root = root
+        self.calendar_path = calendar_path
+        self.weather_path = weather_path
+        self.grids = {}
+        self.lock = threading.Lock()
+        self._sources = None
+
+    def sources(self):
+        """(calendar, weather), reparsed whenever either file changes"""
+        stamps = (_file_stamp(self.calendar_path), _file_stamp(self.weather_path))
+        if self._sources is None or self._sources[0] != stamps:
+            self._sources = (stamps, load_calendar(self.calendar_path), load_weather(self.weather_path))
+        return self._sources[1:]
+
+    def signature(self):
+        """Identifies the inputs settled rows were built from"""
+        self.sources()
+        calendar_stamp, weather_stamp = self._sources[0]
+        return f"calendar={calendar_stamp} weather={weather_stamp is not None}"
+
+    # ---------- lookup ----------
+    def matrix(self, index, freq, names=FEATURE_NAMES):
+        """Regressors `names` for each timestamp of index, a grid of freq, as a float64 array"""
+        index = pd.DatetimeIndex(index)
+        columns = [FEATURE_NAMES.index(name) for name in names]
+        if index.empty:
+            return np.empty((0, len(columns)))
+        step = pd.Timedelta(to_offset(freq))
+        with self.lock:
+            calendar, weather = self.sources()
+            grid = self._grid(step)
+            self._extend(grid, step, index.min(), index.max(), calendar, weather)
+            out = np.empty((len(index), len(FEATURE_NAMES)))
+            cached = np.zeros(len(index), dtype=bool)
+            if grid['start'] is not None:
+                offset = index - grid['start']
+                position = np.asarray(offset // step)
+                cached = np.asarray(offset % step == pd.Timedelta(0)) & (position >= 0) & (position < len(grid['values']))
+                out[cached] = grid['values'][position[cached]]
+        if not cached.all():
+            out[~cached] = build_features(index[~cached], calendar, weather)
+        return out[:, columns]
+
+    def frame(self, start, end, freq, names=FEATURE_NAMES):
+        """matrix() over [start, end) as a DataFrame indexed by time"""
+        index = pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq=freq, inclusive='left')
+        return pd.DataFrame(self.matrix(index, freq, names), index=index, columns=list(names))
+
+    # ---------- grid ----------
+    def _grid(self, step):
+        signature = self.signature()
+        grid = self.grids.get(step) or self._read(step)
+        if grid is None or grid['signature'] != signature:
+            grid = {'start': None, 'values': np.empty((0, len(FEATURE_NAMES))), 'signature': signature}
+        self.grids[step] = grid
+        return grid
+
+    def _extend(self, grid, step, first, last, calendar, weather):
+        """Build and store the settled whole days between first and last the grid does not hold yet"""
+        day = pd.Timedelta(days=1)
+        end = last.normalize() + day
+        if weather is not None:
+            end = min(end, (weather.index[-1] + pd.Timedelta(hours=1)).normalize())
+        first = first.normalize()
+        if end <= first:
+            return
+        start, values = grid['start'], grid['values']
+        if start is None:
+            start = first
+        stop = start + len(values) * step
+        changed = False
+        if first < start:
+            before = pd.date_range(first, start, freq=step, inclusive='left')
+            values = np.concatenate([build_features(before, calendar, weather), values])
+            start, changed = first, True
+        if end > stop:
+            after = pd.date_range(stop, end, freq=step, inclusive='left')
+            values = np.concatenate([values, build_features(after, calendar, weather)])
+            changed = True
+        if changed:
+            grid.update(start=start, values=values)
+            self._write(step, grid)
+
+    # ---------- persistence ----------
+    def _path(self, step):
+        return os.path.join(self.root, f"features_{int(step.total_seconds())}s.npz")
+
+    def _read(self, step):
+        path = self._path(step)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if tuple(data['columns'].tolist()) != FEATURE_NAMES:
+                return None
+            return {'start': pd.Timestamp(int(data['start'])), 'values': data['values'],
+                    'signature': str(data['signature'])}
+
+    def _write(self, step, grid):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(step)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, start=np.int64(grid['start'].value), values=grid['values'],
+                 signature=np.array(grid['signature']), columns=np.array(FEATURE_NAMES))
+        os.replace(tmp, path)
+
+    def rebuild(self):
+        """Drop every cached matrix, e.g. after correcting past weather rows"""
+        with self.lock:
+            self.grids.clear()
+            self._sources = None
+            if os.path.isdir(self.root):
+                for name in os.listdir(self.root):
+                    if name.startswith('features_') and name.endswith('.npz'):
+                        os.remove(os.path.join(self.root, name))
+
+
+FEATURE_STORE = FeatureStore()
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Build the calendar and weather regressors of the load forecasters")
+    parser.add_argument('--start', required=True, help="First day (YYYY-MM-DD)")
+    parser.add_argument('--end', required=True, help="Day after the last one (YYYY-MM-DD)")
+    parser.add_argument('--freq', default='1h')
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the cached matrices from scratch")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        FEATURE_STORE.rebuild()
+    frame = FEATURE_STORE.frame(args.start, args.end, args.freq)
+    print(f"[features] {len(frame)} rows, {FEATURE_STORE.signature()}")
+    print(frame.describe().T[['mean', 'min', 'max']].to_string())
+
+
+if __name__ == "__main__":
+    main()
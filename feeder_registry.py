@@ -0,0 +1,77 @@
+import json
+import os
+
+import pandas as pd
+
+from feeder_store import BASE_DIR
+
+# ==================== CONFIG ====================
+REGISTRY_PATH = os.environ.get('FEEDER_REGISTRY_PATH', os.path.join(BASE_DIR, 'feeders.json'))
+DEFAULT_I_NOM = 200.0
+COLUMNS = ['name', 'substation', 'i_nom', 'ties']
+
+
+# ==================== REGISTRY ====================
+class FeederRegistry:
+    """Static description of the network: one row per feeder with its name, substation, I_nom and tie switches.
+
+    File format: {"feeders": [{"id", "name", "substation", "i_nom", "ties": [...]}, ...]}.
+    Only id is required. A feeder without "ties" may switch to any other
+    feeder, as the dashboard assumed before ties were known.
+    """
+
+    def __init__(self, feeders=()):
+        rows = []
+        for entry in feeders:
+            feeder_id = str(entry['id'])
+            rows.append({
+                'id': feeder_id,
+                'name': entry.get('name') or f"Penyulang {feeder_id}",
+                'substation': entry.get('substation') or '',
+                'i_nom': float(entry.get('i_nom') or DEFAULT_I_NOM),
+                'ties': None if entry.get('ties') is None else [str(t) for t in entry['ties']],
+            })
+        frame = pd.DataFrame(rows, columns=['id', *COLUMNS]).set_index('id')
+        duplicated = frame.index[frame.index.duplicated()].unique().tolist()
+        if duplicated:
+            raise ValueError(f"Duplicate feeder ids in registry: {duplicated}")
+        unknown = sorted({t for ties in frame['ties'].dropna() for t in ties} - set(frame.index))
+        if unknown:
+            raise ValueError(f"Ties to feeders missing from the registry: {unknown}")
+        self.frame = frame
+
+    @classmethod
+    def load(cls, path=REGISTRY_PATH, fallback_ids=()):
+        """Read the registry file; without one, describe fallback_ids with defaults"""
+        if not os.path.exists(path):
+            return cls({'id': f} for f in fallback_ids)
+        with open(path) as f:
+            return cls(json.load(f)['feeders'])
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, feeder_id):
+        return feeder_id in self.frame.index
+
+    @property
+    def ids(self):
+        return self.frame.index.tolist()
+
+    def name(self, feeder_id):
+        return self.frame.at[feeder_id, 'name'] if feeder_id in self else f"Penyulang {feeder_id}"
+
+    def i_nom(self, feeder_id):
+        return self.frame.at[feeder_id, 'i_nom'] if feeder_id in self else DEFAULT_I_NOM
+
+    @property
+    def ties(self):
+        """Neighbour lists for transfer_solver.tie_matrix; None when no feeder declares any"""
+        declared = self.frame['ties'].dropna()
+        if declared.empty:
+            return None
+        # Feeders without a declared list may switch to any other feeder
+        return {
+            f: self.ids if ties is None else ties
+            for f, ties in self.frame['ties'].items()
+        }
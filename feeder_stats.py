@@ -0,0 +1,189 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# ==================== CONFIG ====================
+WARNING_RATIO = 0.8
+CRITICAL_RATIO = 0.9
+
+# Per-bucket counts rollup frames carry next to the bucket mean
+BUCKET_COUNTS = ('count', 'above_80', 'above_90')
+
+METRICS = [
+    'avg', 'max', 'min', 'current', 'p95', 'load_factor',
+    'utilization', 'avg_utilization', 'peak_utilization',
+    'pct_above_80', 'pct_above_90', 'hours_above_80', 'hours_above_90', 'count',
+]
+
+
+# ==================== LAYOUT ====================
+def _wide(frames, column, index=None):
+    """time x feeder block of one column; frames sharing one time axis are stacked without alignment"""
+    index = index if index is not None else _shared_index(frames)
+    if index is not None:
+        return pd.DataFrame(
+            np.column_stack([v[column].to_numpy() for v in frames.values()]), index=index, columns=list(frames)
+        ).sort_index()
+    return pd.concat(
+        {k: pd.Series(v[column].to_numpy(), index=pd.Index(v['time'])) for k, v in frames.items()}, axis=1
+    ).sort_index()
+
+
+def _shared_index(frames):
+    """The common time axis when every frame has the same timestamps (rollup buckets usually do)"""
+    times = [v['time'].to_numpy() for v in frames.values()]
+    first = times[0]
+    if all(len(t) == len(first) and np.array_equal(t, first) for t in times[1:]):
+        return pd.Index(frames[next(iter(frames))]['time'], name='time')
+    return None
+
+
+def stack_feeders(frames):
+    """Align per-feeder (time, value, i_nom) frames into one wide block.
+
+    Returns (values, i_nom, envelope): values is a time x feeder DataFrame,
+    i_nom a Series holding each feeder's latest nominal current. Frames read
+    from rollup tiers also carry per-bucket min/max/last and, when every
+    frame has them, the bucket count and readings above each threshold;
+    envelope holds those as aligned blocks (None for raw readings).
+    """
+    frames = {k: v for k, v in frames.items() if len(v)}
+    if not frames:
+        return pd.DataFrame(), pd.Series(dtype='float64'), None
+
+    index = _shared_index(frames)
+
+    def wide(column):
+        return _wide(frames, column, index)
+
+    values = wide('value')
+    i_nom = pd.Series({k: float(v['i_nom'].iloc[-1]) for k, v in frames.items() if 'i_nom' in v})
+    envelope = None
+    if all({'min', 'max', 'last'} <= set(v.columns) for v in frames.values()):
+        envelope = {column: wide(column) for column in ('min', 'max', 'last')}
+        if all(set(BUCKET_COUNTS) <= set(v.columns) for v in frames.values()):
+            envelope.update({column: wide(column) for column in BUCKET_COUNTS})
+    return values, i_nom, envelope
+
+
+def system_total(frames, freq):
+    """Sum per-feeder (time, value) frames into the system load on a common freq grid"""
+    frames = {k: v for k, v in frames.items() if len(v)}
+    if not frames:
+        return pd.DataFrame({'time': [], 'value': []})
+    # One resample of the aligned block gives the same buckets as resampling each feeder
+    total = _wide(frames, 'value').resample(freq).mean().sum(axis=1, min_count=1).dropna()
+    return pd.DataFrame({
+        'time': total.index,
+        'value': total.values
+    })
+
+
+def _sample_hours(index, valid):
+    """Each column's usual reading interval in hours: the median gap between its own valid samples.
+
+    Feeders at different resolutions share one union index, so its spacing
+    is not any one feeder's.
+    """
+    if len(index) < 2 or not isinstance(index, pd.DatetimeIndex):
+        return np.full(valid.shape[1], np.nan)
+    hours = (index - index[0]) / pd.Timedelta(hours=1)
+    times = np.where(valid, np.asarray(hours, dtype='float64')[:, None], np.nan)
+    previous = pd.DataFrame(times).ffill().shift(1).to_numpy()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmedian(times - previous, axis=0)
+
+
+def _last_valid(block):
+    """Last non-NaN value per column of a 2-D array"""
+    valid = ~np.isnan(block)
+    last = block.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    out = block[last, np.arange(block.shape[1])]
+    out[~valid.any(axis=0)] = np.nan
+    return out
+
+
+# ==================== BATCH STATISTICS ====================
+def batch_statistics(values, i_nom=None, envelope=None):
+    """Compute every feeder metric for a time x feeder block in one vectorized pass.
+
+    NaNs mark missing readings. Without i_nom the utilization and threshold
+    metrics are NaN. When values are bucket means, envelope supplies the
+    bucket min/max/last blocks so peaks and the latest reading stay exact,
+    and, from rollup tiers, the per-bucket counts: the average is then
+    weighted by readings per bucket and the threshold metrics count raw
+    readings, so an overload shorter than a bucket still shows. p95 stays a
+    percentile of the bucket means.
+    """
+    columns = list(values.columns)
+    block = values.to_numpy(dtype='float64', na_value=np.nan)
+    if block.size == 0:
+        return pd.DataFrame(index=pd.Index(columns, name='feeder_id'), columns=METRICS, dtype='float64')
+    nominal = (
+        np.full(len(columns), np.nan) if i_nom is None
+        else pd.Series(i_nom).reindex(columns).to_numpy(dtype='float64')
+    )
+
+    valid = ~np.isnan(block)
+    count = valid.sum(axis=0)
+    # All-NaN columns legitimately come out NaN; silence numpy's empty-slice warnings
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if envelope is None:
+            peak = np.nanmax(block, axis=0)
+            low = np.nanmin(block, axis=0)
+            current = _last_valid(block)
+        else:
+            peak = np.nanmax(envelope['max'].to_numpy(dtype='float64', na_value=np.nan), axis=0)
+            low = np.nanmin(envelope['min'].to_numpy(dtype='float64', na_value=np.nan), axis=0)
+            current = _last_valid(envelope['last'].to_numpy(dtype='float64', na_value=np.nan))
+        p95 = np.nanpercentile(block, 95, axis=0)
+        hours = _sample_hours(values.index, valid)
+        if envelope is not None and 'count' in envelope:
+            weight, above_80, above_90 = (
+                np.where(valid, np.nan_to_num(envelope[column].to_numpy(dtype='float64', na_value=np.nan)), 0)
+                for column in BUCKET_COUNTS
+            )
+            readings = weight.sum(axis=0)
+            avg = (np.where(valid, block, 0) * weight).sum(axis=0) / readings
+            above_80, above_90 = above_80.sum(axis=0), above_90.sum(axis=0)
+            # A full bucket holds the most readings, so bucket width over that count is the reading interval
+            hours = hours / weight.max(axis=0)
+        else:
+            readings = count
+            avg = np.nanmean(block, axis=0)
+            above_80 = (block >= WARNING_RATIO * nominal).sum(axis=0)
+            above_90 = (block >= CRITICAL_RATIO * nominal).sum(axis=0)
+        pct_80 = np.where(readings > 0, above_80 / readings * 100, np.nan)
+        pct_90 = np.where(readings > 0, above_90 / readings * 100, np.nan)
+        stats = {
+            'avg': avg,
+            'max': peak,
+            'min': low,
+            'current': current,
+            'p95': p95,
+            'load_factor': avg / peak,
+            'utilization': current / nominal * 100,
+            'avg_utilization': avg / nominal * 100,
+            'peak_utilization': peak / nominal * 100,
+            'pct_above_80': np.where(np.isnan(nominal), np.nan, pct_80),
+            'pct_above_90': np.where(np.isnan(nominal), np.nan, pct_90),
+        }
+    stats['hours_above_80'] = np.where(np.isnan(nominal), np.nan, above_80 * hours)
+    stats['hours_above_90'] = np.where(np.isnan(nominal), np.nan, above_90 * hours)
+    stats['count'] = count
+    return pd.DataFrame(stats, index=pd.Index(columns, name='feeder_id'))[METRICS]
+
+
+def status_of(utilization):
+    """Normal / Warning / Critical label for a utilization percentage, N/A without one"""
+    if utilization is None or not np.isfinite(utilization):
+        return 'N/A'
+    if utilization < WARNING_RATIO * 100:
+        return 'Normal'
+    if utilization < CRITICAL_RATIO * 100:
+        return 'Warning'
+    return 'Critical'
+
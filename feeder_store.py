@@ -0,0 +1,294 @@
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ==================== CONFIG ====================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = os.environ.get('FEEDER_STORE_DIR', os.path.join(BASE_DIR, 'data', 'store'))
+
+COLUMNS = ['timestamp', 'feeder_id', 'i', 'i_nom']
+SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('ns')),
+    ('feeder_id', pa.string()),
+    ('i', pa.float64()),
+    ('i_nom', pa.float64()),
+])
+
+
+# ==================== HELPERS ====================
+def to_window(start, end):
+    """Convert dashboard start/end dates into a half-open [start, end) timestamp window.
+
+    A plain date end (as from st.date_input) covers that whole day; a
+    timestamp end is exclusive as given, even at midnight.
+    """
+    whole_day = isinstance(end, date) and not isinstance(end, datetime)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if whole_day:
+        end = end + pd.Timedelta(days=1)
+    return start, end
+
+
+def _empty(columns=COLUMNS):
+    """Empty readings frame with the store's dtypes"""
+    return SCHEMA.empty_table().select(list(columns)).to_pandas()
+
+
+def _day_from_dirname(name):
+    return datetime.strptime(name[len('date='):], '%Y-%m-%d').date()
+
+
+def _safe_feeder_id(feeder_id):
+    feeder_id = str(feeder_id).strip()
+    if not feeder_id or '/' in feeder_id or '\\' in feeder_id or feeder_id.startswith('.'):
+        raise ValueError(f"Invalid feeder id: {feeder_id!r}")
+    return feeder_id
+
+
+# ==================== STORE ====================
+class FeederStore:
+    """Columnar on-disk store of feeder current readings partitioned by feeder and day.
+
+    Layout: <root>/feeder=<id>/date=<YYYY-MM-DD>/part-*.parquet
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---------- layout ----------
+    def feeder_dir(self, feeder_id):
+        return os.path.join(self.root, f"feeder={_safe_feeder_id(feeder_id)}")
+
+    def partition_dir(self, feeder_id, day):
+        return os.path.join(self.feeder_dir(feeder_id), f"date={day:%Y-%m-%d}")
+
+    def partition_files(self, feeder_id, day):
+        path = self.partition_dir(feeder_id, day)
+        if not os.path.isdir(path):
+            return []
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.startswith('part-') and name.endswith('.parquet')
+        )
+
+    def feeders(self):
+        """List feeder ids present in the store"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name[len('feeder='):] for name in os.listdir(self.root)
+            if name.startswith('feeder=') and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def days(self, feeder_id, start=None, end=None):
+        """List stored days for a feeder, optionally restricted to [start, end]"""
+        path = self.feeder_dir(feeder_id)
+        if not os.path.isdir(path):
+            return []
+        days = sorted(_day_from_dirname(name) for name in os.listdir(path) if name.startswith('date='))
+        if start is not None:
+            days = [d for d in days if d >= start]
+        if end is not None:
+            days = [d for d in days if d <= end]
+        return days
+
+    def partition_token(self, feeder_id, day):
+        """Cheap fingerprint of a partition that changes whenever a part is added"""
+        files = self.partition_files(feeder_id, day)
+        if not files:
+            return (0, 0)
+        return (len(files), max(os.stat(f).st_mtime_ns for f in files))
+
+    def partition_tokens(self, feeder_id, start, end):
+        """(day, token) pairs for the partitions of a feeder inside [start, end)"""
+        start, end = to_window(start, end)
+        last_day = (end - pd.Timedelta(1, 'ns')).date()
+        return tuple((day, self.partition_token(feeder_id, day)) for day in self.days(feeder_id, start.date(), last_day))
+
+    # ---------- watermarks ----------
+    def _watermark_path(self):
+        return os.path.join(self.root, '_watermarks.json')
+
+    def watermarks(self):
+        """Latest ingested timestamp per feeder"""
+        path = self._watermark_path()
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return {k: pd.Timestamp(v) for k, v in json.load(f).items()}
+
+    def update_watermarks(self, watermarks):
+        """Advance per-feeder watermarks; never moves one backwards"""
+        current = self.watermarks()
+        for feeder_id, ts in watermarks.items():
+            ts = pd.Timestamp(ts)
+            if feeder_id not in current or ts > current[feeder_id]:
+                current[feeder_id] = ts
+        tmp = self._watermark_path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({k: v.isoformat() for k, v in sorted(current.items())}, f, indent=2)
+        os.replace(tmp, self._watermark_path())
+        return current
+
+    # ---------- change log ----------
+    def _changes_path(self):
+        return os.path.join(self.root, '_changes.log')
+
+    def log_changes(self, changed):
+        """Append changed (feeder, day) partitions to the log readers use to invalidate caches"""
+        if not changed:
+            return
+        lines = ''.join(f"{time.time_ns()} {feeder_id} {day.isoformat()}\n" for feeder_id, day in changed)
+        with open(self._changes_path(), 'a') as f:
+            f.write(lines)
+
+    def changes_since(self, offset=0):
+        """Partitions written after byte `offset` of the change log.
+
+        Returns (changes, new_offset); changes is None when the log was
+        truncated since `offset`, meaning every cached result is suspect.
+        """
+        path = self._changes_path()
+        if not os.path.exists(path):
+            return [], 0
+        if os.path.getsize(path) < offset:
+            return None, 0
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # A writer may be mid-line; leave the partial line for the next call
+        complete = data[:data.rfind(b'\n') + 1]
+        changes = []
+        for line in complete.decode().splitlines():
+            _, feeder_id, day = line.split(' ')
+            changes.append((feeder_id, date.fromisoformat(day)))
+        return changes, offset + len(complete)
+
+    # ---------- write ----------
+    def write(self, readings):
+        """Append readings (timestamp, feeder_id, i, i_nom) as new parts; return changed partitions"""
+        if readings is None or len(readings) == 0:
+            return []
+        missing = [c for c in COLUMNS if c not in readings.columns]
+        if missing:
+            raise ValueError(f"Readings are missing columns: {missing}")
+
+        df = readings[COLUMNS].copy()
+        df['timestamp'] = pd.to_datetime(df['timestamp']).astype('datetime64[ns]')
+        df['feeder_id'] = df['feeder_id'].astype(str)
+        df['i'] = df['i'].astype('float64')
+        df['i_nom'] = df['i_nom'].astype('float64')
+        df = df.sort_values(['feeder_id', 'timestamp'], kind='stable')
+
+        changed = []
+        for (feeder_id, day), part in df.groupby([df['feeder_id'], df['timestamp'].dt.date], sort=True):
+            path = self.partition_dir(feeder_id, day)
+            os.makedirs(path, exist_ok=True)
+            name = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+            table = pa.Table.from_pandas(part, schema=SCHEMA, preserve_index=False)
+            tmp = os.path.join(path, f".{name}.tmp")
+            pq.write_table(table, tmp)
+            os.replace(tmp, os.path.join(path, name))
+            changed.append((feeder_id, day))
+        self.log_changes(changed)
+        return changed
+
+    def compact(self, feeder_id, day):
+        """Merge all parts of one partition into a single sorted part"""
+        files = self.partition_files(feeder_id, day)
+        if len(files) <= 1:
+            return
+        df = self._read_files(files, COLUMNS)
+        df = df.drop_duplicates('timestamp', keep='last').sort_values('timestamp')
+        self.write(df)
+        for f in files:
+            os.remove(f)
+
+    # ---------- read ----------
+    def _read_files(self, files, columns):
+        tables = [pq.read_table(f, columns=columns) for f in files]
+        return pa.concat_tables(tables).to_pandas()
+
+    def read_partition(self, feeder_id, day, columns=None):
+        """Read one feeder/day partition, one reading per timestamp.
+
+        A chunk re-ingested after a crash between write() and
+        update_watermarks() lands in a second part; parts are named by write
+        time, so the latest copy of each timestamp wins, as in compact().
+        """
+        columns = columns or COLUMNS
+        files = self.partition_files(feeder_id, day)
+        if not files:
+            return _empty(columns)
+        df = self._read_files(files, columns)
+        if len(files) > 1:
+            df = df.drop_duplicates('timestamp', keep='last')
+        return df.sort_values('timestamp', ignore_index=True)
+
+    def read(self, feeder_id, start, end, columns=None):
+        """Read readings for one feeder in [start, end), touching only the partitions in range"""
+        columns = list(columns or COLUMNS)
+        if 'timestamp' not in columns:
+            columns = ['timestamp'] + columns
+        start, end = to_window(start, end)
+        last_day = (end - pd.Timedelta(1, 'ns')).date()
+        frames = [self.read_partition(feeder_id, day, columns) for day in self.days(feeder_id, start.date(), last_day)]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return _empty(columns)
+        df = pd.concat(frames, ignore_index=True)
+        mask = (df['timestamp'] >= start) & (df['timestamp'] < end)
+        return df.loc[mask].reset_index(drop=True)
+
+    def read_many(self, feeder_ids, start, end, columns=None):
+        """Read several feeders in [start, end) into one long DataFrame"""
+        frames = [self.read(f, start, end, columns) for f in feeder_ids]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return pd.DataFrame(columns=list(columns or COLUMNS))
+        return pd.concat(frames, ignore_index=True)
+
+
+# ==================== DEMO DATA ====================
+def seed_demo_data(store, feeder_ids=('A', 'B', 'C', 'D'), days=14, freq='15min', end=None, i_nom=None):
+    """Fill the store with synthetic readings so the dashboard has something to show.
+
+    i_nom maps feeder ids to their nominal current (200 A when missing);
+    each feeder runs at about 85% of it.
+    """
+    end = pd.Timestamp(end or datetime.now()).floor(freq)
+    index = pd.date_range(end - timedelta(days=days), end, freq=freq)
+    hours = index.hour.values + index.minute.values / 60.0
+    i_nom = i_nom or {}
+    rng = np.random.default_rng(0)
+    frames = []
+    for feeder_id in feeder_ids:
+        nominal = float(i_nom.get(feeder_id, 200.0))
+        daily = np.sin((hours - 13) / 24 * 2 * np.pi) * 15 + np.sin((hours - 19) / 12 * 2 * np.pi) * 8
+        values = nominal - 30 + daily + rng.normal(0, 5, len(index))
+        frames.append(pd.DataFrame({
+            'timestamp': index,
+            'feeder_id': feeder_id,
+            'i': values,
+            'i_nom': nominal,
+        }))
+    return store.write(pd.concat(frames, ignore_index=True))
+
+
+if __name__ == "__main__":
+    from feeder_registry import FeederRegistry
+    from rollups import RollupStore
+
+    store = FeederStore()
+    registry = FeederRegistry.load(fallback_ids=('A', 'B', 'C', 'D'))
+    changed = seed_demo_data(store, registry.ids, i_nom=registry.frame['i_nom'].to_dict())
+    RollupStore(store).update(changed)
+    print(f"Seeded {len(changed)} partitions into {DEFAULT_STORE_DIR}")
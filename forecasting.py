@@ -0,0 +1,386 @@
+import argparse
+import copy
+import time
+import warnings
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from scipy import stats
+
+from feeder_store import FeederStore
+from features import FEATURE_NAMES, FEATURE_STORE
+from model_registry import DEFAULT_MODEL_DIR, ModelRegistry
+
+# ==================== CONFIG ====================
+FORECAST_FREQ = '1h'
+SEASON_LENGTH = 24
+HISTORY_DAYS = 28
+HORIZON = 24
+# Appending via update() is allowed until the model holds this many windows of history
+MAX_UPDATE_WINDOWS = 2
+
+METHODS = ('auto_arima', 'sarima', 'holt_winters', 'seasonal_naive')
+DEFAULT_METHOD = 'auto_arima'
+# Methods fitted with calendar and weather regressors (SARIMAX exog), see features.py
+EXOG_METHODS = ('auto_arima', 'sarima')
+
+
+# ==================== SERIES PREPARATION ====================
+def prepare_series(readings, freq=FORECAST_FREQ, max_gap=3):
+    """Resample raw readings onto a regular grid and bridge short gaps"""
+    if readings.empty:
+        return pd.Series(dtype='float64')
+    series = readings.set_index('timestamp')['i'].sort_index().resample(freq).mean()
+    series = series.interpolate(limit=max_gap, limit_area='inside')
+    # Drop the leading/trailing holes the interpolation could not fill
+    return series.loc[series.first_valid_index():series.last_valid_index()].ffill()
+
+
+def load_history(store, feeder_id, end=None, history_days=HISTORY_DAYS, freq=FORECAST_FREQ):
+    """Load the training series for one feeder from the store"""
+    end = pd.Timestamp(end or datetime.now())
+    readings = store.read(feeder_id, end - timedelta(days=history_days), end)
+    series = prepare_series(readings, freq)
+    i_nom = float(readings['i_nom'].iloc[-1]) if len(readings) else np.nan
+    return series, i_nom
+
+
+def load_node_history(store, feeder_ids, end=None, history_days=HISTORY_DAYS, freq=FORECAST_FREQ):
+    """Training series of an aggregate node: the sum of its feeders over the span they all cover"""
+    histories = [load_history(store, f, end, history_days, freq) for f in feeder_ids]
+    series = [s for s, _ in histories if len(s)]
+    if not series:
+        return pd.Series(dtype='float64'), np.nan
+    wide = pd.concat(series, axis=1)
+    wide = wide.loc[max(s.index[0] for s in series):min(s.index[-1] for s in series)].ffill()
+    return wide.sum(axis=1, min_count=len(series)).dropna(), float(np.nansum([i for _, i in histories]))
+
+
+# ==================== FORECASTER ====================
+class Forecaster:
+    """Per-feeder load forecaster with auto-ARIMA, SARIMA, Holt-Winters and seasonal-naive backends"""
+
+    def __init__(self, method=DEFAULT_METHOD, season_length=SEASON_LENGTH, freq=FORECAST_FREQ, features=FEATURE_NAMES):
+        if method not in METHODS:
+            raise ValueError(f"Unknown forecasting method {method!r}, expected one of {METHODS}")
+        self.method = method
+        self.season_length = season_length
+        self.freq = freq
+        # Candidate regressors; fit() keeps those that vary over the training window
+        self.features = tuple(features) if method in EXOG_METHODS else ()
+        self.regressors = ()
+        self.model = None
+        self.history = None
+        self.residuals = None
+        self.metrics = {}
+        self.i_nom = np.nan
+        self.fitted_at = None
+        self.fit_seconds = None
+        self.version = None
+
+    # ---------- fitting ----------
+    def fit(self, series, **fit_kwargs):
+        """Fit on a regular series indexed by timestamp"""
+        series = series.astype('float64')
+        if len(series) < 2 * self.season_length:
+            raise ValueError(f"Need at least {2 * self.season_length} points to fit, got {len(series)}")
+        started = time.perf_counter()
+        self.regressors = self.select_regressors(series.index)
+        if self.regressors:
+            fit_kwargs['X'] = self._exog(series.index)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            fitted = getattr(self, f"_fit_{self.method}")(series.values, **fit_kwargs)
+        self._set_history(series, fitted)
+        self.fit_seconds = round(time.perf_counter() - started, 3)
+        return self
+
+    def select_regressors(self, index):
+        """Candidate features that vary over index; a constant one would only fight the intercept"""
+        if not self.features:
+            return ()
+        X = FEATURE_STORE.matrix(index, self.freq, self.features)
+        return tuple(name for name, varies in zip(self.features, np.ptp(X, axis=0) > 0) if varies)
+
+    def _exog(self, index):
+        return FEATURE_STORE.matrix(index, self.freq, self.regressors) if self.regressors else None
+
+    def _set_history(self, series, fitted):
+        y = series.values
+        self.history = series
+        self.residuals = y - fitted
+        self.metrics = _in_sample_metrics(y, fitted, self.season_length)
+        self.fitted_at = datetime.now()
+
+    def refit(self, series, features=None):
+        """Fit newer data reusing what this model already learned.
+
+        Returns (forecaster, fit_mode). 'update' appends the new observations
+        to the existing auto-ARIMA model. 'warm_start' refits the previous
+        order from the previous parameters without the stepwise search.
+        'full' is used by methods with nothing worth reusing. The original
+        forecaster is left untouched.
+
+        features are the new model's candidate regressors (default: this
+        model's). When the regressors it ends up with differ from this
+        model's, the old parameters no longer line up and only the order
+        is reused.
+        """
+        features = self.features if features is None else tuple(features)
+        new = series[series.index > self.last_timestamp].astype('float64')
+        contiguous = len(new) > 0 and new.index[0] == self.last_timestamp + to_offset(self.freq)
+        window = len(series)
+        if (self.method == 'auto_arima' and contiguous and features == self.features
+                and len(self.history) + len(new) <= MAX_UPDATE_WINDOWS * window):
+            clone = copy.deepcopy(self)
+            clone._update(new)
+            return clone, 'update'
+        if self.method in ('auto_arima', 'sarima'):
+            forecaster = Forecaster(self.method, self.season_length, self.freq, features)
+            kwargs = self._warm_start_kwargs()
+            if forecaster.select_regressors(series.index) != self.regressors:
+                kwargs['start_params'] = None
+            forecaster.fit(series, **kwargs)
+            return forecaster, 'warm_start'
+        return Forecaster(self.method, self.season_length, self.freq, features).fit(series), 'full'
+
+    def _warm_start_kwargs(self):
+        kwargs = {'order': self.order, 'seasonal_order': self.seasonal_order, 'start_params': self.params}
+        if self.method == 'auto_arima':
+            kwargs['with_intercept'] = self.model.with_intercept
+        return kwargs
+
+    def _update(self, new):
+        started = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.model.update(new.values, X=self._exog(new.index))
+            self.model.arima_res_ = _compact_results(self.model.arima_res_)
+            fitted = self.model.predict_in_sample(X=self._exog(self.history.index.append(new.index)))
+        self._set_history(pd.concat([self.history, new]), fitted)
+        self.fit_seconds = round(time.perf_counter() - started, 3)
+
+    def _fit_seasonal_naive(self, y):
+        m = self.season_length
+        self.model = {'last_season': y[-m:].copy()}
+        fitted = np.full_like(y, np.nan)
+        fitted[m:] = y[:-m]
+        return fitted
+
+    def _fit_holt_winters(self, y):
+        from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+        self.model = ETSModel(
+            pd.Series(y), error='add', trend='add', damped_trend=True,
+            seasonal='add', seasonal_periods=self.season_length
+        ).fit(disp=False)
+        return np.asarray(self.model.fittedvalues)
+
+    def _fit_sarima(self, y, X=None, order=(1, 0, 1), seasonal_order=(1, 1, 1, None), start_params=None):
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        results = SARIMAX(
+            y, exog=X, order=order, seasonal_order=(*seasonal_order[:3], self.season_length)
+        ).fit(start_params=start_params, disp=False, low_memory=True)
+        self.model = _compact_results(results)
+        return self.model.fittedvalues
+
+    def _fit_auto_arima(self, y, X=None, order=None, seasonal_order=None, start_params=None, with_intercept=True):
+        import pmdarima as pm
+
+        if order is None:
+            self.model = pm.auto_arima(
+                y, X=X, seasonal=True, m=self.season_length, stepwise=True,
+                max_p=3, max_q=3, max_P=1, max_Q=1,
+                suppress_warnings=True, error_action='ignore'
+            )
+        else:
+            # Warm start: keep the searched order, seed the optimiser with the old parameters
+            self.model = pm.ARIMA(
+                order=tuple(order), seasonal_order=tuple(seasonal_order), with_intercept=with_intercept,
+                start_params=start_params, suppress_warnings=True
+            ).fit(y, X=X)
+        self.model.arima_res_ = _compact_results(self.model.arima_res_)
+        return self.model.predict_in_sample(X=X)
+
+    # ---------- model description ----------
+    @property
+    def order(self):
+        if self.method == 'auto_arima':
+            return list(self.model.order)
+        if self.method == 'sarima':
+            return list(self.model.model.order)
+        return None
+
+    @property
+    def seasonal_order(self):
+        if self.method == 'auto_arima':
+            return list(self.model.seasonal_order)
+        if self.method == 'sarima':
+            return list(self.model.model.seasonal_order)
+        return None
+
+    @property
+    def params(self):
+        if self.method == 'auto_arima':
+            return np.asarray(self.model.params())
+        if self.method == 'sarima':
+            return np.asarray(self.model.params)
+        return None
+
+    # ---------- prediction ----------
+    @property
+    def last_timestamp(self):
+        return self.history.index[-1]
+
+    def predict(self, horizon=HORIZON, alpha=0.05):
+        """Forecast `horizon` steps past the training data with a (1 - alpha) interval"""
+        if self.model is None:
+            raise RuntimeError("Forecaster is not fitted")
+        index = pd.date_range(self.last_timestamp, periods=horizon + 1, freq=self.freq)[1:]
+        exog = {'X': self._exog(index)} if self.regressors else {}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            mean, lower, upper = getattr(self, f"_predict_{self.method}")(horizon, alpha, **exog)
+        return pd.DataFrame({
+            'time': index,
+            'value': np.asarray(mean, dtype='float64'),
+            'lower': np.asarray(lower, dtype='float64'),
+            'upper': np.asarray(upper, dtype='float64')
+        })
+
+    def _predict_seasonal_naive(self, horizon, alpha):
+        m = self.season_length
+        steps = np.arange(horizon)
+        mean = self.model['last_season'][steps % m]
+        sigma = np.nanstd(self.residuals)
+        width = stats.norm.ppf(1 - alpha / 2) * sigma * np.sqrt(steps // m + 1)
+        return mean, mean - width, mean + width
+
+    def _predict_holt_winters(self, horizon, alpha):
+        frame = self.model.get_prediction(
+            start=self.model.nobs, end=self.model.nobs + horizon - 1
+        ).summary_frame(alpha=alpha)
+        return frame['mean'], frame['pi_lower'], frame['pi_upper']
+
+    def _predict_sarima(self, horizon, alpha, X=None):
+        prediction = self.model.get_forecast(horizon, exog=X)
+        interval = prediction.conf_int(alpha=alpha)
+        return prediction.predicted_mean, interval[:, 0], interval[:, 1]
+
+    def _predict_auto_arima(self, horizon, alpha, X=None):
+        mean, interval = self.model.predict(n_periods=horizon, X=X, return_conf_int=True, alpha=alpha)
+        return mean, interval[:, 0], interval[:, 1]
+
+
+def _compact_results(results):
+    """Re-run the Kalman filter keeping only what forecasting needs.
+
+    Full state-space results hold smoother and gain matrices for every
+    observation, which makes a seasonal model pickle to hundreds of MB.
+    """
+    from statsmodels.tsa.statespace import kalman_filter
+
+    conserve = (
+        kalman_filter.MEMORY_NO_SMOOTHING | kalman_filter.MEMORY_NO_GAIN
+        | kalman_filter.MEMORY_NO_FILTERED | kalman_filter.MEMORY_NO_PREDICTED
+    )
+    # A fresh clone drops the filter buffers cached on the fitted model
+    model = results.model.clone(results.model.data.orig_endog, exog=results.model.data.orig_exog)
+    return model.filter(results.params, conserve_memory=conserve)
+
+
+def _in_sample_metrics(y, fitted, season_length):
+    mask = np.isfinite(fitted)
+    # Skip the start-up period where state-space models have not converged yet
+    mask[:season_length] = False
+    if not mask.any():
+        return {}
+    error = y[mask] - fitted[mask]
+    nonzero = y[mask] != 0
+    return {
+        'mape': float(np.mean(np.abs(error[nonzero] / y[mask][nonzero])) * 100),
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'n_obs': int(len(y))
+    }
+
+
+# ==================== SYSTEM FORECAST ====================
+def combine_forecasts(predictions, accuracies=()):
+    """Sum per-feeder forecasts into a system forecast with a combined interval.
+
+    predictions are Forecaster.predict frames (None entries are skipped).
+    Returns (forecast, mean accuracy) or (None, None) without forecasts.
+    """
+    forecasts = [p.set_index('time') for p in predictions if p is not None]
+    accuracies = [a for a in accuracies if a is not None]
+    if not forecasts:
+        return None, None
+    value = sum(f['value'] for f in forecasts)
+    # Treat feeder errors as independent: half-widths add in quadrature
+    half_width = np.sqrt(sum(((f['upper'] - f['lower']) / 2) ** 2 for f in forecasts))
+    data = pd.DataFrame({
+        'time': value.index,
+        'value': value.values,
+        'lower': (value - half_width).values,
+        'upper': (value + half_width).values
+    }).dropna()
+    return data, (float(np.mean(accuracies)) if accuracies else None)
+
+
+def forecast_accuracy(forecaster):
+    """In-sample accuracy (100 - MAPE) of a fitted forecaster, or None"""
+    if forecaster is None or 'mape' not in forecaster.metrics:
+        return None
+    return 100 - forecaster.metrics['mape']
+
+
+# ==================== TRAINING ====================
+def fit_feeder(store, feeder_id, method=DEFAULT_METHOD, end=None, history_days=HISTORY_DAYS,
+               model_dir=DEFAULT_MODEL_DIR, warm_start=True, members=None, exog=True):
+    """Fit one feeder on its stored history and register the result as a new version.
+
+    With warm_start the latest registered model of the same method is refit
+    instead of searching the order again. With members, feeder_id is an
+    aggregate node (see hierarchy.py) fitted on the sum of those feeders.
+    With exog, ARIMA models get the calendar and weather regressors.
+    """
+    features = FEATURE_NAMES if exog else ()
+    registry = ModelRegistry(model_dir)
+    if members:
+        series, i_nom = load_node_history(store, members, end, history_days)
+    else:
+        series, i_nom = load_history(store, feeder_id, end, history_days)
+    previous = registry.latest_entry(feeder_id, method) if warm_start else None
+    if previous is not None:
+        forecaster, fit_mode = registry.load(feeder_id, previous['version']).refit(series, features)
+    else:
+        forecaster, fit_mode = Forecaster(method, features=features).fit(series), 'full'
+    forecaster.i_nom = i_nom
+    entry = registry.register(feeder_id, forecaster, fit_mode, parent=previous['version'] if previous else None)
+    forecaster.version = entry['version']
+    return forecaster
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Fit and persist per-feeder load forecasters")
+    parser.add_argument('feeders', nargs='*', help="Feeder ids (default: every feeder in the store)")
+    parser.add_argument('--method', choices=METHODS, default=DEFAULT_METHOD)
+    parser.add_argument('--history-days', type=int, default=HISTORY_DAYS)
+    parser.add_argument('--full', action='store_true', help="Ignore registered models and search from scratch")
+    parser.add_argument('--no-exog', action='store_true', help="Fit without calendar and weather regressors")
+    args = parser.parse_args()
+
+    store = FeederStore()
+    for feeder_id in args.feeders or store.feeders():
+        forecaster = fit_feeder(store, feeder_id, args.method, history_days=args.history_days, warm_start=not args.full,
+                                exog=not args.no_exog)
+        print(f"[forecast] {feeder_id}: {args.method} v{forecaster.version} "
+              f"MAPE {forecaster.metrics.get('mape', float('nan')):.2f}% in {forecaster.fit_seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+
+# ==================== CONFIG ====================
+SYSTEM_NAME = 'Madura System'
+# Model registry ids of the aggregate nodes; feeders keep their own ids
+SYSTEM_NODE = '_system'
+SUBSTATION_PREFIX = '_gi_'
+UNASSIGNED = 'Unassigned'
+
+METHODS = ('mint', 'bottom_up', 'top_down')
+DEFAULT_METHOD = 'mint'
+METHOD_LABELS = {'mint': 'MinT (minimum trace)', 'bottom_up': 'Bottom-up', 'top_down': 'Top-down'}
+# Reconciled intervals are (1 - ALPHA), like Forecaster.predict
+ALPHA = 0.05
+
+
+def substation_node(name):
+    return SUBSTATION_PREFIX + (re.sub(r'[^0-9A-Za-z]+', '_', name).strip('_') or UNASSIGNED)
+
+
+def is_aggregate(node):
+    return node == SYSTEM_NODE or node.startswith(SUBSTATION_PREFIX)
+
+
+# ==================== HIERARCHY ====================
+class Hierarchy:
+    """Feeders grouped into substations (GI) and the system, as a sparse summing matrix.
+
+    Nodes are ordered aggregates first (the system, then each substation)
+    and feeders last, so S = [A; I] with A the 0/1 (aggregates x feeders)
+    membership matrix and S @ feeder_values gives every node at once.
+    """
+
+    def __init__(self, substations):
+        """substations maps each feeder id to its substation name ('' when unknown)"""
+        self.feeders = list(substations)
+        names = sorted({name or UNASSIGNED for name in substations.values()})
+        self.aggregates = [SYSTEM_NODE] + [substation_node(name) for name in names]
+        self.nodes = self.aggregates + self.feeders
+        self.labels = {SYSTEM_NODE: SYSTEM_NAME, **{substation_node(name): name for name in names}}
+        self.levels = {node: 'substation' for node in self.aggregates[1:]}
+        self.levels.update({SYSTEM_NODE: 'system', **{f: 'feeder' for f in self.feeders}})
+
+        n = len(self.feeders)
+        row = {name: 1 + i for i, name in enumerate(names)}
+        columns = np.arange(n)
+        substation_rows = np.array([row[substations[f] or UNASSIGNED] for f in self.feeders], dtype='int64')
+        self.A = sparse.csr_matrix(
+            (np.ones(2 * n), (np.concatenate([np.zeros(n, dtype='int64'), substation_rows]), np.tile(columns, 2))),
+            shape=(len(self.aggregates), n)
+        )
+        self.S = sparse.vstack([self.A, sparse.identity(n, format='csr')], format='csr')
+
+    @classmethod
+    def from_registry(cls, registry, feeder_ids):
+        return cls({f: registry.frame.at[f, 'substation'] if f in registry else '' for f in feeder_ids})
+
+    def members(self):
+        """Feeders summed into each aggregate node"""
+        return {
+            node: [self.feeders[j] for j in self.A[i].indices]
+            for i, node in enumerate(self.aggregates)
+        }
+
+    def label(self, node):
+        return self.labels.get(node, node)
+
+
+# ==================== RECONCILIATION ====================
+def _mapping(hierarchy, method, observed, variances, proportions):
+    """(feeders x nodes) G turning stacked base forecasts into coherent feeder forecasts"""
+    n_agg, n_feeders = len(hierarchy.aggregates), len(hierarchy.feeders)
+    feeders = sparse.hstack([sparse.csr_matrix((n_feeders, n_agg)), sparse.identity(n_feeders)], format='csr')
+    if method == 'bottom_up':
+        return feeders
+    if method == 'top_down':
+        if not observed[0]:
+            raise ValueError("Top-down reconciliation needs a system forecast")
+        share = np.array([proportions[f] for f in hierarchy.feeders], dtype='float64')
+        share = share / share.sum()
+        return sparse.csr_matrix((share, (np.arange(n_feeders), np.zeros(n_feeders, dtype='int64'))),
+                                 shape=(n_feeders, n_agg + n_feeders))
+    if method != 'mint':
+        raise ValueError(f"Unknown reconciliation method {method!r}, expected one of {METHODS}")
+
+    # MinT with a diagonal W, in projection form: y~ = y^ - W C' (C W C')^-1 C y^ over the
+    # observed nodes, C = [I | -A_o]. Only an (aggregates x aggregates) system is solved.
+    agg = np.flatnonzero(observed[:n_agg])
+    if not len(agg):
+        return feeders
+    columns = np.concatenate([agg, n_agg + np.arange(n_feeders)])
+    C = sparse.hstack([sparse.identity(len(agg)), -hierarchy.A[agg]], format='csr')
+    W = sparse.diags(np.array([variances[hierarchy.nodes[c]] for c in columns], dtype='float64'))
+    WCt = W @ C.T
+    gain = WCt[len(agg):] @ np.linalg.solve((C @ WCt).toarray(), C.toarray())
+    bottom = np.zeros((n_feeders, len(columns)))
+    bottom[:, len(agg):] = np.eye(n_feeders)
+    G = np.zeros((n_feeders, n_agg + n_feeders))
+    G[:, columns] = bottom - gain
+    return sparse.csr_matrix(G)
+
+
+def reconcile(hierarchy, base, method=DEFAULT_METHOD, variances=None, proportions=None, alpha=ALPHA):
+    """Coherent forecasts for every node, so each aggregate equals the sum of its feeders.
+
+    base maps node ids to Forecaster.predict frames: every feeder needs one,
+    aggregates are optional.
+
+    - bottom_up: feeder forecasts summed upwards
+    - top_down: the system forecast split by each feeder's historical share
+      (proportions, e.g. mean load)
+    - mint: every available base forecast combined, weighted by the inverse
+      of its error variance (variances, e.g. in-sample residual variance;
+      defaults to the first step of the prediction interval)
+
+    Intervals propagate the base forecast variances through the same linear
+    map, treating base errors as independent. Returns a frame indexed by
+    (node, time) with value, lower and upper columns.
+    """
+    missing = [f for f in hierarchy.feeders if base.get(f) is None]
+    if missing:
+        raise ValueError(f"Feeders without a base forecast: {missing}")
+    nodes = hierarchy.nodes
+    n_steps = min(len(base[f]) for f in hierarchy.feeders)
+    z = stats.norm.ppf(1 - alpha / 2)
+    observed = np.array([base.get(node) is not None and len(base[node]) >= n_steps for node in nodes])
+    values = np.zeros((len(nodes), n_steps))
+    variance = np.zeros((len(nodes), n_steps))
+    for i in np.flatnonzero(observed):
+        frame = base[nodes[i]]
+        values[i] = frame['value'].to_numpy(dtype='float64')[:n_steps]
+        sigma = (frame['upper'] - frame['lower']).to_numpy(dtype='float64')[:n_steps] / (2 * z)
+        variance[i] = np.nan_to_num(sigma, nan=0.0) ** 2
+    if variances is None:
+        variances = {nodes[i]: variance[i, 0] for i in np.flatnonzero(observed)}
+    # A zero variance would pin MinT to that node exactly; keep every weight finite
+    floor = max(1e-9, 1e-6 * max([v for v in variances.values() if np.isfinite(v)], default=1.0))
+    variances = {node: v if np.isfinite(v) and v > floor else floor for node, v in variances.items()}
+
+    R = hierarchy.S @ _mapping(hierarchy, method, observed, variances, proportions)
+    R = R.toarray() if sparse.issparse(R) else np.asarray(R)
+    reconciled = R @ values
+    half_width = z * np.sqrt((R ** 2) @ variance)
+    index = pd.MultiIndex.from_product([nodes, base[hierarchy.feeders[0]]['time'].to_numpy()[:n_steps]],
+                                       names=['node', 'time'])
+    return pd.DataFrame({
+        'value': reconciled.ravel(),
+        'lower': (reconciled - half_width).ravel(),
+        'upper': (reconciled + half_width).ravel(),
+    }, index=index)
+
+
+def reconcile_models(hierarchy, forecasters, predictions, method=DEFAULT_METHOD):
+    """reconcile() fed from fitted Forecasters: residual variances as MinT weights, mean history as top-down shares"""
+    return reconcile(
+        hierarchy, predictions, method,
+        variances={node: float(np.nanvar(f.residuals)) for node, f in forecasters.items() if f is not None},
+        proportions={f: float(forecasters[f].history.mean()) for f in hierarchy.feeders},
+    )
+
+
+def node_forecast(reconciled, node):
+    """One node of a reconcile() result as a (time, value, lower, upper) frame"""
+    return reconciled.loc[node].reset_index()
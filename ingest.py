@@ -0,0 +1,218 @@
+import argparse
+import csv
+import logging
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from detector import EventLog, StreamDetector, state_path
+from feeder_store import BASE_DIR, COLUMNS, FeederStore
+from rollups import RollupStore
+
+# ==================== CONFIG ====================
+DEFAULT_DROP_DIR = os.environ.get('FEEDER_DROP_DIR', os.path.join(BASE_DIR, 'data', 'inbox'))
+CHUNK_ROWS = 50_000
+SETTLE_SECONDS = 5
+# Seconds between drop directory scans
+POLL_INTERVAL = 30
+
+EXPORT_EXTENSIONS = ('.csv', '.xlsx', '.xlsm')
+
+logger = logging.getLogger('feeder_dashboard.ingest')
+
+# Header names seen in SCADA/AMR exports, mapped onto store columns
+COLUMN_ALIASES = {
+    'timestamp': ['timestamp', 'time', 'datetime', 'date_time', 'waktu', 'tanggal_jam', 'tanggal'],
+    'feeder_id': ['feeder_id', 'feeder', 'penyulang', 'nama_penyulang', 'id_penyulang'],
+    'i': ['i', 'current', 'arus', 'i_load', 'beban', 'ampere', 'load_current'],
+    'i_nom': ['i_nom', 'inom', 'i_nominal', 'nominal', 'arus_nominal', 'rated_current'],
+}
+
+
+# ==================== PARSING ====================
+def _normalise_header(name):
+    return str(name).strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def resolve_columns(header):
+    """Map an export header onto store columns"""
+    normalised = {_normalise_header(h): h for h in header}
+    mapping = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalised:
+                mapping[normalised[alias]] = column
+                break
+    missing = [c for c in COLUMNS if c not in mapping.values()]
+    if missing:
+        raise ValueError(f"Export is missing columns {missing} (header: {list(header)})")
+    return mapping
+
+
+def _read_excel_chunks(path, chunksize):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def _sniff_delimiter(path):
+    with open(path, newline='', encoding='utf-8-sig', errors='replace') as f:
+        sample = f.read(8192)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+    except csv.Error:
+        return ','
+
+
+def read_export_chunks(path, chunksize=CHUNK_ROWS):
+    """Stream an export file as DataFrame chunks without loading it whole"""
+    if path.lower().endswith('.csv'):
+        yield from pd.read_csv(path, chunksize=chunksize, sep=_sniff_delimiter(path), encoding='utf-8-sig')
+    else:
+        yield from _read_excel_chunks(path, chunksize)
+
+
+def normalise_chunk(chunk):
+    """Rename, type and clean one raw export chunk into store readings"""
+    df = chunk.rename(columns=resolve_columns(chunk.columns))[COLUMNS]
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df['feeder_id'] = df['feeder_id'].astype(str).str.strip()
+    df['i'] = pd.to_numeric(df['i'], errors='coerce')
+    df['i_nom'] = pd.to_numeric(df['i_nom'], errors='coerce')
+    return df.dropna(subset=['timestamp', 'i', 'i_nom'])
+
+
+# ==================== INGEST ====================
+def ingest_file(store, path, chunksize=CHUNK_ROWS, detector=None, events=None):
+    """Append the rows of one export that are newer than each feeder's watermark.
+
+    Every chunk is filtered against the watermarks in place when the file
+    started, and they are advanced once after the last chunk, so rows of an
+    export not sorted by time are not dropped. New rows also go through the
+    detector, if given, with its alerts appended to `events`. Returns the
+    set of (feeder_id, day) partitions that received new rows.
+    """
+    watermarks = store.watermarks()
+    changed, latest, late = set(), {}, 0
+    for chunk in read_export_chunks(path, chunksize):
+        df = normalise_chunk(chunk)
+        if df.empty:
+            continue
+        floor = df['feeder_id'].map(watermarks).astype('datetime64[ns]')
+        df = df[floor.isna() | (df['timestamp'] > floor)]
+        df = df.drop_duplicates(['feeder_id', 'timestamp'], keep='last')
+        if df.empty:
+            continue
+        changed.update(store.write(df))
+        if detector is not None:
+            events.extend(detector.update(df))
+            late += detector.late
+        for feeder_id, ts in df.groupby('feeder_id')['timestamp'].max().items():
+            latest[feeder_id] = max(ts, latest.get(feeder_id, ts))
+    if latest:
+        store.update_watermarks(latest)
+    if late:
+        # Stored all the same; the detector only moves forward in time
+        logger.warning("%s: %d readings at or before their feeder's last detector reading were stored unchecked",
+                       os.path.basename(path), late)
+    return changed
+
+
+def pending_exports(drop_dir, settle_seconds=SETTLE_SECONDS):
+    """Export files in the drop directory that are no longer being written"""
+    if not os.path.isdir(drop_dir):
+        return []
+    now = time.time()
+    files = []
+    for name in sorted(os.listdir(drop_dir)):
+        path = os.path.join(drop_dir, name)
+        if not os.path.isfile(path) or not name.lower().endswith(EXPORT_EXTENSIONS):
+            continue
+        if now - os.path.getmtime(path) < settle_seconds:
+            continue
+        files.append(path)
+    return files
+
+
+def _archive(path, drop_dir, folder):
+    target = os.path.join(drop_dir, folder)
+    os.makedirs(target, exist_ok=True)
+    shutil.move(path, os.path.join(target, os.path.basename(path)))
+
+
+def ingest_pending(store, drop_dir=DEFAULT_DROP_DIR, settle_seconds=SETTLE_SECONDS):
+    """Ingest every settled export once, moving it to processed/ or failed/"""
+    changed = set()
+    rollups = RollupStore(store)
+    detector, log = StreamDetector.load(state_path(store)), EventLog(store)
+    pending = pending_exports(drop_dir, settle_seconds)
+    for path in pending:
+        events = []
+        try:
+            file_changed = ingest_file(store, path, detector=detector, events=events)
+            rollups.update(file_changed)
+            changed.update(file_changed)
+        except Exception:
+            logger.exception("%s failed", os.path.basename(path))
+            _archive(path, drop_dir, 'failed')
+            continue
+        finally:
+            # Rows written before a failure stay in the store, so their alerts stand too
+            log.append(events)
+        _archive(path, drop_dir, 'processed')
+    # Feeders whose readings stopped arriving altogether, judged against the newest reading ingested
+    # rather than the wall clock, which would flag every feeder of a backfilled export
+    watermarks = store.watermarks()
+    silent = detector.check_silence(max(watermarks.values())) if watermarks else []
+    log.append(silent)
+    if pending or silent:
+        detector.save(state_path(store))
+    return changed
+
+
+def watch(store, drop_dir=DEFAULT_DROP_DIR, interval=POLL_INTERVAL, settle_seconds=SETTLE_SECONDS):
+    """Poll the drop directory forever"""
+    os.makedirs(drop_dir, exist_ok=True)
+    while True:
+        changed = ingest_pending(store, drop_dir, settle_seconds)
+        if changed:
+            logger.info("updated %d partitions: %s", len(changed), sorted(changed)[:5])
+        time.sleep(interval)
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Ingest SCADA/AMR exports into the feeder store")
+    parser.add_argument('--drop-dir', default=DEFAULT_DROP_DIR, help="Directory watched for new exports")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Polling interval in seconds")
+    parser.add_argument('--once', action='store_true', help="Ingest pending files and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    store = FeederStore()
+    if args.once:
+        changed = ingest_pending(store, args.drop_dir, settle_seconds=0)
+        logger.info("updated %d partitions", len(changed))
+    else:
+        watch(store, args.drop_dir, args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from feeder_store import BASE_DIR
+
+# ==================== CONFIG ====================
+# Prometheus text file for a node_exporter textfile collector; empty disables it
+METRICS_PATH = os.environ.get('FEEDER_METRICS_PATH', os.path.join(BASE_DIR, 'data', 'metrics.prom'))
+METRICS_INTERVAL = 15
+# Runs kept per stage for the percentiles
+WINDOW = 500
+METRIC_PREFIX = 'feeder_dashboard'
+
+logger = logging.getLogger('feeder_dashboard.perf')
+_local = threading.local()
+
+
+def rss_bytes():
+    """Resident memory of this process; one read of /proc, cheap enough for every stage"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # ru_maxrss is the peak, not the current size, but it is all macOS offers
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# ==================== RUN TIMING ====================
+class Run:
+    """Stage totals of one script run. Nested or repeated stages of the same name count once."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = defaultdict(lambda: {'seconds': 0.0, 'calls': 0, 'rss_delta': 0})
+        self.active = set()
+
+    def add(self, name, seconds, rss_delta):
+        totals = self.stages[name]
+        totals['seconds'] += seconds
+        totals['calls'] += 1
+        totals['rss_delta'] += rss_delta
+
+
+@contextmanager
+def stage(name):
+    """Attribute the wrapped block to a stage of the current run; usable as a decorator.
+
+    Outside record_run() (a fragment rerun, a benchmark) it only runs the block.
+    """
+    run = getattr(_local, 'run', None)
+    if run is None or name in run.active:
+        yield
+        return
+    run.active.add(name)
+    started, rss = time.perf_counter(), rss_bytes()
+    try:
+        yield
+    finally:
+        run.active.discard(name)
+        run.add(name, time.perf_counter() - started, rss_bytes() - rss)
+
+
+@contextmanager
+def record_run(*collectors, session=None):
+    """Time one script run and hand its stage totals to every collector.
+
+    Also logs the run as one JSON line on the 'feeder_dashboard.perf' logger.
+    """
+    previous = getattr(_local, 'run', None)
+    run = _local.run = Run()
+    rss = rss_bytes()
+    try:
+        yield run
+    finally:
+        _local.run = previous
+        run.add('total', time.perf_counter() - run.started, rss_bytes() - rss)
+        for collector in collectors:
+            collector.add(run)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'event': 'rerun',
+                'session': session,
+                'stages': {n: round(t['seconds'] * 1000, 2) for n, t in run.stages.items()},
+                'rss_mb': round(rss_bytes() / 2**20, 1),
+            }))
+
+
+# ==================== AGGREGATION ====================
+class StageStats:
+    """Rolling per-stage timings over the last `window` runs, plus lifetime sums for Prometheus"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._seconds = defaultdict(lambda: deque(maxlen=window))
+        self._rss_delta = defaultdict(lambda: deque(maxlen=window))
+        self._calls = defaultdict(lambda: deque(maxlen=window))
+        self._sum = defaultdict(float)
+        self._count = defaultdict(int)
+        self._written_at = 0.0
+
+    def add(self, run):
+        with self._lock:
+            for name, totals in run.stages.items():
+                self._seconds[name].append(totals['seconds'])
+                self._rss_delta[name].append(totals['rss_delta'])
+                self._calls[name].append(totals['calls'])
+                self._sum[name] += totals['seconds']
+                self._count[name] += 1
+
+    def summary(self):
+        """One row per stage: runs, calls per run and last/p50/p95/max milliseconds"""
+        with self._lock:
+            rows = []
+            for name, seconds in self._seconds.items():
+                ms = np.array(seconds) * 1000
+                rows.append({
+                    'stage': name,
+                    'runs': self._count[name],
+                    'calls': float(np.mean(self._calls[name])),
+                    'last_ms': ms[-1],
+                    'p50_ms': np.percentile(ms, 50),
+                    'p95_ms': np.percentile(ms, 95),
+                    'max_ms': ms.max(),
+                    'rss_delta_mb': float(np.mean(self._rss_delta[name])) / 2**20,
+                })
+        frame = pd.DataFrame(rows, columns=['stage', 'runs', 'calls', 'last_ms', 'p50_ms', 'p95_ms', 'max_ms',
+                                            'rss_delta_mb'])
+        # Slowest stages first, the run total last
+        return pd.concat([
+            frame[frame['stage'] != 'total'].sort_values('p95_ms', ascending=False),
+            frame[frame['stage'] == 'total']
+        ], ignore_index=True)
+
+    # ---------- export ----------
+    def prometheus(self, prefix=METRIC_PREFIX):
+        """Prometheus text exposition: a summary per stage and the process memory"""
+        metric = f"{prefix}_stage_seconds"
+        lines = [
+            f"# HELP {metric} Wall time spent in each stage of a dashboard rerun",
+            f"# TYPE {metric} summary",
+        ]
+        with self._lock:
+            for name in sorted(self._seconds):
+                seconds = np.array(self._seconds[name])
+                for quantile in (0.5, 0.95):
+                    lines.append(f'{metric}{{stage="{name}",quantile="{quantile}"}} {np.quantile(seconds, quantile):.6f}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {self._sum[name]:.6f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {self._count[name]}')
+        lines += [
+            f"# HELP {prefix}_resident_memory_bytes Resident memory of the dashboard process",
+            f"# TYPE {prefix}_resident_memory_bytes gauge",
+            f"{prefix}_resident_memory_bytes {rss_bytes()}",
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=METRICS_PATH, min_interval=METRICS_INTERVAL):
+        """Rewrite the metrics file atomically, at most every min_interval seconds"""
+        now = time.time()
+        if not path or now - self._written_at < min_interval:
+            return False
+        self._written_at = now
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+        return True
+
+
+# One instance per server process, fed by every session
+PROCESS_STATS = StageStats()
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import joblib
+
+from feeder_store import BASE_DIR
+
+# ==================== CONFIG ====================
+DEFAULT_MODEL_DIR = os.environ.get('FEEDER_MODEL_DIR', os.path.join(BASE_DIR, 'data', 'models'))
+MANIFEST_NAME = 'manifest.json'
+KEEP_VERSIONS = 10
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ==================== REGISTRY ====================
+class ModelRegistry:
+    """Versioned on-disk store of fitted feeder forecasters.
+
+    Layout: <root>/<feeder>/v0001.joblib ... plus manifest.json holding one
+    entry per version and the version currently active for the dashboard.
+    """
+
+    def __init__(self, root=DEFAULT_MODEL_DIR):
+        self.root = root
+
+    # ---------- manifest ----------
+    def _feeder_dir(self, feeder_id):
+        return os.path.join(self.root, str(feeder_id))
+
+    def manifest(self, feeder_id):
+        path = os.path.join(self._feeder_dir(feeder_id), MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {'feeder_id': str(feeder_id), 'active': None, 'versions': []}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, feeder_id, manifest):
+        path = os.path.join(self._feeder_dir(feeder_id), MANIFEST_NAME)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp, path)
+
+    def manifest_mtime(self, feeder_id):
+        """Changes whenever a version is registered or the active version moves"""
+        path = os.path.join(self._feeder_dir(feeder_id), MANIFEST_NAME)
+        return os.path.getmtime(path) if os.path.exists(path) else None
+
+    def feeders(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, MANIFEST_NAME))
+        )
+
+    # ---------- entries ----------
+    def entries(self, feeder_id, method=None):
+        versions = self.manifest(feeder_id)['versions']
+        return [e for e in versions if method is None or e['method'] == method]
+
+    def entry(self, feeder_id, version=None):
+        """Entry for a version, or the active one when version is None"""
+        manifest = self.manifest(feeder_id)
+        version = manifest['active'] if version is None else version
+        for e in manifest['versions']:
+            if e['version'] == version:
+                return e
+        return None
+
+    def latest_entry(self, feeder_id, method=None):
+        entries = self.entries(feeder_id, method)
+        return entries[-1] if entries else None
+
+    # ---------- write ----------
+    def register(self, feeder_id, forecaster, fit_mode='full', parent=None, activate=True):
+        """Persist a fitted forecaster as the next version of a feeder"""
+        manifest = self.manifest(feeder_id)
+        version = max((e['version'] for e in manifest['versions']), default=0) + 1
+        os.makedirs(self._feeder_dir(feeder_id), exist_ok=True)
+
+        filename = f"v{version:04d}.joblib"
+        path = os.path.join(self._feeder_dir(feeder_id), filename)
+        joblib.dump(forecaster, path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+        history = forecaster.history
+        entry = {
+            'version': version,
+            'file': filename,
+            'sha256': file_sha256(path),
+            'method': forecaster.method,
+            'fit_mode': fit_mode,
+            'parent': parent,
+            'train_start': history.index[0].isoformat(),
+            'train_end': history.index[-1].isoformat(),
+            'n_obs': int(len(history)),
+            'freq': forecaster.freq,
+            'order': forecaster.order,
+            'seasonal_order': forecaster.seasonal_order,
+            'regressors': list(forecaster.regressors),
+            'metrics': forecaster.metrics,
+            'fit_seconds': forecaster.fit_seconds,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        manifest['versions'].append(entry)
+        if activate:
+            manifest['active'] = version
+        self._prune(feeder_id, manifest)
+        self._write_manifest(feeder_id, manifest)
+        return entry
+
+    def activate(self, feeder_id, version):
+        """Point the dashboard at an existing version, e.g. to roll back"""
+        manifest = self.manifest(feeder_id)
+        if not any(e['version'] == version for e in manifest['versions']):
+            raise KeyError(f"Feeder {feeder_id} has no model version {version}")
+        manifest['active'] = version
+        self._write_manifest(feeder_id, manifest)
+
+    def rollback(self, feeder_id):
+        """Activate the version registered before the active one"""
+        manifest = self.manifest(feeder_id)
+        older = [e['version'] for e in manifest['versions'] if e['version'] < (manifest['active'] or 0)]
+        if not older:
+            raise KeyError(f"Feeder {feeder_id} has no earlier model version")
+        self.activate(feeder_id, older[-1])
+        return older[-1]
+
+    def _prune(self, feeder_id, manifest, keep=KEEP_VERSIONS):
+        versions = manifest['versions']
+        if len(versions) <= keep:
+            return
+        kept = versions[-keep:]
+        if manifest['active'] is not None and all(e['version'] != manifest['active'] for e in kept):
+            kept = [e for e in versions if e['version'] == manifest['active']] + kept[1:]
+        for e in versions:
+            if e not in kept:
+                path = os.path.join(self._feeder_dir(feeder_id), e['file'])
+                if os.path.exists(path):
+                    os.remove(path)
+        manifest['versions'] = kept
+
+    # ---------- read ----------
+    def load(self, feeder_id, version=None, verify=True):
+        """Load a version (default: active); None if the feeder has no models"""
+        entry = self.entry(feeder_id, version)
+        if entry is None:
+            return None
+        path = os.path.join(self._feeder_dir(feeder_id), entry['file'])
+        if verify and file_sha256(path) != entry['sha256']:
+            raise ValueError(f"Model file {path} does not match its registered hash")
+        forecaster = joblib.load(path)
+        forecaster.version = entry['version']
+        return forecaster
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from feeder_stats import CRITICAL_RATIO
+
+# ==================== CONFIG ====================
+N_PATHS = 5000
+# Working memory of one chunk of simulated paths; more paths are run as further chunks
+MEMORY_BUDGET = 64 * 2**20
+# Reported load levels, as a share of I_nom
+THRESHOLDS = {'critical': CRITICAL_RATIO, 'overload': 1.0}
+# Forecaster.predict intervals are (1 - ALPHA)
+ALPHA = 0.05
+# Innovations standing in for a model without usable residuals: evenly spaced normal quantiles
+NORMAL_POOL = stats.norm.ppf((np.arange(256) + 0.5) / 256)
+
+
+# ==================== ERROR MODEL ====================
+def error_model(residuals):
+    """AR(1) coefficient of a model's in-sample residuals and its standardized innovations.
+
+    Bootstrapping the innovations keeps the skew and tails of the real
+    errors; the coefficient carries their persistence from step to step.
+    """
+    r = np.asarray(residuals, dtype='float64')
+    r = r[np.isfinite(r)]
+    if len(r) < 3:
+        return 0.0, NORMAL_POOL
+    r = r - r.mean()
+    energy = np.dot(r, r)
+    phi = float(np.clip(np.dot(r[1:], r[:-1]) / energy, -0.99, 0.99)) if energy > 0 else 0.0
+    innovations = r[1:] - phi * r[:-1]
+    std = innovations.std()
+    return phi, (innovations - innovations.mean()) / std if std > 0 else NORMAL_POOL
+
+
+def prediction_sigma(prediction, alpha=ALPHA):
+    """Standard deviation of each forecast step, read back from its (1 - alpha) interval"""
+    width = (prediction['upper'] - prediction['lower']).to_numpy(dtype='float64')
+    return np.nan_to_num(width / (2 * stats.norm.ppf(1 - alpha / 2)), nan=0.0).clip(min=0)
+
+
+# ==================== SIMULATION ====================
+def exceedance_probabilities(mean, sigma, phi, pools, limits, n_paths=N_PATHS, memory_budget=MEMORY_BUDGET, seed=0):
+    """Share of simulated load paths above each limit, per feeder and step.
+
+    mean and sigma are (feeders x steps) forecasts and their standard
+    deviation, phi and pools each feeder's error model, limits a
+    (thresholds x feeders) array in amperes. Every chunk draws all
+    steps x feeders x paths at once in float32 and only exceedance counts
+    are kept, so memory stays within memory_budget whatever n_paths is.
+
+    Returns (per_step, any_step): (thresholds x feeders x steps) and
+    (thresholds x feeders) probabilities, the latter of exceeding the limit
+    at least once over the horizon.
+    """
+    mean = np.asarray(mean, dtype='float32')
+    sigma = np.asarray(sigma, dtype='float32')
+    limits = np.asarray(limits, dtype='float32')
+    n_feeders, n_steps = mean.shape
+    # Every pool in one flat array; a feeder draws from its own slice
+    sizes = np.array([len(p) for p in pools])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])[None, :, None]
+    flat = np.concatenate(pools).astype('float32')
+    phi = np.asarray(phi, dtype='float32')[:, None]
+    scale = np.sqrt(1 - phi ** 2)
+
+    # Paths per chunk: the float32 errors, their int64 draw indices and a boolean mask per path
+    chunk = int(max(1, min(n_paths, memory_budget // (n_steps * n_feeders * (4 + 8 + 1)))))
+    rng = np.random.default_rng(seed)
+    per_step = np.zeros((len(limits), n_feeders, n_steps))
+    any_step = np.zeros((len(limits), n_feeders))
+    for start in range(0, n_paths, chunk):
+        size = min(chunk, n_paths - start)
+        # (steps x feeders x paths), so each step of the recursion is one contiguous slice
+        errors = flat[offsets + rng.integers(0, sizes[None, :, None], size=(n_steps, n_feeders, size))]
+        for step in range(1, n_steps):
+            # Stationary AR(1) with unit variance
+            errors[step] *= scale
+            errors[step] += phi * errors[step - 1]
+        errors *= sigma.T[:, :, None]
+        errors += mean.T[:, :, None]
+        for t, limit in enumerate(limits):
+            above = errors > limit[None, :, None]
+            per_step[t] += above.sum(axis=2).T
+            any_step[t] += above.any(axis=0).sum(axis=1)
+    return per_step / n_paths, any_step / n_paths
+
+
+def overload_risk(predictions, residuals, i_nom, n_paths=N_PATHS, seed=0, alpha=ALPHA):
+    """P(load above each THRESHOLDS share of I_nom) per feeder and forecast step.
+
+    predictions are Forecaster.predict frames, residuals the fitted models'
+    in-sample residuals and i_nom the nominal currents, all keyed by feeder
+    id; feeders without a forecast are skipped. Returns (per_step, per_feeder):
+    a frame indexed by (feeder_id, time) with a p_<threshold> column each,
+    and one indexed by feeder_id with the chance of any step being above.
+    """
+    feeders = [f for f, p in predictions.items() if p is not None and len(p)]
+    columns = [f"p_{name}" for name in THRESHOLDS]
+    if not feeders:
+        index = pd.MultiIndex.from_arrays([[], []], names=['feeder_id', 'time'])
+        return pd.DataFrame(columns=columns, index=index), pd.DataFrame(columns=columns)
+    n_steps = min(len(predictions[f]) for f in feeders)
+    mean = np.array([predictions[f]['value'].to_numpy(dtype='float64')[:n_steps] for f in feeders])
+    sigma = np.array([prediction_sigma(predictions[f], alpha)[:n_steps] for f in feeders])
+    models = [error_model(residuals.get(f, ())) for f in feeders]
+    nominal = np.array([i_nom[f] for f in feeders], dtype='float64')
+    limits = np.array([ratio * nominal for ratio in THRESHOLDS.values()])
+
+    per_step, any_step = exceedance_probabilities(
+        mean, sigma, [phi for phi, _ in models], [pool for _, pool in models], limits, n_paths, seed=seed
+    )
+    index = pd.MultiIndex.from_arrays([
+        np.repeat(feeders, n_steps),
+        np.concatenate([predictions[f]['time'].to_numpy()[:n_steps] for f in feeders]),
+    ], names=['feeder_id', 'time'])
+    step_frame = pd.DataFrame({c: p.ravel() for c, p in zip(columns, per_step)}, index=index)
+    feeder_frame = pd.DataFrame(dict(zip(columns, any_step)), index=pd.Index(feeders, name='feeder_id'))
+    return step_frame, feeder_frame
@@ -0,0 +1,44 @@
+import streamlit as st
+
+from query_cache import COUNTERS, QUERY_CACHE
+
+# ==================== PAGE CONFIG ====================
+st.set_page_config(page_title="Admin · Current Distribution Monitor", page_icon="🛠️", layout="wide")
+
+
+# ==================== ADMIN ====================
+def main():
+    st.title("🛠️ Cache Administration")
+    st.caption("Shared query cache of this server process: every session and page reads the same entries.")
+
+    usage = QUERY_CACHE.usage()
+    stats = QUERY_CACHE.stats()
+    hits, misses = stats['hits'].sum(), stats['misses'].sum()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Entries", f"{usage['entries']:,}", f"of {usage['max_entries']:,}", delta_color="off")
+    col2.metric("Memory", f"{usage['bytes'] / 2**20:.1f} MB", f"of {usage['max_bytes'] / 2**20:.0f} MB", delta_color="off")
+    col3.metric("Hit Rate", f"{hits / (hits + misses) * 100:.1f}%" if hits + misses else "N/A")
+    col4.metric("Evictions", f"{stats['evictions'].sum():,}")
+
+    st.subheader("Per result kind")
+    st.dataframe(
+        stats.assign(mb=stats['bytes'] / 2**20).drop(columns='bytes').rename(columns={
+            'kind': 'Kind', **{c: c.title() for c in COUNTERS},
+            'entries': 'Entries', 'mb': 'Memory (MB)', 'hit_rate': 'Hit Rate (%)'
+        }).round(2),
+        hide_index=True, use_container_width=True
+    )
+
+    col1, col2, _ = st.columns([1, 1, 4])
+    if col1.button("Reset counters"):
+        QUERY_CACHE.reset_counters()
+        st.rerun()
+    if col2.button("Clear cache"):
+        QUERY_CACHE.clear()
+        st.rerun()
+
+
+# ==================== RUN PAGE ====================
+if __name__ == "__main__":
+    main()
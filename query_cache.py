@@ -0,0 +1,202 @@
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from ingest import POLL_INTERVAL
+
+# ==================== CONFIG ====================
+MAX_ENTRIES = int(os.environ.get('FEEDER_QUERY_CACHE_ENTRIES', 2048))
+MAX_BYTES = int(os.environ.get('FEEDER_QUERY_CACHE_MB', 256)) * 1024 * 1024
+# Results for closed date ranges only change through invalidation; this is a safety net
+TTL_SECONDS = 3600
+# Results covering today are refreshed as often as new exports are ingested
+LIVE_TTL_SECONDS = POLL_INTERVAL
+
+COUNTERS = ('hits', 'misses', 'evictions', 'expirations', 'invalidations')
+_MISSING = object()
+
+
+def estimate_size(value):
+    """Approximate in-memory size of a cached value, in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+# ==================== CACHE ====================
+class QueryCache:
+    """Process-wide LRU cache shared by every dashboard session.
+
+    Keys are tuples whose first element names the kind of result
+    ('frame', 'forecast', ...); counters are kept per kind. Entries expire
+    after their TTL, the least recently used ones are evicted past
+    max_entries or max_bytes, and tags let a writer drop exactly the
+    entries built from a feeder whose partitions changed.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = defaultdict(set)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._counters = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self._change_offsets = {}
+        # Bumped by every invalidate(tag) and clear(), so a result computed across one is not stored
+        self._generations = defaultdict(int)
+        self._epoch = 0
+
+    # ---------- lookup ----------
+    def get(self, key, default=None):
+        """Cached value for key, or default on a miss"""
+        kind = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires_at'] < time.time():
+                self._drop(key)
+                self._counters[kind]['expirations'] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters[kind]['hits'] += 1
+                return entry['value']
+            self._counters[kind]['misses'] += 1
+            return default
+
+    def get_or_compute(self, key, compute, tags=(), ttl=None):
+        """Cached value for key, computing and storing it on a miss"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        # Compute outside the lock so one slow query does not block other sessions
+        generation = self.generation(tags)
+        value = compute()
+        self.put(key, value, tags, ttl, generation)
+        return value
+
+    def generation(self, tags):
+        """Snapshot of the invalidations of tags, to pass to put() for a value computed from here on"""
+        with self._lock:
+            return self._epoch, tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def put(self, key, value, tags=(), ttl=None, generation=None):
+        """Store value under key; skipped when one of its tags was invalidated since generation"""
+        size = estimate_size(value)
+        with self._lock:
+            if generation is not None and generation != self.generation(tags):
+                # Built from data a writer has replaced in the meantime
+                return
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = {
+                'value': value,
+                'size': size,
+                'tags': tuple(tags),
+                'expires_at': time.time() + (self.ttl if ttl is None else ttl),
+            }
+            self._bytes += size
+            for tag in tags:
+                self._tags[tag].add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._counters[oldest[0]]['evictions'] += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+        for tag in entry['tags']:
+            self._tags[tag].discard(key)
+            if not self._tags[tag]:
+                del self._tags[tag]
+
+    # ---------- invalidation ----------
+    def invalidate(self, tag):
+        """Drop every entry carrying tag; returns how many were dropped"""
+        with self._lock:
+            self._generations[tag] += 1
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._drop(key)
+                self._counters[key[0]]['invalidations'] += 1
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            keys = list(self._entries)
+            for key in keys:
+                self._drop(key)
+                self._counters[key[0]]['invalidations'] += 1
+            return len(keys)
+
+    def sync_store(self, store):
+        """Apply partitions written since the last call as ('feeder', id) invalidations.
+
+        Cheap when nothing changed: one stat of the store's change log.
+        """
+        with self._lock:
+            offset = self._change_offsets.get(store.root)
+            if offset is None:
+                # First contact: everything already written is reflected in fresh queries
+                _, offset = store.changes_since(0)
+                self._change_offsets[store.root] = offset
+                return 0
+            changes, offset = store.changes_since(offset)
+            self._change_offsets[store.root] = offset
+            if changes is None:
+                return self.clear()
+            return sum(self.invalidate(('feeder', feeder_id)) for feeder_id in {f for f, _ in changes})
+
+    # ---------- stats ----------
+    def stats(self):
+        """Counters and current footprint per kind of result, as a DataFrame"""
+        with self._lock:
+            usage = defaultdict(lambda: {'entries': 0, 'bytes': 0})
+            for key, entry in self._entries.items():
+                usage[key[0]]['entries'] += 1
+                usage[key[0]]['bytes'] += entry['size']
+            kinds = sorted(set(self._counters) | set(usage))
+            rows = [{'kind': kind, **self._counters[kind], **usage[kind]} for kind in kinds]
+        frame = pd.DataFrame(rows, columns=['kind', *COUNTERS, 'entries', 'bytes'])
+        lookups = frame['hits'] + frame['misses']
+        frame['hit_rate'] = np.where(lookups > 0, frame['hits'] / lookups.clip(lower=1) * 100, np.nan)
+        return frame
+
+    def usage(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+    def reset_counters(self):
+        with self._lock:
+            self._counters.clear()
+
+
+# One instance per server process, shared by every session and page
+QUERY_CACHE = QueryCache()
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from feeder_stats import CRITICAL_RATIO
+
+# ==================== CONFIG ====================
+# Accepted targets whose worst-case margin is below this share of I_nom are only a backup
+BACKUP_MARGIN_RATIO = 0.05
+# Working memory of one block of (source x target x step) pair loads; more sources run as further blocks
+PAIR_BUDGET = 64 * 2**20
+
+
+# ==================== HEADROOM ====================
+def pair_matrices(load, i_nom, transfer, limit_ratio=CRITICAL_RATIO, memory_budget=PAIR_BUDGET):
+    """Worst-case headroom and peak of every target if it picked up each source.
+
+    load is a (feeders x steps) array of current + forecast load, transfer
+    a (sources x steps) array of the load each source would hand over.
+    Returns (headroom, peak), both (source x target): the min over steps of
+    limit_ratio * I_nom[target] - load[target] - transfer[source] in
+    amperes, and the max over steps of the target's utilization after the
+    transfer in %. Sources are taken in blocks whose temporaries fit
+    memory_budget.
+    """
+    load = np.asarray(load, dtype='float64')
+    transfer = np.atleast_2d(np.asarray(transfer, dtype='float64'))
+    i_nom = np.asarray(i_nom, dtype='float64')
+    spare = limit_ratio * i_nom[:, None] - load
+    headroom = np.empty((len(transfer), len(load)))
+    peak = np.empty((len(transfer), len(load)))
+    block = int(max(1, memory_budget // max(1, load.size * 8)))
+    for start in range(0, len(transfer), block):
+        handed = transfer[start:start + block, None, :]
+        headroom[start:start + block] = np.min(spare[None, :, :] - handed, axis=2)
+        peak[start:start + block] = np.max(load[None, :, :] + handed, axis=2)
+    return headroom, peak / i_nom[None, :] * 100
+
+
+# ==================== LOAD PROFILE ====================
+def forecast_load_matrix(current, predictions, horizon, now=None):
+    """Current reading followed by the forecast horizon of every feeder, as a feeders x steps array.
+
+    current and predictions (Forecaster.predict frames) are aligned per
+    feeder. A forecast starts at its model's last training timestamp, so
+    steps at or before now (default: the wall clock) are dropped and the
+    rest follow the current reading. Feeders without a forecast (None), or
+    without enough steps ahead, are assumed to stay at their current load.
+    """
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    load = np.empty((len(current), horizon + 1))
+    for row, (value, prediction) in enumerate(zip(current, predictions)):
+        forecast = []
+        if prediction is not None:
+            ahead = pd.to_datetime(prediction['time']) > now
+            forecast = prediction['value'].to_numpy()[ahead.to_numpy()][:horizon]
+        load[row, :] = value
+        load[row, 1:1 + len(forecast)] = forecast
+    return load
+
+
+# ==================== RECOMMENDATION ====================
+def recommend_transfers(feeder_ids, load, i_nom, sources=None, transfer_fraction=1.0, allowed=None,
+                        limit_ratio=CRITICAL_RATIO):
+    """Rank target feeders for moving each source feeder's load and decide approve/deny.
+
+    load is (feeders x steps) with step 0 the latest reading and the rest
+    the forecast horizon. allowed is an optional (feeder x feeder) boolean
+    mask of feeder pairs that share a tie switch. Every (source x target)
+    pair is evaluated at once by pair_matrices; each source's ranking is
+    read off its row.
+
+    Returns {source: result} for sources (default: every feeder), each
+    result a dict with the decision, the chosen target, the reasons and a
+    candidates DataFrame ranked by headroom.
+    """
+    feeder_ids = list(feeder_ids)
+    sources = feeder_ids if sources is None else list(sources)
+    rows = np.array([feeder_ids.index(source) for source in sources], dtype='int64')
+    load = np.asarray(load, dtype='float64')
+    i_nom = np.asarray(i_nom, dtype='float64')
+    transfer = load[rows] * transfer_fraction
+    headroom, peak = pair_matrices(load, i_nom, transfer, limit_ratio)
+    connected = (
+        np.ones(headroom.shape, dtype=bool) if allowed is None else np.asarray(allowed, dtype=bool)[rows]
+    )
+    accepted = connected & (headroom >= 0)
+    # Each row ranked accepted first, then by headroom; the source itself is cut from its own row
+    order = np.lexsort((-headroom, ~accepted), axis=1)
+    order = order[order != rows[:, None]].reshape(len(rows), len(feeder_ids) - 1)
+    utilization = load[:, 0] / i_nom * 100
+    names = np.asarray(feeder_ids, dtype=object)
+    return {
+        source: _rank(source, names[order[k]], headroom[k, order[k]], peak[k, order[k]], connected[k, order[k]],
+                      accepted[k, order[k]], utilization[order[k]], i_nom[order[k]], transfer[k], limit_ratio)
+        for k, source in enumerate(sources)
+    }
+
+
+def recommend_transfer(source, feeder_ids, load, i_nom, transfer_fraction=1.0, allowed=None,
+                       limit_ratio=CRITICAL_RATIO):
+    """recommend_transfers() for a single source"""
+    return recommend_transfers(feeder_ids, load, i_nom, [source], transfer_fraction, allowed, limit_ratio)[source]
+
+
+def _rank(source, targets, headroom, peak, connected, accepted, utilization, i_nom, transfer, limit_ratio):
+    """One source's ranked row of the pair matrices as a candidates table and a decision"""
+    limit = f"{limit_ratio * 100:.0f}%"
+    reason = [
+        'No tie switch to source' if not tie else
+        f"Would exceed {limit} of I_nom (peak {round(p, 1)}%)" if h < 0 else
+        'Within limits over the forecast horizon'
+        for tie, h, p in zip(connected.tolist(), headroom.tolist(), peak.tolist())
+    ]
+    badge = np.where(~accepted, 'Rejected', np.where(headroom < BACKUP_MARGIN_RATIO * i_nom, 'Backup', 'Available'))
+    if accepted.any():
+        badge[0] = 'Optimal'
+    candidates = pd.DataFrame({
+        'feeder_id': targets,
+        'headroom': headroom,
+        'peak_utilization': peak,
+        'current_utilization': utilization,
+        'connected': connected,
+        'accepted': accepted,
+        'reason': reason,
+        'badge': badge,
+    })
+
+    reasons = []
+    if accepted.any():
+        decision, target = 'APPROVED', targets[0]
+        reasons.append(
+            f"{target} stays at or below {peak[0]:.1f}% of I_nom "
+            f"with {headroom[0]:.1f} A margin to the {limit} threshold"
+        )
+    else:
+        decision, target = 'DENIED', None
+        reasons.append(f"No connected feeder can absorb {source}'s load below {limit} of I_nom")
+    reasons.extend(f"{feeder_id}: {text}" for feeder_id, text, ok in zip(targets, reason, accepted.tolist()) if not ok)
+
+    return {
+        'source': source,
+        'decision': decision,
+        'target': target,
+        'transfer_peak': float(np.max(transfer)),
+        'reasons': reasons,
+        'candidates': candidates,
+    }
@@ -0,0 +1,92 @@
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from feeder_store import BASE_DIR
+
+# ==================== CONFIG ====================
+DEFAULT_CACHE_PATH = os.environ.get('FEEDER_CACHE_PATH', os.path.join(BASE_DIR, 'data', 'results.sqlite'))
+# Readers ignore results the worker has not confirmed for this long
+MAX_AGE_SECONDS = 300
+
+
+def snapshot_key(start_date, end_date, max_points):
+    """Cache key of a dashboard snapshot for one date window and chart resolution"""
+    return f"snapshot:{start_date}:{end_date}:{max_points}"
+
+
+# ==================== RESULT CACHE ====================
+class ResultCache:
+    """Results shared between the worker and every dashboard session.
+
+    One SQLite file in WAL mode: the worker writes, any number of
+    Streamlit sessions read concurrently without blocking it. Each row
+    holds a pickled value, when it was computed and when the worker last
+    confirmed it is still current. Readers pass create=False so a missing
+    file simply means nothing has been published yet.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, create=True):
+        self.path = path
+        if not create:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'computed_at REAL NOT NULL, checked_at REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, key, value):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, computed_at, checked_at) VALUES (?, ?, ?, ?)',
+                (key, blob, now, now)
+            )
+        return now
+
+    def touch(self, key):
+        """Mark a result as still current without rewriting it"""
+        with self._connect() as conn:
+            conn.execute('UPDATE results SET checked_at = ? WHERE key = ?', (time.time(), key))
+
+    def stamp(self, key):
+        """(computed_at, checked_at) of a result, or None; cheap enough to call on every rerun"""
+        if not os.path.exists(self.path):
+            return None
+        with self._connect() as conn:
+            row = conn.execute('SELECT computed_at, checked_at FROM results WHERE key = ?', (key,)).fetchone()
+        return row
+
+    def get(self, key):
+        if not os.path.exists(self.path):
+            return None
+        with self._connect() as conn:
+            row = conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def is_fresh(self, key, max_age=MAX_AGE_SECONDS):
+        stamp = self.stamp(key)
+        return stamp is not None and time.time() - stamp[1] <= max_age
+
+    def prune(self, keep_keys):
+        """Drop results for windows the worker no longer maintains"""
+        keep_keys = list(keep_keys)
+        with self._connect() as conn:
+            placeholders = ','.join('?' * len(keep_keys))
+            conn.execute(f'DELETE FROM results WHERE key NOT IN ({placeholders})', keep_keys)
@@ -0,0 +1,230 @@
+import argparse
+import os
+from collections import defaultdict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from feeder_stats import CRITICAL_RATIO, WARNING_RATIO
+from feeder_store import FeederStore, to_window
+
+# ==================== CONFIG ====================
+# Tier name -> (bucket width, file period). Ordered finest to coarsest.
+TIERS = {
+    '15min': ('15min', 'M'),
+    '1h': ('1h', 'M'),
+    '1D': ('1D', 'Y'),
+}
+ROLLUP_COLUMNS = ['bucket', 'min', 'max', 'mean', 'count', 'sum', 'last', 'i_nom', 'above_80', 'above_90']
+ROLLUP_SCHEMA = pa.schema([
+    ('bucket', pa.timestamp('ns')),
+    ('min', pa.float64()),
+    ('max', pa.float64()),
+    ('mean', pa.float64()),
+    ('count', pa.int64()),
+    ('sum', pa.float64()),
+    ('last', pa.float64()),
+    ('i_nom', pa.float64()),
+    # Readings at or above WARNING_RATIO / CRITICAL_RATIO of their I_nom
+    ('above_80', pa.int64()),
+    ('above_90', pa.int64()),
+])
+
+
+def _period_label(ts, period):
+    return f"{ts:%Y-%m}" if period == 'M' else f"{ts:%Y}"
+
+
+def periods_in(start, end, period):
+    """File periods overlapping [start, end)"""
+    last = end - pd.Timedelta(1, 'ns')
+    freq = 'MS' if period == 'M' else 'YS'
+    first = start.to_period(period).to_timestamp()
+    return [_period_label(ts, period) for ts in pd.date_range(first, last, freq=freq)]
+
+
+def aggregate(readings, freq):
+    """Collapse raw readings into min/max/mean/count/sum/last buckets, with the readings above each threshold"""
+    if readings.empty:
+        return ROLLUP_SCHEMA.empty_table().to_pandas()
+    readings = readings.sort_values('timestamp')
+    readings = readings.assign(above_80=readings['i'] >= WARNING_RATIO * readings['i_nom'],
+                               above_90=readings['i'] >= CRITICAL_RATIO * readings['i_nom'])
+    grouped = readings.groupby(readings['timestamp'].dt.floor(freq))
+    out = grouped['i'].agg(['min', 'max', 'mean', 'count', 'sum', 'last'])
+    out['i_nom'] = grouped['i_nom'].last()
+    out[['above_80', 'above_90']] = grouped[['above_80', 'above_90']].sum()
+    out.index.name = 'bucket'
+    return out.reset_index()[ROLLUP_COLUMNS]
+
+
+# ==================== ROLLUP STORE ====================
+class RollupStore:
+    """Pre-aggregated tiers kept next to the raw feeder store.
+
+    Layout: <store>/_rollups/tier=<tier>/feeder=<id>/<period>.parquet
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.root = os.path.join(store.root, '_rollups')
+
+    def path(self, tier, feeder_id, period_label):
+        return os.path.join(self.root, f"tier={tier}", f"feeder={feeder_id}", f"{period_label}.parquet")
+
+    def token(self, tier, feeder_id, period_label):
+        path = self.path(tier, feeder_id, period_label)
+        return os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+
+    def read_period(self, tier, feeder_id, period_label):
+        return self._read_file(self.path(tier, feeder_id, period_label))
+
+    def _read_file(self, path):
+        if not os.path.exists(path):
+            return ROLLUP_SCHEMA.empty_table().to_pandas()
+        return pq.read_table(path).to_pandas()
+
+    def _write_period(self, tier, feeder_id, period_label, frame):
+        path = self.path(tier, feeder_id, period_label)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(frame.sort_values('bucket'), schema=ROLLUP_SCHEMA, preserve_index=False)
+        pq.write_table(table, path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+    # ---------- maintenance ----------
+    def update(self, changed_partitions):
+        """Recompute the buckets of changed (feeder, day) partitions in every tier.
+
+        Each day is re-aggregated from its raw partition only, then spliced
+        into the tier files, so the cost is proportional to the new data.
+        """
+        by_feeder = defaultdict(set)
+        for feeder_id, day in changed_partitions:
+            by_feeder[feeder_id].add(day)
+        for feeder_id, days in by_feeder.items():
+            raw = {day: self.store.read_partition(feeder_id, day) for day in sorted(days)}
+            for tier, (freq, period) in TIERS.items():
+                updates = defaultdict(list)
+                for day, readings in raw.items():
+                    updates[_period_label(pd.Timestamp(day), period)].append((day, aggregate(readings, freq)))
+                for label, parts in updates.items():
+                    existing = self._read_file(self.path(tier, feeder_id, label))
+                    replaced = {day for day, _ in parts}
+                    keep = existing[~existing['bucket'].dt.date.isin(replaced)]
+                    frames = [f for f in [keep] + [frame for _, frame in parts] if len(f)]
+                    self._write_period(tier, feeder_id, label, pd.concat(frames, ignore_index=True))
+        # Announce again once the tiers match, so readers drop results built in between
+        self.store.log_changes(sorted(changed_partitions))
+
+    def rebuild(self, feeder_ids=None):
+        """Recompute every tier from raw partitions"""
+        feeder_ids = feeder_ids or self.store.feeders()
+        for feeder_id in feeder_ids:
+            self.update([(feeder_id, day) for day in self.store.days(feeder_id)])
+
+    # ---------- query ----------
+    def read(self, tier, feeder_id, start, end, read_period=None):
+        """Buckets of one tier in [start, end).
+
+        read_period lets callers put a cache in front of the per-file reads.
+        """
+        start, end = to_window(start, end)
+        freq, period = TIERS[tier]
+        read_period = read_period or self.read_period
+        frames = [read_period(tier, feeder_id, label) for label in periods_in(start, end, period)]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return ROLLUP_SCHEMA.empty_table().to_pandas()
+        df = pd.concat(frames, ignore_index=True)
+        return df[(df['bucket'] >= start.floor(freq)) & (df['bucket'] < end)].reset_index(drop=True)
+
+
+# ==================== QUERY PLANNER ====================
+def plan_tier(start, end, max_points, aggregated=False):
+    """Coarsest tier whose buckets are still finer than the chart can resolve, or 'raw'.
+
+    aggregated never plans raw: overviews of many feeders read one
+    pre-aggregated file per feeder and period instead of every daily partition.
+    """
+    start, end = to_window(start, end)
+    resolution = (end - start) / max(1, max_points)
+    chosen = next(iter(TIERS)) if aggregated else 'raw'
+    for tier, (freq, _) in TIERS.items():
+        if pd.Timedelta(freq) <= resolution:
+            chosen = tier
+    return chosen
+
+
+def plan_freq(start, end, max_points, aggregated=False):
+    """Bucket width of the planned tier; raw readings are summed on a 15-minute grid"""
+    tier = plan_tier(start, end, max_points, aggregated)
+    return '15min' if tier == 'raw' else TIERS[tier][0]
+
+
+def query_feeder(store, feeder_id, start, end, max_points, rollups=None, aggregated=False):
+    """Load one feeder at the resolution a chart of max_points can show.
+
+    Returns (frame, tier). Frames carry time/value/i_nom plus min/max/count
+    when they come from a rollup tier. Feeders whose rollups were never
+    built fall back to raw readings.
+    """
+    tier = plan_tier(start, end, max_points, aggregated)
+    if tier != 'raw':
+        buckets = (rollups or RollupStore(store)).read(tier, feeder_id, start, end)
+        if len(buckets):
+            return buckets_to_frame(buckets), tier
+    readings = store.read(feeder_id, start, end)
+    return pd.DataFrame({
+        'time': readings['timestamp'].values,
+        'value': readings['i'].values,
+        'i_nom': readings['i_nom'].values
+    }), 'raw'
+
+
+def buckets_to_frame(buckets):
+    return pd.DataFrame({
+        'time': buckets['bucket'].values,
+        'value': buckets['mean'].values,
+        'min': buckets['min'].values,
+        'max': buckets['max'].values,
+        'count': buckets['count'].values,
+        'last': buckets['last'].values,
+        'i_nom': buckets['i_nom'].values,
+        'above_80': buckets['above_80'].values,
+        'above_90': buckets['above_90'].values,
+    })
+
+
+def fold_readings(frame, readings, freq):
+    """Fold raw (time, value, i_nom) readings into a buckets_to_frame() frame of bucket width freq.
+
+    Readings landing in the frame's last, still filling bucket are merged
+    into it, later ones open new buckets, so the frame keeps one row per
+    bucket however long it is fed.
+    """
+    new = buckets_to_frame(aggregate(
+        pd.DataFrame({'timestamp': readings['time'], 'i': readings['value'], 'i_nom': readings['i_nom']}), freq
+    ))
+    if new.empty:
+        return frame
+    if not len(frame):
+        return new
+    merged = pd.concat([frame.reindex(columns=new.columns), new], ignore_index=True)
+    grouped = merged.groupby('time', sort=True)
+    out = grouped.agg(min=('min', 'min'), max=('max', 'max'), count=('count', 'sum'), last=('last', 'last'),
+                      i_nom=('i_nom', 'last'), above_80=('above_80', 'sum'), above_90=('above_90', 'sum'))
+    out['value'] = (merged['value'] * merged['count']).groupby(merged['time']).sum() / out['count']
+    return out.reset_index()[list(new.columns)]
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild rollup tiers from the raw feeder store")
+    parser.add_argument('feeders', nargs='*', help="Feeder ids (default: every feeder in the store)")
+    args = parser.parse_args()
+    RollupStore(FeederStore()).rebuild(args.feeders or None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from feeder_stats import CRITICAL_RATIO, WARNING_RATIO
+from rollups import aggregate
+
+# ==================== CONFIG ====================
+# Resolution of the coincident peak; the hourly rollup tier serves it directly
+KPI_TIER = '1h'
+# Share of a feeder counted towards the health score per status
+HEALTH_WEIGHTS = {'Normal': 1.0, 'Warning': 0.5, 'Critical': 0.0}
+HEALTH_GRADES = [(90, 'A', 'Optimal'), (75, 'B', 'Good'), (50, 'C', 'Attention'), (0, 'D', 'At Risk')]
+
+
+# ==================== QUERY ====================
+def read_kpi_buckets(store, rollups, feeder_id, start, end, read_period=None):
+    """Hourly buckets of one feeder in the window, aggregated from raw readings if the tier is missing"""
+    buckets = rollups.read(KPI_TIER, feeder_id, start, end, read_period)
+    if len(buckets):
+        return buckets
+    return aggregate(store.read(feeder_id, start, end), KPI_TIER)
+
+
+def frame_buckets(frame):
+    """Bucket rows for a (time, value, i_nom) frame, one bucket per reading"""
+    return pd.DataFrame({
+        'bucket': frame['time'].values,
+        'max': frame['value'].values,
+        'mean': frame['value'].values,
+        'count': 1,
+        'sum': frame['value'].values,
+        'last': frame['value'].values,
+        'i_nom': frame['i_nom'].values,
+    })
+
+
+def health_grade(score):
+    """Letter grade and label of a 0-100 health score"""
+    for threshold, grade, label in HEALTH_GRADES:
+        if score >= threshold:
+            return grade, label
+    return HEALTH_GRADES[-1][1:]
+
+
+# ==================== ACCUMULATOR ====================
+class SystemKPIs:
+    """System overview maintained incrementally per feeder.
+
+    Holds each feeder's latest reading, peak and I_nom, the highest closed
+    system bucket and the running sums of the open one. Seeding reads one
+    bucket per feeder and hour, update() costs O(new readings) and
+    summary() O(feeders), whatever the length of the window.
+
+    The system load of a bucket is the sum of the feeder means in it, as in
+    feeder_stats.system_total; the coincident peak is the highest such bucket.
+    """
+
+    def __init__(self, feeder_ids, i_nom, freq=KPI_TIER):
+        self.feeder_ids = list(feeder_ids)
+        self.position = {f: i for i, f in enumerate(self.feeder_ids)}
+        self.freq = freq
+        n = len(self.feeder_ids)
+        self.i_nom = np.asarray(i_nom, dtype='float64').copy()
+        self.current = np.full(n, np.nan)
+        self.peak = np.full(n, np.nan)
+        self.coincident_peak = np.nan
+        self.coincident_time = None
+        self.bucket = None
+        self.bucket_sum = np.zeros(n)
+        self.bucket_count = np.zeros(n)
+
+    @classmethod
+    def from_buckets(cls, buckets, feeder_ids, i_nom, freq=KPI_TIER):
+        """Seed from per-feeder bucket frames (rollup columns); the latest bucket stays open.
+
+        i_nom is taken as given, normally from the feeder registry, rather
+        than from the I_nom recorded with the readings.
+        """
+        kpis = cls(feeder_ids, i_nom, freq)
+        frames = {f: b for f, b in buckets.items() if len(b) and f in kpis.position}
+        if not frames:
+            return kpis
+        long = pd.concat(frames, names=['feeder_id', None]).reset_index(level=0).sort_values('bucket', kind='stable')
+        rows = long['feeder_id'].map(kpis.position).to_numpy()
+        np.fmax.at(kpis.peak, rows, long['max'].to_numpy(dtype='float64'))
+        last = ~long['feeder_id'].duplicated(keep='last').to_numpy()
+        kpis.current[rows[last]] = long['last'].to_numpy(dtype='float64')[last]
+
+        totals = long.groupby('bucket')['mean'].sum(min_count=1)
+        kpis.bucket = totals.index[-1]
+        closed = totals.iloc[:-1].dropna()
+        if len(closed):
+            kpis.coincident_peak, kpis.coincident_time = float(closed.max()), closed.idxmax()
+        open_rows = (long['bucket'] == kpis.bucket).to_numpy()
+        np.add.at(kpis.bucket_sum, rows[open_rows], long['sum'].to_numpy(dtype='float64')[open_rows])
+        np.add.at(kpis.bucket_count, rows[open_rows], long['count'].to_numpy(dtype='float64')[open_rows])
+        return kpis
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    # ---------- incremental ----------
+    def open_total(self):
+        reporting = self.bucket_count > 0
+        if not reporting.any():
+            return np.nan
+        return float((self.bucket_sum[reporting] / self.bucket_count[reporting]).sum())
+
+    def _close_bucket(self):
+        total = self.open_total()
+        if np.isfinite(total) and not total <= self.coincident_peak:
+            self.coincident_peak, self.coincident_time = total, self.bucket
+        self.bucket_sum[:] = 0
+        self.bucket_count[:] = 0
+
+    def update(self, readings):
+        """Fold new (feeder_id, time, value) readings in; readings of unknown feeders are ignored"""
+        rows = readings['feeder_id'].map(self.position)
+        readings = readings[rows.notna().to_numpy()].sort_values('time', kind='stable')
+        if readings.empty:
+            return self
+        rows = readings['feeder_id'].map(self.position).to_numpy(dtype='int64')
+        values = readings['value'].to_numpy(dtype='float64')
+        np.fmax.at(self.peak, rows, values)
+        last = ~readings['feeder_id'].duplicated(keep='last').to_numpy()
+        self.current[rows[last]] = values[last]
+
+        buckets = pd.DatetimeIndex(readings['time']).floor(self.freq)
+        for bucket in buckets.unique():
+            if self.bucket is not None and bucket < self.bucket:
+                # Too late for the coincident peak; the feeder's latest reading and peak already moved
+                continue
+            if self.bucket is None or bucket > self.bucket:
+                if self.bucket is not None:
+                    self._close_bucket()
+                self.bucket = bucket
+            selected = (buckets == bucket)
+            np.add.at(self.bucket_sum, rows[selected], values[selected])
+            np.add.at(self.bucket_count, rows[selected], 1)
+        return self
+
+    # ---------- readout ----------
+    def summary(self):
+        """System overview figures, in O(feeders)"""
+        reporting = np.isfinite(self.current)
+        current, i_nom = self.current[reporting], self.i_nom[reporting]
+        utilization = current / i_nom * 100
+        counts = {
+            'Normal': int((utilization < WARNING_RATIO * 100).sum()),
+            'Warning': int(((utilization >= WARNING_RATIO * 100) & (utilization < CRITICAL_RATIO * 100)).sum()),
+            'Critical': int((utilization >= CRITICAL_RATIO * 100).sum()),
+        }
+        total, capacity = float(current.sum()), float(i_nom.sum())
+        coincident, coincident_time = self.coincident_peak, self.coincident_time
+        open_total = self.open_total()
+        if np.isfinite(open_total) and not open_total <= coincident:
+            coincident, coincident_time = open_total, self.bucket
+        individual_peaks = float(np.nansum(self.peak))
+        weighted = sum(HEALTH_WEIGHTS[status] * n for status, n in counts.items())
+        score = float(100 * weighted / reporting.sum()) if reporting.any() else np.nan
+        grade, grade_label = health_grade(score) if np.isfinite(score) else ('N/A', 'No Readings')
+        return {
+            'feeders': len(self.feeder_ids),
+            'reporting': int(reporting.sum()),
+            'status_counts': counts,
+            'total_load': total,
+            'capacity': capacity,
+            'load_pct': total / capacity * 100 if capacity else np.nan,
+            # Load every feeder could still take before reaching the critical threshold
+            'headroom': float(np.clip(CRITICAL_RATIO * i_nom - current, 0, None).sum()),
+            'coincident_peak': coincident,
+            'coincident_time': coincident_time,
+            'sum_of_peaks': individual_peaks,
+            'diversity_factor': individual_peaks / coincident if np.isfinite(coincident) and coincident > 0 else np.nan,
+            'health_score': score,
+            'health_grade': grade,
+            'health_label': grade_label,
+        }
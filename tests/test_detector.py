@@ -0,0 +1,88 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from detector import SUSTAINED_MINUTES, StreamDetector
+from feeder_store import FeederStore
+from ingest import ingest_file
+
+START = pd.Timestamp('2024-03-01')
+
+
+def readings(feeder_id, n, i=100.0, start=START, freq='15min'):
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq=freq),
+        'feeder_id': feeder_id,
+        'i': i,
+        'i_nom': 200.0,
+    })
+
+
+def kinds(events, only=('overload', 'overload_cleared', 'dropout')):
+    return [(e['feeder_id'], e['kind']) for e in events if e['kind'] in only]
+
+
+# ==================== UPDATE ====================
+def test_shuffled_batch_matches_time_ordered_batch():
+    df = pd.concat([readings('A', 300), readings('B', 300)], ignore_index=True)
+    df.loc[df.index[150:160], 'i'] = 195.0
+    ordered, shuffled = StreamDetector(), StreamDetector()
+
+    expected = ordered.update(df)
+    events = shuffled.update(df.sample(frac=1, random_state=0))
+
+    assert events == expected
+    assert kinds(expected) == [('A', 'overload'), ('A', 'overload_cleared')]
+    rows = [shuffled.position[f] for f in ordered.feeder_ids]
+    for name, values in ordered.state.items():
+        np.testing.assert_array_equal(values, shuffled.state[name][rows])
+
+
+def test_long_single_feeder_run_raises_sustained_overload_once():
+    df = readings('A', 1000)
+    df.loc[500:600, 'i'] = 190.0
+
+    events = StreamDetector().update(df)
+
+    assert kinds(events) == [('A', 'overload'), ('A', 'overload_cleared')]
+    raised = next(e for e in events if e['kind'] == 'overload')
+    over = pd.Timestamp(raised['time']) - df.loc[500, 'timestamp']
+    assert over == pd.Timedelta(minutes=SUSTAINED_MINUTES)
+
+
+def test_readings_already_folded_in_are_counted_as_late():
+    detector = StreamDetector()
+    df = readings('A', 100)
+    detector.update(df.iloc[50:])
+
+    assert detector.update(df.iloc[:60]) == []
+    assert detector.late == 60
+
+
+# ==================== DROPOUTS ====================
+def test_outage_gap_stays_out_of_the_interval():
+    detector = StreamDetector()
+    before = readings('A', 200)
+    after = readings('A', 10, start=before['timestamp'].iloc[-1] + pd.Timedelta(hours=6))
+
+    events = detector.update(pd.concat([before, after]))
+
+    assert kinds(events) == [('A', 'dropout')]
+    assert detector.state['interval'][0] == pd.Timedelta('15min').value
+
+
+def test_backfilled_export_is_judged_against_ingested_time(tmp_path, caplog):
+    store = FeederStore(str(tmp_path / 'store'))
+    path = tmp_path / 'export.csv'
+    # Half a day from 2024, sorted backwards so the second chunk is older than the first
+    readings('A', 48).iloc[::-1].to_csv(path, index=False)
+    detector, events = StreamDetector(), []
+
+    with caplog.at_level(logging.WARNING, logger='feeder_dashboard.ingest'):
+        ingest_file(store, str(path), chunksize=24, detector=detector, events=events)
+
+    assert len(store.read('A', START, START + pd.Timedelta(days=1))) == 48
+    assert detector.late == 24
+    assert '24 readings' in caplog.text
+    assert detector.check_silence(max(store.watermarks().values())) == []
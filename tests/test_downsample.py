@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from downsample import downsample, target_points
+
+
+def hourly_buckets(n=8760):
+    rng = np.random.default_rng(0)
+    mean = 150 + 20 * np.sin(np.arange(n) * 2 * np.pi / 24) + rng.normal(0, 1, n)
+    return pd.DataFrame({
+        'time': pd.date_range('2024-01-01', periods=n, freq='1h'),
+        'value': mean,
+        'min': mean - 5,
+        'max': mean + 5,
+    })
+
+
+# ==================== PEAKS ====================
+def test_spike_only_in_bucket_max_survives():
+    df = hourly_buckets()
+    df.loc[4321, 'max'] = 260.0
+
+    out = downsample(df, 700)
+
+    assert len(out) < len(df)
+    assert 4321 in out.index
+    assert out['max'].max() == 260.0
+
+
+def test_dip_only_in_bucket_min_survives():
+    df = hourly_buckets()
+    df.loc[1234, 'min'] = 0.0
+
+    out = downsample(df, 700, method='minmax')
+
+    assert out['min'].min() == 0.0
+
+
+def test_short_frames_are_returned_whole():
+    df = hourly_buckets(target_points(700))
+    assert downsample(df, 700) is df
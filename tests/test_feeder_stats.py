@@ -0,0 +1,16 @@
+import numpy as np
+
+from feeder_stats import status_of
+
+
+# ==================== STATUS ====================
+def test_status_of_thresholds():
+    assert [status_of(u) for u in (50.0, 80.0, 89.9, 90.0, 120.0)] == [
+        'Normal', 'Warning', 'Warning', 'Critical', 'Critical'
+    ]
+
+
+def test_status_of_without_utilization():
+    assert status_of(np.nan) == 'N/A'
+    assert status_of(np.inf) == 'N/A'
+    assert status_of(None) == 'N/A'
@@ -0,0 +1,38 @@
+from datetime import date
+
+import pandas as pd
+
+from feeder_store import COLUMNS, FeederStore, to_window
+
+
+# ==================== WINDOW ====================
+def test_date_end_covers_the_whole_day():
+    assert to_window(date(2024, 1, 1), date(2024, 1, 2)) == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-03'))
+
+
+def test_timestamp_end_at_midnight_is_exclusive():
+    _, end = to_window(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02 00:00'))
+    assert end == pd.Timestamp('2024-01-02')
+
+
+# ==================== READ ====================
+def test_read_without_partitions_returns_typed_empty_frame(tmp_path):
+    df = FeederStore(str(tmp_path)).read('A', date(2024, 1, 1), date(2024, 1, 2))
+
+    assert df.empty
+    assert list(df.columns) == COLUMNS
+    assert df['timestamp'].dtype == 'datetime64[ns]'
+    assert df['i'].dtype == 'float64'
+
+
+def test_read_to_midnight_stops_before_the_next_day(tmp_path):
+    store = FeederStore(str(tmp_path))
+    store.write(pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=48, freq='1h'),
+        'feeder_id': 'A',
+        'i': 100.0,
+        'i_nom': 200.0,
+    }))
+
+    assert len(store.read('A', pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02'))) == 24
+    assert len(store.read('A', date(2024, 1, 1), date(2024, 1, 1))) == 24
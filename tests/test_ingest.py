@@ -0,0 +1,55 @@
+import pandas as pd
+
+from feeder_store import FeederStore
+from ingest import ingest_file
+
+DAY = pd.Timestamp('2024-03-01')
+
+
+def readings(feeder_id, hours):
+    return pd.DataFrame({
+        'timestamp': [DAY + pd.Timedelta(hours=h) for h in hours],
+        'feeder_id': feeder_id,
+        'i': [100.0 + h for h in hours],
+        'i_nom': 200.0,
+    })
+
+
+# ==================== WATERMARK ====================
+def test_unsorted_export_keeps_rows_older_than_an_earlier_chunk(tmp_path):
+    store = FeederStore(str(tmp_path / 'store'))
+    path = tmp_path / 'export.csv'
+    # The first chunk ends at 05:00, the second goes back to 00:00
+    readings('A', [3, 4, 5, 0, 1, 2]).to_csv(path, index=False)
+
+    ingest_file(store, str(path), chunksize=3)
+
+    assert store.read_partition('A', DAY.date())['timestamp'].dt.hour.tolist() == [0, 1, 2, 3, 4, 5]
+    assert store.watermarks() == {'A': DAY + pd.Timedelta(hours=5)}
+
+
+def test_rows_at_or_before_the_watermark_are_skipped(tmp_path):
+    store = FeederStore(str(tmp_path / 'store'))
+    store.update_watermarks({'A': DAY + pd.Timedelta(hours=2)})
+    path = tmp_path / 'export.csv'
+    readings('A', [1, 2, 3]).to_csv(path, index=False)
+
+    changed = ingest_file(store, str(path))
+
+    assert changed == {('A', DAY.date())}
+    assert store.read_partition('A', DAY.date())['timestamp'].dt.hour.tolist() == [3]
+
+
+# ==================== REPLAY ====================
+def test_chunk_written_twice_reads_back_once(tmp_path):
+    store = FeederStore(str(tmp_path / 'store'))
+    chunk = readings('A', [0, 1, 2])
+    # A crash between write() and update_watermarks() replays the chunk
+    store.write(chunk)
+    store.write(chunk)
+
+    df = store.read_partition('A', DAY.date())
+
+    assert len(store.partition_files('A', DAY.date())) == 2
+    assert df['timestamp'].is_unique
+    assert df['timestamp'].dt.hour.tolist() == [0, 1, 2]
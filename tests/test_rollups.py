@@ -0,0 +1,42 @@
+import pandas as pd
+
+from feeder_store import FeederStore
+from rollups import ROLLUP_SCHEMA, RollupStore, query_feeder
+
+DAY = pd.Timestamp('2024-03-01')
+
+
+# ==================== TIERS ====================
+def test_update_keeps_threshold_counts_per_bucket(tmp_path):
+    store = FeederStore(str(tmp_path / 'store'))
+    store.write(pd.DataFrame({
+        'timestamp': [DAY + pd.Timedelta(minutes=15 * n) for n in range(8)],
+        'feeder_id': 'A',
+        'i': [100.0, 170.0, 185.0, 190.0] * 2,
+        'i_nom': 200.0,
+    }))
+    rollups = RollupStore(store)
+    rollups.update([('A', DAY.date())])
+
+    frame = rollups.read_period('1h', 'A', '2024-03')
+
+    assert list(frame.columns) == ROLLUP_SCHEMA.names
+    assert frame['above_80'].tolist() == [3, 3]
+    assert frame['above_90'].tolist() == [2, 2]
+
+
+# ==================== QUERY PLANNER ====================
+def test_feeder_without_rollups_falls_back_to_raw(tmp_path):
+    store = FeederStore(str(tmp_path / 'store'))
+    store.write(pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', '2024-12-31', freq='6h'),
+        'feeder_id': 'A',
+        'i': 150.0,
+        'i_nom': 200.0,
+    }))
+
+    start, end = pd.Timestamp('2024-01-01'), pd.Timestamp('2025-01-01')
+    for aggregated in (False, True):
+        frame, tier = query_feeder(store, 'A', start, end, 700, aggregated=aggregated)
+        assert tier == 'raw'
+        assert len(frame) == 1461
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from rollups import aggregate
+from system_kpis import SystemKPIs
+
+
+def buckets(i, i_nom):
+    return aggregate(pd.DataFrame({
+        'timestamp': pd.date_range('2024-03-01', periods=4, freq='1h'),
+        'i': i,
+        'i_nom': i_nom,
+    }), '1h')
+
+
+# ==================== I_NOM ====================
+def test_registry_i_nom_wins_over_recorded_i_nom():
+    # Readings were recorded against 200 A, the registry now rates the feeder at 100 A
+    kpis = SystemKPIs.from_buckets({'A': buckets(95.0, 200.0)}, ['A', 'B'], [100.0, 300.0])
+
+    summary = kpis.summary()
+
+    assert kpis.i_nom.tolist() == [100.0, 300.0]
+    assert summary['capacity'] == 100.0
+    assert summary['status_counts'] == {'Normal': 0, 'Warning': 0, 'Critical': 1}
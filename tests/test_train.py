@@ -0,0 +1,26 @@
+import os
+
+from train import _run_batch
+
+CRASHER = 'CRASH'
+
+
+def fit_or_crash(feeder_id):
+    if feeder_id == CRASHER:
+        os._exit(1)
+    return {'feeder_id': feeder_id, 'status': 'ok', 'pid': os.getpid()}
+
+
+# ==================== CRASH RETRY ====================
+def test_crash_before_any_fit_finishes_only_fails_the_crasher():
+    tasks = {f: (f,) for f in [CRASHER, 'A', 'B', 'C']}
+    rows = _run_batch(tasks, 2, 30, 'test', fit_or_crash)
+    assert rows[CRASHER]['status'] == 'failed'
+    assert rows[CRASHER]['error'].startswith('worker crashed')
+    assert all(rows[f]['status'] == 'ok' for f in ['A', 'B', 'C'])
+
+
+def test_batch_without_crashes_runs_once():
+    tasks = {f: (f,) for f in ['A', 'B']}
+    rows = _run_batch(tasks, 2, 30, 'test', fit_or_crash)
+    assert [rows[f]['status'] for f in tasks] == ['ok', 'ok']
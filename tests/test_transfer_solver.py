@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from transfer_solver import solve_transfer, tie_matrix
+
+FEEDERS = ['A', 'B', 'C']
+
+
+def fraction(plan, source, target):
+    transfers = plan['transfers']
+    match = transfers[(transfers['source'] == source) & (transfers['target'] == target)]
+    return float(match['fraction'].sum())
+
+
+# ==================== TOPOLOGY ====================
+def test_tie_matrix_is_symmetric_without_self_loops():
+    allowed = tie_matrix(FEEDERS, {'A': ['B'], 'C': ['X']})
+    expected = np.array([
+        [False, True, False],
+        [True, False, False],
+        [False, False, False],
+    ])
+    np.testing.assert_array_equal(allowed, expected)
+
+
+def test_tie_matrix_without_ties_allows_every_pair():
+    allowed = tie_matrix(FEEDERS)
+    np.testing.assert_array_equal(allowed, ~np.eye(3, dtype=bool))
+
+
+# ==================== LP ====================
+def test_lp_matches_hand_solved_split():
+    # Moving x A of A's 120 A onto B: (20 + x) / 100 = (60 + 120 - x) / 300 gives x = 30, both at 50%
+    plan = solve_transfer(FEEDERS, [[120.0], [20.0], [60.0]], [200.0, 100.0, 300.0], ['A'])
+    assert plan['solver'] == 'lp'
+    assert fraction(plan, 'A', 'B') == pytest.approx(0.25, abs=1e-6)
+    assert fraction(plan, 'A', 'C') == pytest.approx(0.75, abs=1e-6)
+    assert plan['max_utilization'] == pytest.approx(50.0, abs=1e-4)
+    assert plan['shed']['A'] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_lp_minimizes_the_peak_over_every_step():
+    # B is hot at step 1 and C at step 0; the worst step of each target decides the split
+    load = [[100.0, 100.0], [50.0, 150.0], [150.0, 50.0]]
+    plan = solve_transfer(FEEDERS, load, [400.0, 400.0, 400.0], ['A'])
+    assert fraction(plan, 'A', 'B') == pytest.approx(0.5, abs=1e-6)
+    assert fraction(plan, 'A', 'C') == pytest.approx(0.5, abs=1e-6)
+    assert plan['max_utilization'] == pytest.approx(50.0, abs=1e-4)
+
+
+@pytest.mark.parametrize('method', ['lp', 'greedy'])
+def test_load_only_moves_across_tie_switches(method):
+    # C has more headroom, but only B shares a tie switch with A
+    plan = solve_transfer(FEEDERS, [[60.0], [20.0], [0.0]], [200.0, 200.0, 200.0], ['A'], ties={'A': ['B']},
+                          method=method)
+    assert set(plan['transfers']['target']) == {'B'}
+    assert fraction(plan, 'A', 'B') == pytest.approx(1.0, abs=1e-6)
+    assert list(plan['utilization'].index) == ['B']
+
+
+@pytest.mark.parametrize('method', ['lp', 'greedy'])
+def test_short_capacity_is_shed_without_overloading(method):
+    # B can take 80 of A's 120 A before reaching its I_nom; the rest is shed
+    plan = solve_transfer(FEEDERS, [[120.0], [20.0], [0.0]], [200.0, 100.0, 200.0], ['A'], ties={'A': ['B']},
+                          method=method)
+    placed = fraction(plan, 'A', 'B')
+    assert placed + plan['shed']['A'] == pytest.approx(1.0, abs=1e-6)
+    assert plan['max_utilization'] <= 100.0 + 1e-6
+    if method == 'lp':
+        assert placed == pytest.approx(2 / 3, abs=1e-6)
+    else:
+        assert placed == pytest.approx(0.65, abs=1e-6)
+
+
+def test_tripped_feeders_never_receive_load():
+    plan = solve_transfer(FEEDERS, [[50.0], [50.0], [20.0]], [200.0, 200.0, 200.0], ['A', 'B'])
+    assert set(plan['transfers']['target']) == {'C'}
+    assert plan['utilization'].loc['C', 'after'] == pytest.approx(60.0, abs=1e-4)
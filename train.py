@@ -0,0 +1,217 @@
+import argparse
+import json
+import math
+import os
+import signal
+import time
+from contextlib import contextmanager
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import pandas as pd
+from joblib.externals.loky import ProcessPoolExecutor
+
+from features import FEATURE_STORE
+from feeder_registry import FeederRegistry
+from feeder_store import DEFAULT_STORE_DIR, FeederStore
+from forecasting import DEFAULT_METHOD, FORECAST_FREQ, HISTORY_DAYS, METHODS, fit_feeder
+from hierarchy import Hierarchy
+from model_registry import DEFAULT_MODEL_DIR
+
+# ==================== CONFIG ====================
+DEFAULT_TIMEOUT = 600
+REPORT_NAME = '_training_report.json'
+
+
+class FitTimeout(Exception):
+    """Raised inside a worker when a single feeder fit runs past its budget"""
+
+
+# ==================== WORKER ====================
+def _raise_timeout(signum, frame):
+    raise FitTimeout()
+
+
+@contextmanager
+def time_limit(seconds):
+    """Raise FitTimeout inside the block once `seconds` have elapsed (main thread, POSIX only)"""
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def limit_native_threads():
+    # One BLAS/OpenMP thread per worker, otherwise N workers oversubscribe N cores
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+
+def train_one(feeder_id, method=DEFAULT_METHOD, end=None, history_days=HISTORY_DAYS, timeout=DEFAULT_TIMEOUT,
+              store_root=DEFAULT_STORE_DIR, model_dir=DEFAULT_MODEL_DIR, warm_start=True, members=None, exog=True):
+    """Fit one feeder, or an aggregate node of members, and return a report row; never raises"""
+    started = time.perf_counter()
+    row = {'feeder_id': feeder_id, 'method': method, 'pid': os.getpid()}
+    try:
+        with time_limit(timeout):
+            forecaster = fit_feeder(FeederStore(store_root), feeder_id, method, end, history_days, model_dir, warm_start,
+                                    members, exog)
+        row.update(status='ok', version=forecaster.version, n_obs=len(forecaster.history), metrics=forecaster.metrics)
+    except FitTimeout:
+        row.update(status='timeout', error=f"fit exceeded {timeout}s")
+    except Exception as exc:
+        row.update(status='failed', error=f"{type(exc).__name__}: {exc}")
+    row['fit_seconds'] = round(time.perf_counter() - started, 3)
+    return row
+
+
+# ==================== BATCH ====================
+def train_all(feeder_ids, method=DEFAULT_METHOD, n_jobs=None, timeout=DEFAULT_TIMEOUT, end=None,
+              history_days=HISTORY_DAYS, store_root=DEFAULT_STORE_DIR, model_dir=DEFAULT_MODEL_DIR, warm_start=True,
+              nodes=None, exog=True):
+    """Fit many feeders across a process pool.
+
+    nodes optionally maps aggregate node ids to their member feeders; they
+    are fitted as extra tasks for forecast reconciliation. Each task
+    enforces its own timeout in the worker. Any failure, including a
+    crashed worker, is reported for that feeder only.
+    """
+    nodes = nodes or {}
+    feeder_ids = list(feeder_ids) + list(nodes)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    if exog:
+        # Build the window's regressors once here; the workers then read them from the feature cache
+        stop = pd.Timestamp(end or datetime.now())
+        FEATURE_STORE.matrix(pd.date_range(stop - timedelta(days=history_days), stop, freq=FORECAST_FREQ), FORECAST_FREQ)
+    tasks = {
+        feeder_id: (feeder_id, method, end, history_days, timeout, store_root, model_dir, warm_start,
+                    nodes.get(feeder_id), exog)
+        for feeder_id in feeder_ids
+    }
+    rows = _run_batch(tasks, n_jobs, timeout, method)
+
+    report = {
+        'method': method,
+        'n_jobs': n_jobs,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'feeders': [rows[f] for f in feeder_ids],
+    }
+    _write_report(report, model_dir)
+    return report
+
+
+def _deadline(n_tasks, n_jobs, timeout):
+    # The worker alarm normally fires first; the batch deadline only guards against hung workers
+    return time.perf_counter() + timeout * (math.ceil(n_tasks / n_jobs) + 1) if timeout else None
+
+
+def _run_batch(tasks, n_jobs, timeout, method, fn=train_one):
+    """Run every task through the pool, then retry the feeders a crashed worker took down with it"""
+    rows = _run_pool(tasks, n_jobs, _deadline(len(tasks), n_jobs, timeout), method, fn)
+    broken = _crashed(rows)
+    if broken:
+        # A crash breaks every future still pending, so most victims are innocent: rerun them together first
+        rows.update(_run_pool({f: tasks[f] for f in broken}, n_jobs, _deadline(len(broken), n_jobs, timeout),
+                              method, fn))
+        broken = _crashed(rows)
+        if len(broken) > 1:
+            # Crashed again: isolate each victim so only the feeder that kills its worker stays failed
+            for feeder_id in broken:
+                rows.update(_run_pool({feeder_id: tasks[feeder_id]}, 1, _deadline(1, 1, timeout), method, fn))
+    return rows
+
+
+def _crashed(rows):
+    return [f for f, row in rows.items() if row.get('error', '').startswith('worker crashed')]
+
+
+def _run_pool(tasks, n_jobs, deadline, method, fn=train_one):
+    """fn(*args) for each feeder_id -> args of tasks in one process pool; a report row per feeder"""
+    rows, futures = {}, {}
+    pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=limit_native_threads)
+    try:
+        futures = {feeder_id: pool.submit(fn, *args) for feeder_id, args in tasks.items()}
+        for feeder_id, future in futures.items():
+            try:
+                remaining = None if deadline is None else max(0, deadline - time.perf_counter())
+                rows[feeder_id] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                rows[feeder_id] = _error_row(feeder_id, method, 'timeout', "worker did not respond")
+            except BrokenProcessPool as exc:
+                rows[feeder_id] = _error_row(feeder_id, method, 'failed', f"worker crashed: {exc}")
+    finally:
+        # Past the deadline, kill workers still busy instead of leaving them running
+        hung = any(not future.done() for future in futures.values()) or len(futures) < len(tasks)
+        pool.shutdown(wait=True, kill_workers=hung)
+    return rows
+
+
+def _error_row(feeder_id, method, status, error):
+    return {'feeder_id': feeder_id, 'method': method, 'status': status, 'error': error, 'fit_seconds': None}
+
+
+def _write_report(report, model_dir):
+    os.makedirs(model_dir, exist_ok=True)
+    path = os.path.join(model_dir, REPORT_NAME)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    return path
+
+
+def format_report(report):
+    """Render a training report as a plain-text table"""
+    lines = [f"{'Feeder':<12}{'Status':<10}{'Version':>8}{'Fit (s)':>10}{'MAPE %':>10}  Error"]
+    for row in report['feeders']:
+        seconds = f"{row['fit_seconds']:.1f}" if row.get('fit_seconds') is not None else '-'
+        mape = row.get('metrics', {}).get('mape')
+        mape = f"{mape:.2f}" if mape is not None else '-'
+        version = f"v{row['version']}" if row.get('version') else '-'
+        lines.append(f"{row['feeder_id']:<12}{row['status']:<10}{version:>8}{seconds:>10}{mape:>10}  {row.get('error', '')}")
+    ok = sum(row['status'] == 'ok' for row in report['feeders'])
+    fit_total = sum(row.get('fit_seconds') or 0 for row in report['feeders'])
+    lines.append(
+        f"{ok}/{len(report['feeders'])} feeders fitted in {report['wall_seconds']:.1f}s wall "
+        f"({fit_total:.1f}s of fitting on {report['n_jobs']} workers)"
+    )
+    return '\n'.join(lines)
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Retrain per-feeder forecasters in parallel")
+    parser.add_argument('feeders', nargs='*', help="Feeder ids (default: every feeder in the store)")
+    parser.add_argument('--method', choices=METHODS, default=DEFAULT_METHOD)
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Seconds allowed per feeder fit")
+    parser.add_argument('--history-days', type=int, default=HISTORY_DAYS)
+    parser.add_argument('--full', action='store_true', help="Ignore registered models and search from scratch")
+    parser.add_argument('--no-hierarchy', action='store_true',
+                        help="Skip the substation and system models used to reconcile the All Feeders forecast")
+    parser.add_argument('--no-exog', action='store_true', help="Fit without calendar and weather regressors")
+    args = parser.parse_args()
+
+    feeder_ids = args.feeders or FeederStore().feeders()
+    nodes = None
+    if not args.feeders and not args.no_hierarchy:
+        # Aggregates only make sense over the whole network
+        hierarchy = Hierarchy.from_registry(FeederRegistry.load(fallback_ids=feeder_ids), feeder_ids)
+        nodes = hierarchy.members()
+    report = train_all(feeder_ids, args.method, args.jobs, args.timeout, history_days=args.history_days,
+                       warm_start=not args.full, nodes=nodes, exog=not args.no_exog)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
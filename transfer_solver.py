@@ -0,0 +1,176 @@
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+# ==================== CONFIG ====================
+# Cost of leaving a whole source feeder unserved, in units of peak utilization
+SHED_PENALTY = 1000.0
+# Weight of the average target peak, which breaks ties once the maximum is fixed
+SPREAD_WEIGHT = 0.01
+# Share of a source's load the greedy fallback places per step
+GREEDY_STEP = 0.05
+
+
+# ==================== TOPOLOGY ====================
+def tie_matrix(feeder_ids, ties=None):
+    """Boolean (feeder x feeder) matrix of pairs joined by a tie switch.
+
+    ties maps a feeder id to its neighbours and is treated as undirected.
+    Without ties every pair is assumed to be switchable.
+    """
+    n = len(feeder_ids)
+    if ties is None:
+        allowed = np.ones((n, n), dtype=bool)
+    else:
+        position = {f: i for i, f in enumerate(feeder_ids)}
+        allowed = np.zeros((n, n), dtype=bool)
+        for feeder_id, neighbours in ties.items():
+            for neighbour in neighbours:
+                if feeder_id in position and neighbour in position:
+                    allowed[position[feeder_id], position[neighbour]] = True
+                    allowed[position[neighbour], position[feeder_id]] = True
+    np.fill_diagonal(allowed, False)
+    return allowed
+
+
+# ==================== SOLVERS ====================
+def _solve_lp(load, i_nom, sources, targets, edges):
+    """Min-max utilization LP over transfer fractions, solved with HiGHS.
+
+    Variables are one fraction per (source, target) edge, one shed fraction
+    per source, the peak utilization v of every target and their maximum u.
+    A small weight on the sum of v keeps the load spread once u is fixed by
+    a neighbour that is already hot.
+    """
+    n_edges, n_sources, n_targets, n_steps = len(edges), len(sources), len(targets), load.shape[1]
+    shed_col, v_col, u = n_edges, n_edges + n_sources, n_edges + n_sources + n_targets
+    n_vars = u + 1
+    edge_source = np.array([e[0] for e in edges], dtype=int)
+    edge_target = np.array([e[1] for e in edges], dtype=int)
+    source_row = {s: k for k, s in enumerate(sources)}
+    target_row = {t: k for k, t in enumerate(targets)}
+
+    # Every source is fully placed or shed
+    rows = np.concatenate([[source_row[s] for s in edge_source], np.arange(n_sources)])
+    cols = np.concatenate([np.arange(n_edges), shed_col + np.arange(n_sources)])
+    a_eq = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_sources, n_vars))
+    b_eq = np.ones(n_sources)
+
+    # Target t at step h: load[t, h] + sum f_e * load[s_e, h] <= v_t * i_nom[t]  and  <= i_nom[t]
+    t_index = np.array([target_row[t] for t in edge_target], dtype=int)
+    step = np.arange(n_steps)
+    edge_rows = (t_index[:, None] * n_steps + step[None, :]).ravel()
+    edge_cols = np.repeat(np.arange(n_edges), n_steps)
+    edge_vals = load[edge_source].ravel()
+    n_rows = n_targets * n_steps
+    nominal = np.repeat(i_nom[targets], n_steps)
+    peak = sparse.csr_matrix(
+        (np.concatenate([edge_vals, -nominal]),
+         (np.concatenate([edge_rows, np.arange(n_rows)]), np.concatenate([edge_cols, v_col + np.repeat(np.arange(n_targets), n_steps)]))),
+        shape=(n_rows, n_vars)
+    )
+    cap = sparse.csr_matrix((edge_vals, (edge_rows, edge_cols)), shape=(n_rows, n_vars))
+    # v_t <= u
+    below_u = sparse.csr_matrix(
+        (np.concatenate([np.ones(n_targets), -np.ones(n_targets)]),
+         (np.tile(np.arange(n_targets), 2), np.concatenate([v_col + np.arange(n_targets), np.full(n_targets, u)]))),
+        shape=(n_targets, n_vars)
+    )
+    base = load[targets].ravel()
+    a_ub = sparse.vstack([peak, cap, below_u]).tocsr()
+    b_ub = np.concatenate([-base, np.maximum(nominal - base, 0), np.zeros(n_targets)])
+
+    cost = np.zeros(n_vars)
+    cost[shed_col:v_col] = SHED_PENALTY
+    cost[v_col:u] = SPREAD_WEIGHT / n_targets
+    cost[u] = 1.0
+    bounds = [(0, 1)] * (n_edges + n_sources) + [(0, None)] * (n_targets + 1)
+    result = linprog(cost, A_ub=a_ub, b_ub=b_ub, A_eq=a_eq, b_eq=b_eq, bounds=bounds, method='highs')
+    if result.status != 0:
+        return None
+    return np.clip(result.x[:n_edges], 0, 1), np.clip(result.x[shed_col:v_col], 0, 1)
+
+
+def _solve_greedy(load, i_nom, sources, targets, edges):
+    """Place each source in GREEDY_STEP slices on whichever tie keeps the peak lowest"""
+    fractions = np.zeros(len(edges))
+    shed = np.zeros(len(sources))
+    target_load = load.copy()
+    edge_source = np.array([e[0] for e in edges], dtype=int)
+    edge_target = np.array([e[1] for e in edges], dtype=int)
+    # Largest sources first, while the most headroom is still available
+    order = sorted(range(len(sources)), key=lambda k: -load[sources[k]].max())
+    for k in order:
+        s = sources[k]
+        options = np.flatnonzero(edge_source == s)
+        remaining = 1.0
+        while remaining > 1e-9 and len(options):
+            piece = min(GREEDY_STEP, remaining)
+            candidate = target_load[edge_target[options]] + piece * load[s]
+            peak = candidate.max(axis=1) / i_nom[edge_target[options]]
+            best = int(np.argmin(peak))
+            if peak[best] > 1:
+                break
+            fractions[options[best]] += piece
+            target_load[edge_target[options[best]]] = candidate[best]
+            remaining -= piece
+        shed[k] = max(remaining, 0.0)
+    return fractions, shed
+
+
+def solve_transfer(feeder_ids, load, i_nom, tripped, ties=None, method='lp'):
+    """Split the load of tripped feeders across their tie neighbours.
+
+    load is (feeders x steps) current + forecast load. The plan minimizes
+    the highest utilization reached by any tie neighbour over the
+    horizon, never loads a feeder beyond its I_nom and only moves load
+    across tie switches; whatever cannot be placed is reported as shed.
+    Falls back to a greedy fill when the LP solver fails.
+    """
+    started = time.perf_counter()
+    feeder_ids = list(feeder_ids)
+    load = np.atleast_2d(np.asarray(load, dtype='float64'))
+    i_nom = np.asarray(i_nom, dtype='float64')
+    position = {f: i for i, f in enumerate(feeder_ids)}
+    sources = [position[f] for f in tripped]
+    allowed = tie_matrix(feeder_ids, ties)
+    allowed[:, sources] = False
+
+    edges = [(s, t) for s in sources for t in np.flatnonzero(allowed[s])]
+    targets = sorted({t for _, t in edges})
+    solution = None
+    solver = method
+    if edges and method == 'lp':
+        solution = _solve_lp(load, i_nom, sources, targets, edges)
+    if solution is None:
+        solver = 'greedy'
+        solution = _solve_greedy(load, i_nom, sources, targets, edges)
+    fractions, shed = solution
+
+    after = load.copy()
+    after[sources] = 0
+    for (s, t), fraction in zip(edges, fractions):
+        after[t] += fraction * load[s]
+    transfers = pd.DataFrame({
+        'source': [feeder_ids[s] for s, _ in edges],
+        'target': [feeder_ids[t] for _, t in edges],
+        'fraction': fractions,
+        'peak_amps': [fraction * load[s].max() for (s, _), fraction in zip(edges, fractions)],
+    })
+    transfers = transfers[transfers['fraction'] > 1e-6].reset_index(drop=True)
+    peak_before = load[targets].max(axis=1) / i_nom[targets] * 100
+    peak_after = after[targets].max(axis=1) / i_nom[targets] * 100
+    return {
+        'transfers': transfers,
+        'shed': pd.Series(shed, index=list(tripped), name='shed_fraction'),
+        'utilization': pd.DataFrame(
+            {'before': peak_before, 'after': peak_after},
+            index=pd.Index([feeder_ids[t] for t in targets], name='feeder_id')
+        ),
+        'max_utilization': float(peak_after.max()) if targets else np.nan,
+        'solver': solver,
+        'seconds': time.perf_counter() - started,
+    }
@@ -0,0 +1,160 @@
+import argparse
+import json
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from downsample import target_points
+from feeder_registry import DEFAULT_I_NOM, FeederRegistry
+from feeder_stats import batch_statistics, stack_feeders, system_total
+from feeder_store import FeederStore
+from forecasting import HORIZON, combine_forecasts, forecast_accuracy
+from hierarchy import SYSTEM_NODE, Hierarchy, node_forecast, reconcile_models
+from model_registry import ModelRegistry
+from recommendation import forecast_load_matrix, recommend_transfers
+from result_cache import ResultCache, snapshot_key
+from transfer_solver import tie_matrix
+from rollups import RollupStore, plan_freq, query_feeder
+from system_kpis import SystemKPIs, read_kpi_buckets
+
+# ==================== CONFIG ====================
+DEFAULT_INTERVAL = 60
+# The dashboard opens on the last 7 days; those windows are precomputed
+DEFAULT_WINDOW_DAYS = (7,)
+# Must match the resolution main() asks for
+CHART_POINTS = target_points(900)
+
+
+def default_windows(window_days=DEFAULT_WINDOW_DAYS, today=None):
+    today = today or date.today()
+    return [(today - timedelta(days=days), today) for days in window_days]
+
+
+# ==================== SNAPSHOT ====================
+def compute_snapshot(store, registry, feeder_ids, start_date, end_date, max_points=CHART_POINTS, rollups=None,
+                     ties=None, substations=None, i_nom=None):
+    """Everything the dashboard shows for one date window, computed once for all sessions"""
+    rollups = rollups or RollupStore(store)
+    # Snapshots serve the "All Feeders" view, which reads the aggregated tier
+    frames = {f: query_feeder(store, f, start_date, end_date, max_points, rollups, aggregated=True)[0] for f in feeder_ids}
+    values, i_nom, envelope = stack_feeders(frames)
+    feeder_stats = batch_statistics(values, i_nom if len(i_nom) else None, envelope)
+    forecasters = {f: registry.load(f) for f in feeder_ids}
+    predictions = {f: m.predict(HORIZON) if m is not None else None for f, m in forecasters.items()}
+    forecast, accuracy = combine_forecasts(predictions.values(), [forecast_accuracy(m) for m in forecasters.values()])
+    # The system forecast is reconciled over feeders, substations and the system, as the dashboard defaults to
+    fitted = [f for f in feeder_ids if forecasters[f] is not None]
+    reconciled = None
+    if fitted:
+        hierarchy = Hierarchy({f: (substations or {}).get(f, '') for f in fitted})
+        nodes = {node: registry.load(node) for node in hierarchy.aggregates}
+        node_predictions = {node: m.predict(HORIZON) if m is not None else None for node, m in nodes.items()}
+        reconciled = reconcile_models(hierarchy, {**forecasters, **nodes}, {**predictions, **node_predictions})
+        forecast = node_forecast(reconciled, SYSTEM_NODE)
+
+    # Load profile and transfer recommendations for every possible source feeder
+    available = [f for f in feeder_ids if len(frames[f]) and np.isfinite(feeder_stats.loc[f, 'current'])]
+    load = forecast_load_matrix(
+        feeder_stats.loc[available, 'current'].to_numpy(), [predictions[f] for f in available], HORIZON
+    )
+    nominal = np.array([frames[f]['i_nom'].iloc[-1] for f in available])
+    recommendations = {}
+    if len(available) >= 2:
+        allowed = tie_matrix(available, ties)
+        recommendations = recommend_transfers(available, load, nominal, allowed=allowed)
+
+    kpi_buckets = {f: read_kpi_buckets(store, rollups, f, start_date, end_date) for f in feeder_ids}
+    # Utilization is measured against the registry I_nom, as on the dashboard
+    system_kpis = SystemKPIs.from_buckets(kpi_buckets, feeder_ids,
+                                          [(i_nom or {}).get(f, DEFAULT_I_NOM) for f in feeder_ids])
+
+    return {
+        'window': (start_date, end_date),
+        'frames': frames,
+        'system_load': system_total(frames, plan_freq(start_date, end_date, max_points, aggregated=True)),
+        'feeder_stats': feeder_stats,
+        'forecast': forecast,
+        'forecast_accuracy': accuracy,
+        'reconciled_forecast': reconciled,
+        'load_profile': (available, load, nominal),
+        'recommendations': recommendations,
+        'system_kpis': system_kpis,
+    }
+
+
+def input_signature(store, registry, feeder_ids, start_date, end_date):
+    """Changes whenever a partition in the window or an active model changes"""
+    return (
+        tuple(store.partition_tokens(f, start_date, end_date) for f in feeder_ids),
+        tuple(registry.manifest_mtime(f) for f in feeder_ids),
+    )
+
+
+# ==================== WORKER ====================
+def publish(cache, store, registry, feeder_ids, windows, max_points=CHART_POINTS, signatures=None, ties=None,
+            substations=None, i_nom=None):
+    """Recompute the snapshots whose inputs changed and confirm the rest.
+
+    Returns the keys that were recomputed.
+    """
+    signatures = {} if signatures is None else signatures
+    rollups = RollupStore(store)
+    keys, recomputed = [], []
+    aggregates = Hierarchy({f: (substations or {}).get(f, '') for f in feeder_ids}).aggregates
+    for start_date, end_date in windows:
+        key = snapshot_key(start_date, end_date, max_points)
+        keys.append(key)
+        # Tie switches decide the recommendations, substations the reconciliation and I_nom the KPIs, so a registry
+        # edit recomputes too
+        signature = input_signature(store, registry, feeder_ids, start_date, end_date) + (
+            tuple(registry.manifest_mtime(node) for node in aggregates),
+            json.dumps(ties, sort_keys=True),
+            json.dumps(substations, sort_keys=True),
+            json.dumps(i_nom, sort_keys=True),
+        )
+        if signatures.get(key) == signature and cache.stamp(key) is not None:
+            cache.touch(key)
+            continue
+        snapshot = compute_snapshot(store, registry, feeder_ids, start_date, end_date, max_points, rollups, ties,
+                                    substations, i_nom)
+        cache.put(key, snapshot)
+        signatures[key] = signature
+        recomputed.append(key)
+    cache.prune(keys)
+    return recomputed
+
+
+def run(cache, store, registry, feeder_ids=None, window_days=DEFAULT_WINDOW_DAYS,
+        interval=DEFAULT_INTERVAL, once=False):
+    """Publish snapshots every `interval` seconds, or once"""
+    signatures = {}
+    while True:
+        started = time.perf_counter()
+        # The dashboard shows the registry's feeders, or every stored feeder without a registry file
+        network = FeederRegistry.load(fallback_ids=store.feeders())
+        feeders = list(feeder_ids or network.ids)
+        recomputed = publish(cache, store, registry, feeders, default_windows(window_days), signatures=signatures,
+                             ties=network.ties, substations=network.frame['substation'].to_dict(),
+                             i_nom={f: float(network.i_nom(f)) for f in feeders})
+        if recomputed:
+            print(f"[worker] recomputed {len(recomputed)} snapshots in {time.perf_counter() - started:.2f}s")
+        if once:
+            return
+        time.sleep(interval)
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Precompute dashboard statistics, forecasts and recommendations")
+    parser.add_argument('feeders', nargs='*', help="Feeder ids (default: every feeder in the registry)")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="Seconds between refreshes")
+    parser.add_argument('--days', type=int, nargs='+', default=list(DEFAULT_WINDOW_DAYS),
+                        help="Window lengths ending today to precompute")
+    parser.add_argument('--once', action='store_true', help="Publish once and exit")
+    args = parser.parse_args()
+    run(ResultCache(), FeederStore(), ModelRegistry(), args.feeders or None, args.days, args.interval, args.once)
+
+
+if __name__ == "__main__":
+    main()